@@ -1,13 +1,19 @@
 import streamlit as st
 from streamlit_ace import st_ace
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+import json
 import re
 import datetime
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List
 import os
+import tempfile
 from dotenv import load_dotenv
 
+from upload_client import spool_upload, submit_audio
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,9 +23,43 @@ APP_PORT_BACKEND = os.getenv("APP_PORT_BACKEND")
 DEFAULT_LLM_API_URL = os.getenv("LLM_API_URL")
 DEFAULT_LLM_API_KEY = os.getenv("LLM_API_KEY")
 DEFAULT_LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME")
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 32))
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", 2))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_TRANSCRIBE_TIMEOUT = float(os.getenv("HTTP_TRANSCRIBE_TIMEOUT", 30))
+HTTP_SUMMARIZE_TIMEOUT = float(os.getenv("HTTP_SUMMARIZE_TIMEOUT", 30))
+HTTP_EVENTS_TIMEOUT = float(os.getenv("HTTP_EVENTS_TIMEOUT", 60))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "meeting-assistant-uploads"))
+UPLOAD_SPOOL_TTL_SECONDS = float(os.getenv("UPLOAD_SPOOL_TTL_SECONDS", 24 * 3600))
+UPLOAD_PARALLEL_CHUNKS = int(os.getenv("UPLOAD_PARALLEL_CHUNKS", 4))
+UPLOAD_CHUNK_RETRIES = int(os.getenv("UPLOAD_CHUNK_RETRIES", 3))
 # --- End Configuration ---
 
 
+# --- HTTP Client ---
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    每个 Streamlit 服务进程共享一个 requests.Session（所有用户会话共用），
+    与后端的连接保持长连接并复用，而不是每次请求重新建立。
+    仅对建立连接失败的情况重试（此时请求尚未发出）。
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=Retry(total=None, connect=HTTP_CONNECT_RETRIES, read=0, redirect=0, status=0, backoff_factor=0.3),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def http_timeout(read_seconds: float) -> Tuple[float, float]:
+    return (HTTP_CONNECT_TIMEOUT, read_seconds)
+
+
 # --- Session State Initialization ---
 def init_session_state():
     st.session_state.setdefault('meeting_info', {
@@ -36,6 +76,7 @@ def init_session_state():
     st.session_state.setdefault('identified_speakers', [])
     st.session_state.setdefault('speaker_names', {})
     st.session_state.setdefault('summary', '')
+    st.session_state.setdefault('summary_timings', {})
     st.session_state.setdefault('error_message', '')
     st.session_state.setdefault('llm_config', {
         'api_url': DEFAULT_LLM_API_URL,
@@ -61,63 +102,24 @@ def format_transcription_with_names(transcription: str, mapping: dict) -> str:
     return '\n'.join(out)
 
 
-def generate_summary_prompt(info: dict, formatted_transcription: str) -> str:
-    topic = info['topic'] or '未指定主题'
-    date_str = info['date'].strftime('%Y年%m月%d日')
-    time_s = info['time'].strftime('%H:%M')
-    loc = info['location'] or '未指定地点'
-    example_date_1 = (datetime.date.today() + datetime.timedelta(days=10)).strftime('%Y-%m-%d')
-    example_date_2 = (datetime.date.today() + datetime.timedelta(days=15)).strftime('%Y-%m-%d')
-
-    return f"""
-下面是一段会议录音的转写文本（已按发言人分离，但可能存在少量错译和说话者识别误差）。请你根据以下要求，生成一份高质量的会议纪要（Markdown格式）：
-
-1. **自动校正**：修正明显的错别字、口语冗余和翻译失误。
-2. **说话者融合**：如果发现同一内容被拆分，应合并；说话者标识不准确时，请根据上下文合并或统一标记为“某某（未知）”。
-3. **结构清晰**：
-   - 标题层级：`# 会议纪要`、`## 基本信息`、`## 主要讨论内容`、`## 会议决议/结论`、`## 行动项`
-   - 要点使用无序列表 `-` 或有序列表 `1.`
-   - 关键术语、决策或数据用**加粗**突出
-4. **详细度**：
-   - “主要讨论内容”中，列出 3–5 个议题，每个议题下简要总结讨论要点（2–3 行）。
-   - “会议决议/结论”中，明确达成的结论或决定。
-   - “行动项”中，为每条行动添加负责人与**建议**的完成期限格式：`- [负责人姓名] — 在 YYYY-MM-DD 前完成：任务描述`。 如果原文中未提及具体负责人或日期，请留空或写“待定”。
-
-**会议基本信息**
-- 主题：{topic}
-- 时间：{date_str} {time_s}
-- 地点：{loc}
-
-**会议内容（转写文本）：**
-{formatted_transcription}
-
----
-请基于以上信息生成会议纪要：
-# 会议纪要
-## 基本信息
-- **主题**: {topic}
-- **时间**: {date_str} {time_s}
-- **地点**: {loc}
-- **参会人员**: (如果转写文本中能识别，请列出；否则留空或写“未记录”)
-
-## 主要讨论内容
-(请根据会议内容填写，每个议题后附上主要发言人的讨论摘要)
-1. **议题一**：...
-   - [发言人A]: ...
-   - [发言人B]: ...
-2. **议题二**：...
-3. **议题三**：...
-
-## 会议决议/结论
-(请根据会议内容明确总结)
-- ...
-- ...
-
-## 行动项
-(请按格式填写，如无明确负责人/日期则留空或标注“待定”)
-- [张三] — 在 {example_date_1} 前完成：整理会议资料并分发
-- [李四] — 在 {example_date_2} 前完成：与供应商确认下一步细节
-"""
+def iter_job_events(url: str, timeout: Tuple[float, float]):
+    """Parse the backend's Server-Sent Events stream into (event, data) tuples."""
+    with get_http_session().get(url, stream=True, timeout=timeout, headers={'Accept': 'text/event-stream'}) as resp:
+        resp.raise_for_status()
+        resp.encoding = 'utf-8'
+        event, data_lines = 'message', []
+        for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+            if line == '':
+                if data_lines:
+                    yield event, json.loads('\n'.join(data_lines))
+                event, data_lines = 'message', []
+            elif line.startswith(':'):
+                continue # 心跳注释行
+            elif line.startswith('event:'):
+                event = line[len('event:'):].strip()
+            elif line.startswith('data:'):
+                data_lines.append(line[len('data:'):].strip())
+
 
 # --- Streamlit App Layout ---
 st.set_page_config(page_title='会议助手', layout='centered')
@@ -151,8 +153,13 @@ mi['location'] = st.text_input('会议地点', mi['location'])
 
 upload = st.file_uploader('上传录音 (wav, mp3, m4a, ogg, flac)', type=['wav','mp3','m4a','ogg','flac'])
 if upload is not None:
-    if upload != st.session_state.uploaded_audio: # New file uploaded
-        st.session_state.uploaded_audio = upload
+    upload_id = getattr(upload, 'file_id', None) or f'{upload.name}:{upload.size}'
+    audio = st.session_state.uploaded_audio
+    if audio is None or audio.get('upload_id') != upload_id: # New file uploaded
+        # 分块写入磁盘并计算 SHA-256，会话状态中只保存文件句柄（路径、名称、大小、哈希）
+        audio = spool_upload(upload, upload.name, upload.type, UPLOAD_SPOOL_DIR, ttl_seconds=UPLOAD_SPOOL_TTL_SECONDS)
+        audio['upload_id'] = upload_id
+        st.session_state.uploaded_audio = audio
         st.session_state.task_id = None
         st.session_state.task_status = 'idle'
         st.session_state.raw_transcription = ''
@@ -163,7 +170,14 @@ if upload is not None:
         st.session_state.error_message = ''
         st.success(f'已选文件: {upload.name}')
 elif st.session_state.uploaded_audio is not None:
-    st.success(f'当前文件: {st.session_state.uploaded_audio.name}')
+    st.success(f'当前文件: {st.session_state.uploaded_audio["name"]}')
+
+# 说话人分离：“自动”在录音只有一位说话人时跳过分离
+DIARIZE_OPTIONS = {'自动': 'auto', '开启': 'true', '关闭': 'false'}
+diarize_choice = st.selectbox('说话人分离', list(DIARIZE_OPTIONS), help='“自动”会先快速检测说话人数量，只有一位说话人时跳过说话人分离。')
+# 热词：产品名、人名等专有词汇，提高识别准确率
+hotword_profile = st.text_input('热词方案（可选）', help='后端已保存的热词方案名称（见 /api/hotwords）。')
+hotword_text = st.text_area('热词（可选）', help='每行一个，例如产品名、人名；与热词方案合并使用。')
 
 
 # Step 2: Transcription submission & polling
@@ -178,17 +192,35 @@ if st.button('🚀 开始转录', disabled=(st.session_state.uploaded_audio is N
         st.session_state.summary = ''
         st.session_state.error_message = ''
 
-        files = {'file': (st.session_state.uploaded_audio.name, st.session_state.uploaded_audio.getvalue(), st.session_state.uploaded_audio.type)}
+        audio = st.session_state.uploaded_audio
         try:
             st.session_state.task_status = 'submitting'
             st.info('正在提交转录任务...')
-            resp = requests.post(f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/transcribe", files=files, timeout=30)
+            # 先按内容哈希查询后端缓存，同一录音已转录过时无需再次上传；
+            # 否则分块并行上传，失败后再次提交只会补传缺失的部分
+            resp = submit_audio(
+                get_http_session(),
+                f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}",
+                audio,
+                timeout=http_timeout(HTTP_TRANSCRIBE_TIMEOUT),
+                parallel=UPLOAD_PARALLEL_CHUNKS,
+                retries=UPLOAD_CHUNK_RETRIES,
+                params={
+                    'diarize': DIARIZE_OPTIONS[diarize_choice],
+                    'hotwords': hotword_text.splitlines(),
+                    'hotword_profile': hotword_profile.strip() or None,
+                },
+            )
             resp.raise_for_status()
             data = resp.json()
             st.session_state.task_id = data.get('task_id')
             st.session_state.task_status = 'processing' # 更新状态以触发轮询逻辑
             st.session_state.error_message = ''
             st.rerun()
+        except FileNotFoundError:
+            st.session_state.error_message = '临时文件已被清理，请重新上传录音。'
+            st.session_state.task_status = 'failed'
+            st.error(st.session_state.error_message)
         except requests.exceptions.RequestException as e:
             st.session_state.error_message = f'提交转录任务失败: {e}'
             st.session_state.task_status = 'failed'
@@ -202,83 +234,84 @@ if st.button('🚀 开始转录', disabled=(st.session_state.uploaded_audio is N
 if st.session_state.task_status == 'processing' and st.session_state.task_id:
     status_message_placeholder = st.empty()
     progress_bar_placeholder = st.empty()
+    partial_transcript_placeholder = st.empty()
 
-    with st.spinner('转录进行中，请耐心等待...'): # Spinner 会覆盖 placeholder
-        start_time = time.time()
-        POLLING_INTERVAL = 5
-        MAX_POLLING_TIME = 600
+    with st.spinner('转录进行中，请耐心等待...'):
+        MAX_RECONNECT_TIME = 300 # 超过该时长未收到后端消息则放弃
+        RECONNECT_DELAY = 2
+        last_contact = time.time()
+        cursor = 0
+        partial_lines: List[str] = []
+        job_done = False
 
-        while True:
+        while not job_done:
             if not st.session_state.task_id:
                 st.session_state.task_status = 'failed'
                 st.session_state.error_message = "任务ID丢失，无法查询状态。"
                 status_message_placeholder.error(st.session_state.error_message)
                 break
             try:
-                resp = requests.get(f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/job/{st.session_state.task_id}", timeout=10)
-                resp.raise_for_status()
-                job = resp.json()
+                events_url = f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/job/{st.session_state.task_id}/events?cursor={cursor}"
+                for event, data in iter_job_events(events_url, timeout=http_timeout(HTTP_EVENTS_TIMEOUT)):
+                    last_contact = time.time()
+                    if event == 'status':
+                        status_message_placeholder.info(f'后端任务状态: {data.get("status", "UNKNOWN").upper()}')
+                    elif event == 'progress':
+                        if data.get('queue_position'):
+                            status_message_placeholder.info(f'任务排队中，当前位置: {data["queue_position"]}')
+                        if data.get('progress') is not None:
+                            progress_bar_placeholder.progress(min(int(data['progress'] * 100), 99))
+                    elif event == 'segments':
+                        # 说话人分离完成后，后端会用带说话人的片段替换已发送的片段
+                        if data.get('replace'):
+                            partial_lines = []
+                        partial_lines.extend(data.get('segments', []))
+                        cursor = data.get('next_cursor', cursor)
+                        partial_transcript_placeholder.code('\n'.join(partial_lines[-20:]), language=None)
+                    elif event == 'completed':
+                        progress_bar_placeholder.progress(100)
+                        status_message_placeholder.success('转录完成!')
+                        raw_transcription = (data.get('transcription') or '').strip()
+                        st.session_state.raw_transcription = raw_transcription
+                        st.session_state.editable_transcription = raw_transcription
+                        unique_speakers = [f"说话人 {spk}" for spk in data.get('speakers', [])]
+                        st.session_state.identified_speakers = unique_speakers
+                        # 保留已有的发言人姓名映射，同时为新识别的发言人添加空映射
+                        updated_speaker_names = st.session_state.speaker_names.copy()
+                        for spk_id_label in unique_speakers:
+                            if spk_id_label not in updated_speaker_names:
+                                updated_speaker_names[spk_id_label] = ''
+                        st.session_state.speaker_names = updated_speaker_names
+
+                        st.session_state.task_status = 'completed'
+                        st.session_state.error_message = ''
+                        job_done = True
+                        break
+                    elif event == 'failed':
+                        progress_bar_placeholder.empty()
+                        error_detail = data.get('error') or '未知转录错误'
+                        st.session_state.error_message = f'转录失败: {error_detail}'
+                        st.session_state.task_status = 'failed'
+                        status_message_placeholder.error(st.session_state.error_message)
+                        job_done = True
+                        break
             except requests.exceptions.RequestException as e:
-                if time.time() - start_time > MAX_POLLING_TIME / 2 : # Avoid infinite loop on persistent error
+                if time.time() - last_contact > MAX_RECONNECT_TIME:
                     st.session_state.error_message = f'查询状态时网络错误: {e}. 后端服务可能不可用。'
                     st.session_state.task_status = 'failed'
                     status_message_placeholder.error(st.session_state.error_message)
                     break
                 status_message_placeholder.warning(f"查询状态时遇到临时网络问题，将重试... ({e})")
-                time.sleep(POLLING_INTERVAL * 2)
+                time.sleep(RECONNECT_DELAY)
                 continue
 
-            backend_status = job.get('status', 'UNKNOWN').upper()
-            status_message_placeholder.info(f'后端任务状态: {backend_status}')
-
-            elapsed_time = time.time() - start_time
-            progress_value = min(int((elapsed_time / (MAX_POLLING_TIME * 0.9)) * 100), 99) # Simulate progress
-
-            if backend_status not in ['COMPLETED', 'FAILED']:
-                progress_bar_placeholder.progress(progress_value)
-            
-            if backend_status == 'COMPLETED':
-                progress_bar_placeholder.progress(100)
-                status_message_placeholder.success('转录完成!')
-                raw_transcription = job.get('transcription', '').strip()
-                st.session_state.raw_transcription = raw_transcription # 保存原始转录
-                st.session_state.editable_transcription = raw_transcription # 初始化可编辑转录
-
-                spk_matches = re.findall(r'(说话人\s*[^\[]+)\s*\[', raw_transcription)
-                unique_speakers = sorted(list(set(spk.strip() for spk in spk_matches)))
-                st.session_state.identified_speakers = unique_speakers
-                
-                # 保留已有的发言人姓名映射，同时为新识别的发言人添加空映射
-                updated_speaker_names = st.session_state.speaker_names.copy()
-                for spk_id_label in unique_speakers:
-                    if spk_id_label not in updated_speaker_names:
-                        updated_speaker_names[spk_id_label] = '' # 或 spk_id_label 作为默认名
-                st.session_state.speaker_names = updated_speaker_names
-
-                st.session_state.task_status = 'completed'
-                st.session_state.error_message = ''
-                # 清理占位符并rerun以刷新UI到下一步
-                time.sleep(1) # 短暂显示成功信息
-                status_message_placeholder.empty()
-                progress_bar_placeholder.empty()
-                st.rerun()
-                break
-
-            elif backend_status == 'FAILED':
-                progress_bar_placeholder.empty()
-                error_detail = job.get('error', '未知转录错误')
-                st.session_state.error_message = f'转录失败: {error_detail}'
-                st.session_state.task_status = 'failed'
-                status_message_placeholder.error(st.session_state.error_message) # Display error
-                break
-
-            if time.time() - start_time > MAX_POLLING_TIME:
-                progress_bar_placeholder.empty()
-                st.session_state.error_message = '转录超时，请检查后端服务或稍后重试。'
-                st.session_state.task_status = 'failed'
-                status_message_placeholder.warning(st.session_state.error_message) # Display warning
-                break
-            time.sleep(POLLING_INTERVAL)
+        if st.session_state.task_status == 'completed':
+            # 清理占位符并rerun以刷新UI到下一步
+            time.sleep(1)
+            status_message_placeholder.empty()
+            progress_bar_placeholder.empty()
+            partial_transcript_placeholder.empty()
+            st.rerun()
 
 # 在轮询结束后，如果状态不是 processing 或 submitting，则清空消息占位符
 if st.session_state.task_status not in ['processing', 'submitting']:
@@ -343,44 +376,68 @@ if st.session_state.task_status == 'completed' and st.session_state.raw_transcri
 # Step 4: Generate summary (显示在转录完成后)
 if st.session_state.task_status == 'completed':
     st.header('步骤3: 生成会议纪要')
-    if st.button('✨ 生成会议纪要', disabled=(not st.session_state.editable_transcription)):
-        with st.spinner('正在连接大模型生成会议纪要...'):
+    col_generate, col_regenerate = st.columns(2)
+    generate_clicked = col_generate.button('✨ 生成会议纪要', disabled=(not st.session_state.editable_transcription))
+    regenerate_clicked = col_regenerate.button(
+        '🔄 重新生成', disabled=(not st.session_state.summary),
+        help="忽略缓存结果，重新请求大模型生成。"
+    )
+    if generate_clicked or regenerate_clicked:
+        with st.spinner('正在生成会议纪要...'):
             try:
                 formatted_transcription_for_summary = format_transcription_with_names(
                     st.session_state.editable_transcription, 
                     st.session_state.speaker_names
                 )
-                prompt = generate_summary_prompt(st.session_state.meeting_info, formatted_transcription_for_summary)
-
-                headers = {
-                    'Authorization': f"Bearer {st.session_state.llm_config['api_key']}",
-                    'Content-Type': 'application/json'
-                }
-                payload = {
-                    'model': st.session_state.llm_config['model_name'],
-                    'messages': [{'role': 'user', 'content': prompt}],
-                }
-
                 llm_api_url = st.session_state.llm_config['api_url']
                 if not llm_api_url:
                     st.session_state.error_message = "LLM API URL 未配置，无法生成纪要。"
                     st.error(st.session_state.error_message) # 在按钮下方显示错误
                 else:
-                    res = requests.post(llm_api_url, headers=headers, json=payload, timeout=180)
-                    res.raise_for_status()
-                    response_data = res.json()
-
-                    if 'choices' in response_data and response_data['choices']:
-                        content = response_data['choices'][0].get('message', {}).get('content', '')
-                        content = content.split("</think>\n")[-1] if "</think>" in content else content
-                        content = re.sub(r'^```markdown\s*', '', content, flags=re.IGNORECASE)
-                        content = re.sub(r'\s*```$', '', content, flags=re.IGNORECASE)
-                        st.session_state.summary = content.strip()
-                        st.session_state.error_message = ''
-                        st.success('✅ 会议纪要生成成功!')
-                    else:
-                        st.session_state.error_message = f"LLM响应格式不正确或无内容: {response_data.get('error', response_data)}"
-                        st.error(st.session_state.error_message) # 在按钮下方显示错误
+                    summary_progress = st.empty()
+                    summary_stream = st.empty()
+                    mi_for_request = st.session_state.meeting_info
+                    payload = {
+                        'transcript': formatted_transcription_for_summary,
+                        'meeting_info': {
+                            'topic': mi_for_request['topic'],
+                            'date': mi_for_request['date'].isoformat(),
+                            'time': mi_for_request['time'].strftime('%H:%M:%S'),
+                            'location': mi_for_request['location'],
+                        },
+                        'lang': 'zh',
+                        'llm': st.session_state.llm_config,
+                        'regenerate': regenerate_clicked,
+                    }
+                    # 纪要生成在后端排队执行，通过事件流实时接收生成内容
+                    summarize_url = f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/summarize"
+                    resp = get_http_session().post(summarize_url, json=payload, timeout=http_timeout(HTTP_SUMMARIZE_TIMEOUT))
+                    resp.raise_for_status()
+                    summary_task_id = resp.json()['task_id']
+
+                    summary_text = ''
+                    events_url = f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/job/{summary_task_id}/events"
+                    for event, data in iter_job_events(events_url, timeout=http_timeout(HTTP_EVENTS_TIMEOUT)):
+                        if event == 'progress':
+                            if data.get('queue_position'):
+                                summary_progress.info(f'等待纪要生成资源，当前排队位置: {data["queue_position"]}')
+                            elif data.get('progress'):
+                                summary_progress.progress(min(data['progress'], 1.0), text='正在分段总结转写文本...')
+                        elif event == 'summary':
+                            summary_text = summary_text[:data['offset']] + data['text']
+                            summary_stream.markdown(summary_text)
+                        elif event == 'completed':
+                            st.session_state.summary = data.get('summary') or ''
+                            st.session_state.summary_timings = data.get('timings') or {}
+                            st.session_state.error_message = ''
+                            st.success('✅ 会议纪要生成成功!')
+                            break
+                        elif event == 'failed':
+                            st.session_state.error_message = f"生成会议纪要失败: {data.get('error') or '未知错误'}"
+                            st.error(st.session_state.error_message)
+                            break
+                    summary_progress.empty()
+                    summary_stream.empty()
 
             except requests.exceptions.HTTPError as http_err:
                 err_content = "N/A"
@@ -388,10 +445,10 @@ if st.session_state.task_status == 'completed':
                     err_content = http_err.response.json()
                 except ValueError:
                     err_content = http_err.response.text
-                st.session_state.error_message = f"LLM API 请求失败 (HTTP {http_err.response.status_code}): {err_content}"
+                st.session_state.error_message = f"会议纪要请求失败 (HTTP {http_err.response.status_code}): {err_content}"
                 st.error(st.session_state.error_message)
             except requests.exceptions.RequestException as req_err:
-                st.session_state.error_message = f"连接 LLM API 时发生网络错误: {req_err}"
+                st.session_state.error_message = f"连接后端服务时发生网络错误: {req_err}"
                 st.error(st.session_state.error_message)
             except Exception as e:
                 st.session_state.error_message = f"生成会议纪要时发生未知错误: {e}"
@@ -402,6 +459,13 @@ if st.session_state.task_status == 'completed':
 if st.session_state.summary:
     st.header('📝 会议纪要预览')
     st.markdown(st.session_state.summary, help="这是生成的会议纪要内容。")
+    timings = st.session_state.summary_timings
+    if timings.get('ttft_seconds') is not None:
+        st.caption(
+            f"首个 token 用时 {timings['ttft_seconds']:.1f}s，生成用时 {timings['generation_seconds']:.1f}s，"
+            f"总用时 {timings['total_seconds']:.1f}s（共 {timings['llm_calls']} 次 LLM 调用）"
+            + ("，结果来自缓存" if timings.get('cached') else "")
+        )
     topic_for_filename = re.sub(r'[^\w\s-]', '', st.session_state.meeting_info.get('topic','未命名会议')).strip().replace(' ', '_')
     date_for_filename = st.session_state.meeting_info.get('date',datetime.date.today()).strftime('%Y%m%d')
     download_filename = f"会议纪要_{topic_for_filename}_{date_for_filename}.md"
@@ -2,13 +2,19 @@
 import streamlit as st
 from streamlit_ace import st_ace
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+import json
 import re
 import datetime
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List
 import os
+import tempfile
 from dotenv import load_dotenv
 
+from upload_client import spool_upload, submit_audio
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -18,9 +24,43 @@ APP_PORT_BACKEND = os.getenv("APP_PORT_BACKEND")
 DEFAULT_LLM_API_URL = os.getenv("LLM_API_URL")
 DEFAULT_LLM_API_KEY = os.getenv("LLM_API_KEY")
 DEFAULT_LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME")
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 32))
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", 2))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_TRANSCRIBE_TIMEOUT = float(os.getenv("HTTP_TRANSCRIBE_TIMEOUT", 30))
+HTTP_SUMMARIZE_TIMEOUT = float(os.getenv("HTTP_SUMMARIZE_TIMEOUT", 30))
+HTTP_EVENTS_TIMEOUT = float(os.getenv("HTTP_EVENTS_TIMEOUT", 60))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "meeting-assistant-uploads"))
+UPLOAD_SPOOL_TTL_SECONDS = float(os.getenv("UPLOAD_SPOOL_TTL_SECONDS", 24 * 3600))
+UPLOAD_PARALLEL_CHUNKS = int(os.getenv("UPLOAD_PARALLEL_CHUNKS", 4))
+UPLOAD_CHUNK_RETRIES = int(os.getenv("UPLOAD_CHUNK_RETRIES", 3))
 # --- End Configuration ---
 
 
+# --- HTTP Client ---
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    One requests.Session per Streamlit server process, shared by all user sessions,
+    so connections to the backend are kept alive and reused instead of reopened per call.
+    Only failed connection attempts are retried; nothing has been sent at that point.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=Retry(total=None, connect=HTTP_CONNECT_RETRIES, read=0, redirect=0, status=0, backoff_factor=0.3),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def http_timeout(read_seconds: float) -> Tuple[float, float]:
+    return (HTTP_CONNECT_TIMEOUT, read_seconds)
+
+
 # --- Session State Initialization ---
 def init_session_state():
     st.session_state.setdefault('meeting_info', {
@@ -37,6 +77,7 @@ def init_session_state():
     st.session_state.setdefault('identified_speakers', [])
     st.session_state.setdefault('speaker_names', {}) # Maps original ID (e.g., "说话人 0") to user-defined name
     st.session_state.setdefault('summary', '')
+    st.session_state.setdefault('summary_timings', {})
     st.session_state.setdefault('error_message', '')
     st.session_state.setdefault('llm_config', {
         'api_url': DEFAULT_LLM_API_URL,
@@ -64,65 +105,24 @@ def format_transcription_with_names(transcription: str, mapping: dict) -> str:
     return '\n'.join(out)
 
 
-def generate_summary_prompt(info: dict, formatted_transcription: str) -> str:
-    topic = info['topic'] or 'Untitled Topic'
-    # Format date and time for an English audience if necessary, though current format is universal
-    date_str = info['date'].strftime('%Y-%m-%d') # Standard international format
-    time_s = info['time'].strftime('%H:%M')
-    loc = info['location'] or 'Not specified'
-    example_date_1 = (datetime.date.today() + datetime.timedelta(days=10)).strftime('%Y-%m-%d')
-    example_date_2 = (datetime.date.today() + datetime.timedelta(days=15)).strftime('%Y-%m-%d')
-
-    return f"""
-The following is the transcribed text of a meeting recording (separated by speaker, but may contain minor inaccuracies and speaker identification errors). Please generate a high-quality meeting minutes document (Markdown format) according to the following requirements:
-
-1.  **Auto-correction**: Correct obvious typos, colloquial redundancies, and minor grammatical errors.
-2.  **Speaker Consolidation**: If the same content appears split under slightly different speaker variations that seem to be the same person, it should be merged. If speaker identification is clearly inaccurate for a segment, please use context to assign it to the correct speaker or mark as "Unknown Speaker" if context is insufficient.
-3.  **Clear Structure**:
-    - Heading levels: Use `# Meeting Minutes`, `## Basic Information`, `## Main Discussion Points`, `## Resolutions/Conclusions`, `## Action Items`.
-    - Use unordered lists (`-`) or ordered lists (`1.`) for key points.
-    - Highlight key terms, decisions, or data using **bold**.
-4.  **Level of Detail**:
-    - In "Main Discussion Points", list 3–5 main topics. For each topic, briefly summarize the key discussion points (2–3 lines).
-    - In "Resolutions/Conclusions", clearly state the conclusions, decisions, or agreements reached.
-    - In "Action Items", for each action, specify the responsible person and a **suggested** completion deadline in the format: `- [Person's Name] — By YYYY-MM-DD: Task description`. If the original text does not mention a specific person or date, leave it blank, write "To be determined", or infer reasonably if possible.
-
-**Meeting Basic Information**
-- Topic: {topic}
-- Time: {date_str} {time_s}
-- Location: {loc}
-
-**Meeting Content (Transcribed Text):**
-{formatted_transcription}
-
----
-Please generate the meeting minutes based on the information above:
-# Meeting Minutes
-
-## Basic Information
-- **Topic**: {topic}
-- **Time**: {date_str} {time_s}
-- **Location**: {loc}
-- **Attendees**: (If identifiable from the transcript, please list them. Otherwise, leave blank or write "Not recorded")
-
-## Main Discussion Points
-(Fill in according to the meeting content. For each topic, provide a summary of discussions, attributing points to speakers where possible.)
-1.  **Topic One**: ...
-    - [Speaker A's Name or Role]: ...
-    - [Speaker B's Name or Role]: ...
-2.  **Topic Two**: ...
-3.  **Topic Three**: ...
-
-## Resolutions/Conclusions
-(Clearly summarize the outcomes based on the meeting content.)
-- ...
-- ...
-
-## Action Items
-(Fill in according to the format. If no clear responsible person/date, use "To be determined" or omit that part.)
-- [John Doe] — By {example_date_1}: Compile and distribute meeting materials.
-- [Jane Smith] — By {example_date_2}: Confirm next steps with the supplier.
-"""
+def iter_job_events(url: str, timeout: Tuple[float, float]):
+    """Parse the backend's Server-Sent Events stream into (event, data) tuples."""
+    with get_http_session().get(url, stream=True, timeout=timeout, headers={'Accept': 'text/event-stream'}) as resp:
+        resp.raise_for_status()
+        resp.encoding = 'utf-8'
+        event, data_lines = 'message', []
+        for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+            if line == '':
+                if data_lines:
+                    yield event, json.loads('\n'.join(data_lines))
+                event, data_lines = 'message', []
+            elif line.startswith(':'):
+                continue # keep-alive comment
+            elif line.startswith('event:'):
+                event = line[len('event:'):].strip()
+            elif line.startswith('data:'):
+                data_lines.append(line[len('data:'):].strip())
+
 
 # --- Streamlit App Layout ---
 st.set_page_config(page_title='Meeting Assistant', layout='centered')
@@ -156,8 +156,13 @@ mi['location'] = st.text_input('Meeting Location', mi['location'])
 
 upload = st.file_uploader('Upload Audio Recording (wav, mp3, m4a, ogg, flac)', type=['wav','mp3','m4a','ogg','flac'])
 if upload is not None:
-    if upload != st.session_state.uploaded_audio: # New file uploaded
-        st.session_state.uploaded_audio = upload
+    upload_id = getattr(upload, 'file_id', None) or f'{upload.name}:{upload.size}'
+    audio = st.session_state.uploaded_audio
+    if audio is None or audio.get('upload_id') != upload_id: # New file uploaded
+        # Spool to disk in chunks while hashing; session state only keeps a handle (path, name, size, hash)
+        audio = spool_upload(upload, upload.name, upload.type, UPLOAD_SPOOL_DIR, ttl_seconds=UPLOAD_SPOOL_TTL_SECONDS)
+        audio['upload_id'] = upload_id
+        st.session_state.uploaded_audio = audio
         # Reset relevant states for a new file
         st.session_state.task_id = None
         st.session_state.task_status = 'idle'
@@ -169,7 +174,14 @@ if upload is not None:
         st.session_state.error_message = ''
         st.success(f'Selected file: {upload.name}')
 elif st.session_state.uploaded_audio is not None: # File previously uploaded, show its name
-    st.success(f'Current file: {st.session_state.uploaded_audio.name}')
+    st.success(f'Current file: {st.session_state.uploaded_audio["name"]}')
+
+# Speaker diarization: "Auto" skips it when the recording has a single speaker
+DIARIZE_OPTIONS = {'Auto': 'auto', 'On': 'true', 'Off': 'false'}
+diarize_choice = st.selectbox('Speaker diarization', list(DIARIZE_OPTIONS), help='"Auto" first checks cheaply how many people speak and skips diarization for a single speaker.')
+# Hotwords: domain vocabulary such as product or people's names, to improve recognition
+hotword_profile = st.text_input('Hotword profile (optional)', help='Name of a hotword profile saved on the backend (see /api/hotwords).')
+hotword_text = st.text_area('Hotwords (optional)', help="One per line, e.g. product or people's names; combined with the profile.")
 
 
 # Step 2: Transcription submission & polling
@@ -184,7 +196,7 @@ if st.button('🚀 Start Transcription', disabled=(st.session_state.uploaded_aud
         st.session_state.summary = ''
         st.session_state.error_message = ''
 
-        files = {'file': (st.session_state.uploaded_audio.name, st.session_state.uploaded_audio.getvalue(), st.session_state.uploaded_audio.type)}
+        audio = st.session_state.uploaded_audio
         try:
             st.session_state.task_status = 'submitting'
             st.info('Submitting transcription task...')
@@ -194,14 +206,31 @@ if st.button('🚀 Start Transcription', disabled=(st.session_state.uploaded_aud
                 st.session_state.task_status = 'failed'
                 st.error(st.session_state.error_message)
             else:
-                transcribe_url = f"http://{BACKEND_API_URL.strip('/')}:{APP_PORT_BACKEND}/api/transcribe"
-                resp = requests.post(transcribe_url, files=files, timeout=30)
+                # Ask the backend cache by content hash first, so a recording transcribed before is not uploaded again.
+                # Otherwise upload in parallel chunks; submitting again after a failure only sends the missing parts.
+                resp = submit_audio(
+                    get_http_session(),
+                    f"http://{BACKEND_API_URL.strip('/')}:{APP_PORT_BACKEND}",
+                    audio,
+                    timeout=http_timeout(HTTP_TRANSCRIBE_TIMEOUT),
+                    parallel=UPLOAD_PARALLEL_CHUNKS,
+                    retries=UPLOAD_CHUNK_RETRIES,
+                    params={
+                        'diarize': DIARIZE_OPTIONS[diarize_choice],
+                        'hotwords': hotword_text.splitlines(),
+                        'hotword_profile': hotword_profile.strip() or None,
+                    },
+                )
                 resp.raise_for_status()
                 data = resp.json()
                 st.session_state.task_id = data.get('task_id')
                 st.session_state.task_status = 'processing'
                 st.session_state.error_message = ''
                 st.rerun()
+        except FileNotFoundError:
+            st.session_state.error_message = 'The spooled upload was cleaned up, please upload the recording again.'
+            st.session_state.task_status = 'failed'
+            st.error(st.session_state.error_message)
         except requests.exceptions.RequestException as e:
             st.session_state.error_message = f'Failed to submit transcription task: {e}'
             st.session_state.task_status = 'failed'
@@ -215,90 +244,90 @@ if st.button('🚀 Start Transcription', disabled=(st.session_state.uploaded_aud
 if st.session_state.task_status == 'processing' and st.session_state.task_id:
     status_message_placeholder = st.empty()
     progress_bar_placeholder = st.empty()
+    partial_transcript_placeholder = st.empty()
 
     with st.spinner('Transcription in progress, please wait...'):
-        start_time = time.time()
-        POLLING_INTERVAL = 5
-        MAX_POLLING_TIME = 600 # 10 minutes
-
-        while True:
+        MAX_RECONNECT_TIME = 300 # Give up after this long without hearing from the backend
+        RECONNECT_DELAY = 2
+        last_contact = time.time()
+        cursor = 0
+        partial_lines: List[str] = []
+        job_done = False
+
+        while not job_done:
             if not st.session_state.task_id:
                 st.session_state.task_status = 'failed'
                 st.session_state.error_message = "Task ID lost, cannot query status."
                 status_message_placeholder.error(st.session_state.error_message)
                 break
-            
+
             if not BACKEND_API_URL or not APP_PORT_BACKEND:
                 st.session_state.error_message = "Backend API URL or Port not configured for status check."
                 st.session_state.task_status = 'failed'
                 status_message_placeholder.error(st.session_state.error_message)
                 break
-
             try:
-                status_url = f"http://{BACKEND_API_URL.strip('/')}:{APP_PORT_BACKEND}/api/job/{st.session_state.task_id}"
-                resp = requests.get(status_url, timeout=10)
-                resp.raise_for_status()
-                job = resp.json()
+                events_url = f"http://{BACKEND_API_URL.strip('/')}:{APP_PORT_BACKEND}/api/job/{st.session_state.task_id}/events?cursor={cursor}"
+                for event, data in iter_job_events(events_url, timeout=http_timeout(HTTP_EVENTS_TIMEOUT)):
+                    last_contact = time.time()
+                    if event == 'status':
+                        status_message_placeholder.info(f'Backend task status: {data.get("status", "UNKNOWN").upper()}')
+                    elif event == 'progress':
+                        if data.get('queue_position'):
+                            status_message_placeholder.info(f'Waiting in queue, position: {data["queue_position"]}')
+                        if data.get('progress') is not None:
+                            progress_bar_placeholder.progress(min(int(data['progress'] * 100), 99))
+                    elif event == 'segments':
+                        # Once diarization is done the backend replaces the lines sent so far with labelled ones
+                        if data.get('replace'):
+                            partial_lines = []
+                        partial_lines.extend(data.get('segments', []))
+                        cursor = data.get('next_cursor', cursor)
+                        partial_transcript_placeholder.code('\n'.join(partial_lines[-20:]), language=None)
+                    elif event == 'completed':
+                        progress_bar_placeholder.progress(100)
+                        status_message_placeholder.success('Transcription complete!')
+                        raw_transcription = (data.get('transcription') or '').strip()
+                        st.session_state.raw_transcription = raw_transcription
+                        st.session_state.editable_transcription = raw_transcription
+                        # Extracts speaker IDs like "说话人 0", "说话人 未知"
+                        unique_speakers = [f"说话人 {spk}" for spk in data.get('speakers', [])]
+                        st.session_state.identified_speakers = unique_speakers
+                        updated_speaker_names = st.session_state.speaker_names.copy()
+                        for spk_id_label in unique_speakers:
+                            if spk_id_label not in updated_speaker_names:
+                                updated_speaker_names[spk_id_label] = ''
+                        st.session_state.speaker_names = updated_speaker_names
+
+                        st.session_state.task_status = 'completed'
+                        st.session_state.error_message = ''
+                        job_done = True
+                        break
+                    elif event == 'failed':
+                        progress_bar_placeholder.empty()
+                        error_detail = data.get('error') or 'Unknown transcription error'
+                        st.session_state.error_message = f'Transcription failed: {error_detail}'
+                        st.session_state.task_status = 'failed'
+                        status_message_placeholder.error(st.session_state.error_message)
+                        job_done = True
+                        break
             except requests.exceptions.RequestException as e:
-                if time.time() - start_time > MAX_POLLING_TIME / 2 :
+                if time.time() - last_contact > MAX_RECONNECT_TIME:
                     st.session_state.error_message = f'Network error while querying status: {e}. Backend service might be unavailable.'
                     st.session_state.task_status = 'failed'
                     status_message_placeholder.error(st.session_state.error_message)
                     break
                 status_message_placeholder.warning(f"Temporary network issue while querying status, retrying... ({e})")
-                time.sleep(POLLING_INTERVAL * 2)
+                time.sleep(RECONNECT_DELAY)
                 continue
 
-            backend_status = job.get('status', 'UNKNOWN').upper()
-            status_message_placeholder.info(f'Backend task status: {backend_status}')
-
-            elapsed_time = time.time() - start_time
-            progress_value = min(int((elapsed_time / (MAX_POLLING_TIME * 0.9)) * 100), 99)
-
-            if backend_status not in ['COMPLETED', 'FAILED']:
-                progress_bar_placeholder.progress(progress_value)
-            
-            if backend_status == 'COMPLETED':
-                progress_bar_placeholder.progress(100)
-                status_message_placeholder.success('Transcription complete!')
-                raw_transcription = job.get('transcription', '').strip()
-                st.session_state.raw_transcription = raw_transcription
-                st.session_state.editable_transcription = raw_transcription
-
-                # Extracts speaker IDs like "说话人 0", "说话人 未知"
-                spk_matches = re.findall(r'(说话人\s*[^\[]+)\s*\[', raw_transcription)
-                unique_speakers = sorted(list(set(spk.strip() for spk in spk_matches)))
-                st.session_state.identified_speakers = unique_speakers
-                
-                updated_speaker_names = st.session_state.speaker_names.copy()
-                for spk_id_label in unique_speakers:
-                    if spk_id_label not in updated_speaker_names:
-                        updated_speaker_names[spk_id_label] = '' 
-                st.session_state.speaker_names = updated_speaker_names
-
-                st.session_state.task_status = 'completed'
-                st.session_state.error_message = ''
-                time.sleep(1) 
-                status_message_placeholder.empty()
-                progress_bar_placeholder.empty()
-                st.rerun()
-                break
-
-            elif backend_status == 'FAILED':
-                progress_bar_placeholder.empty()
-                error_detail = job.get('error', 'Unknown transcription error')
-                st.session_state.error_message = f'Transcription failed: {error_detail}'
-                st.session_state.task_status = 'failed'
-                status_message_placeholder.error(st.session_state.error_message)
-                break
-
-            if time.time() - start_time > MAX_POLLING_TIME:
-                progress_bar_placeholder.empty()
-                st.session_state.error_message = 'Transcription timed out. Please check the backend service or try again later.'
-                st.session_state.task_status = 'failed'
-                status_message_placeholder.warning(st.session_state.error_message)
-                break
-            time.sleep(POLLING_INTERVAL)
+        if st.session_state.task_status == 'completed':
+            # Clear placeholders and rerun to move the UI to the next step
+            time.sleep(1)
+            status_message_placeholder.empty()
+            progress_bar_placeholder.empty()
+            partial_transcript_placeholder.empty()
+            st.rerun()
 
 if st.session_state.task_status not in ['processing', 'submitting']:
     if 'status_message_placeholder' in locals() and hasattr(status_message_placeholder, 'empty'):
@@ -360,44 +389,67 @@ if st.session_state.task_status == 'completed' and st.session_state.raw_transcri
 # Step 4: Generate summary
 if st.session_state.task_status == 'completed':
     st.header('Step 3: Generate Meeting Minutes')
-    if st.button('✨ Generate Meeting Minutes', disabled=(not st.session_state.editable_transcription)):
-        with st.spinner('Connecting to the LLM to generate meeting minutes...'):
+    col_generate, col_regenerate = st.columns(2)
+    generate_clicked = col_generate.button('✨ Generate Meeting Minutes', disabled=(not st.session_state.editable_transcription))
+    regenerate_clicked = col_regenerate.button(
+        '🔄 Regenerate', disabled=(not st.session_state.summary),
+        help="Ignore cached results and ask the LLM again."
+    )
+    if generate_clicked or regenerate_clicked:
+        with st.spinner('Generating meeting minutes...'):
             try:
                 formatted_transcription_for_summary = format_transcription_with_names(
                     st.session_state.editable_transcription, 
                     st.session_state.speaker_names
                 )
-                prompt = generate_summary_prompt(st.session_state.meeting_info, formatted_transcription_for_summary)
-
-                headers = {
-                    'Authorization': f"Bearer {st.session_state.llm_config['api_key']}",
-                    'Content-Type': 'application/json'
-                }
-                payload = {
-                    'model': st.session_state.llm_config['model_name'],
-                    'messages': [{'role': 'user', 'content': prompt}],
-                }
-
                 llm_api_url = st.session_state.llm_config['api_url']
                 if not llm_api_url:
                     st.session_state.error_message = "LLM API URL is not configured. Cannot generate minutes."
                     st.error(st.session_state.error_message)
                 else:
-                    res = requests.post(llm_api_url, headers=headers, json=payload, timeout=180)
-                    res.raise_for_status()
-                    response_data = res.json()
-
-                    if 'choices' in response_data and response_data['choices']:
-                        content = response_data['choices'][0].get('message', {}).get('content', '')
-                        content = content.split("</think>\n")[-1] if "</think>" in content else content
-                        content = re.sub(r'^```markdown\s*', '', content, flags=re.IGNORECASE)
-                        content = re.sub(r'\s*```$', '', content, flags=re.IGNORECASE)
-                        st.session_state.summary = content.strip()
-                        st.session_state.error_message = ''
-                        st.success('✅ Meeting minutes generated successfully!')
-                    else:
-                        st.session_state.error_message = f"LLM response format incorrect or no content: {response_data.get('error', response_data)}"
-                        st.error(st.session_state.error_message)
+                    summary_progress = st.empty()
+                    summary_stream = st.empty()
+                    mi_for_request = st.session_state.meeting_info
+                    payload = {
+                        'transcript': formatted_transcription_for_summary,
+                        'meeting_info': {
+                            'topic': mi_for_request['topic'],
+                            'date': mi_for_request['date'].isoformat(),
+                            'time': mi_for_request['time'].strftime('%H:%M:%S'),
+                            'location': mi_for_request['location'],
+                        },
+                        'lang': 'en',
+                        'llm': st.session_state.llm_config,
+                        'regenerate': regenerate_clicked,
+                    }
+                    summarize_url = f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/summarize"
+                    resp = get_http_session().post(summarize_url, json=payload, timeout=http_timeout(HTTP_SUMMARIZE_TIMEOUT))
+                    resp.raise_for_status()
+                    summary_task_id = resp.json()['task_id']
+
+                    summary_text = ''
+                    events_url = f"http://{BACKEND_API_URL}:{APP_PORT_BACKEND}/api/job/{summary_task_id}/events"
+                    for event, data in iter_job_events(events_url, timeout=http_timeout(HTTP_EVENTS_TIMEOUT)):
+                        if event == 'progress':
+                            if data.get('queue_position'):
+                                summary_progress.info(f'Waiting for a summarization slot, position: {data["queue_position"]}')
+                            elif data.get('progress'):
+                                summary_progress.progress(min(data['progress'], 1.0), text='Summarizing transcript parts...')
+                        elif event == 'summary':
+                            summary_text = summary_text[:data['offset']] + data['text']
+                            summary_stream.markdown(summary_text)
+                        elif event == 'completed':
+                            st.session_state.summary = data.get('summary') or ''
+                            st.session_state.summary_timings = data.get('timings') or {}
+                            st.session_state.error_message = ''
+                            st.success('✅ Meeting minutes generated successfully!')
+                            break
+                        elif event == 'failed':
+                            st.session_state.error_message = f"Failed to generate minutes: {data.get('error') or 'Unknown error'}"
+                            st.error(st.session_state.error_message)
+                            break
+                    summary_progress.empty()
+                    summary_stream.empty()
 
             except requests.exceptions.HTTPError as http_err:
                 err_content = "N/A"
@@ -405,10 +457,10 @@ if st.session_state.task_status == 'completed':
                     err_content = http_err.response.json() 
                 except ValueError: # If response is not JSON
                     err_content = http_err.response.text
-                st.session_state.error_message = f"LLM API request failed (HTTP {http_err.response.status_code}): {err_content}"
+                st.session_state.error_message = f"Summarization request failed (HTTP {http_err.response.status_code}): {err_content}"
                 st.error(st.session_state.error_message)
             except requests.exceptions.RequestException as req_err:
-                st.session_state.error_message = f"Network error connecting to LLM API: {req_err}"
+                st.session_state.error_message = f"Network error connecting to the backend: {req_err}"
                 st.error(st.session_state.error_message)
             except Exception as e:
                 st.session_state.error_message = f"An unknown error occurred while generating minutes: {e}"
@@ -419,6 +471,13 @@ if st.session_state.task_status == 'completed':
 if st.session_state.summary:
     st.header('📝 Meeting Minutes Preview')
     st.markdown(st.session_state.summary, help="This is the generated content of the meeting minutes.")
+    timings = st.session_state.summary_timings
+    if timings.get('ttft_seconds') is not None:
+        st.caption(
+            f"First token after {timings['ttft_seconds']:.1f}s, generated in {timings['generation_seconds']:.1f}s, "
+            f"total {timings['total_seconds']:.1f}s ({timings['llm_calls']} LLM calls)"
+            + (" — served from cache" if timings.get('cached') else "")
+        )
     
     topic_for_filename = re.sub(r'[^\w\s-]', '', st.session_state.meeting_info.get('topic','Untitled_Meeting')).strip().replace(' ', '_')
     date_for_filename = st.session_state.meeting_info.get('date',datetime.date.today()).strftime('%Y%m%d')
@@ -0,0 +1,92 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from asr_pipeline import SAMPLE_RATE
+
+ASR_BACKENDS = ("torch", "onnx")
+
+
+def load_asr_model(backend: str, model_kwargs: Dict[str, Any], onnx_kwargs: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Load the offline ASR pipeline for backend. "torch" is FunASR's AutoModel built
+    from model_kwargs; "onnx" is an OnnxPipeline built from onnx_kwargs. Both are
+    used through generate(input=..., ...) and return FunASR-shaped results.
+    """
+    if backend == "onnx":
+        return OnnxPipeline(**(onnx_kwargs or {}))
+    if backend != "torch":
+        raise ValueError(f"Unknown ASR backend {backend!r}, expected one of {', '.join(ASR_BACKENDS)}")
+    from funasr import AutoModel
+
+    return AutoModel(**model_kwargs)
+
+
+class OnnxPipeline:
+    """
+    VAD, Paraformer and punctuation on ONNX Runtime (funasr_onnx). Models are
+    exported to ONNX on first use; quantize=True uses the INT8 dynamically
+    quantized export instead. Sentences carry no speaker; speakers are assigned
+    by the separate diarization stage. Hotwords are not supported and are ignored.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        vad_model: str,
+        punc_model: str,
+        quantize: bool = False,
+        intra_op_threads: int = 0,
+        cache_dir: Optional[str] = None,
+    ):
+        from funasr_onnx import CT_Transformer, Fsmn_vad, Paraformer
+
+        options = {"quantize": quantize, "intra_op_num_threads": intra_op_threads}
+        if cache_dir:
+            options["cache_dir"] = cache_dir
+        self.asr = Paraformer(model, batch_size=1, **options)
+        self.vad = Fsmn_vad(vad_model, **options)
+        self.punc = CT_Transformer(punc_model, **options)
+
+    def generate(self, input: Any, **kwargs) -> List[Dict[str, Any]]:
+        inputs = input if isinstance(input, list) else [input]
+        return [self._transcribe(audio, index) for index, audio in enumerate(inputs)]
+
+    def _transcribe(self, audio: Any, index: int) -> Dict[str, Any]:
+        if isinstance(audio, str):
+            key = os.path.splitext(os.path.basename(audio))[0]
+            import librosa
+
+            audio, _ = librosa.load(audio, sr=SAMPLE_RATE, mono=True, dtype=np.float32)
+        else:
+            key = f"audio_{index}"
+            audio = np.asarray(audio, dtype=np.float32)
+
+        sentences = []
+        timestamps = []
+        for start_ms, end_ms in (self.vad(audio) or [[]])[0]:
+            segment = audio[start_ms * SAMPLE_RATE // 1000:end_ms * SAMPLE_RATE // 1000]
+            if len(segment) == 0:
+                continue
+            result = self.asr(segment)
+            text = (result[0].get("preds") if result else "") or ""
+            if isinstance(text, (list, tuple)):
+                text = text[0] if text else ""
+            if not text.strip():
+                continue
+            text = self.punc(text)[0]
+            sentence_timestamps = [[start_ms + ts[0], start_ms + ts[1]] for ts in result[0].get("timestamp") or []]
+            timestamps.extend(sentence_timestamps)
+            sentences.append({
+                "text": text,
+                "start": start_ms,
+                "end": end_ms,
+                "timestamp": sentence_timestamps,
+            })
+        return {
+            "key": key,
+            "text": "".join(sentence["text"] for sentence in sentences),
+            "timestamp": timestamps,
+            "sentence_info": sentences,
+        }
@@ -0,0 +1,189 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def to_numpy(value: Any) -> np.ndarray:
+    """Convert torch tensors / lists returned by FunASR into a flat float32 array."""
+    if hasattr(value, "detach"):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value, dtype=np.float32).reshape(-1)
+
+
+def plan_chunks(vad_segments: Sequence[Sequence[int]], total_ms: int, target_chunk_ms: int) -> List[tuple[int, int]]:
+    """
+    Group VAD speech segments (in ms) into chunks of roughly target_chunk_ms.
+    Chunk boundaries are placed in the middle of the silence between two speech
+    segments, so no speech is cut and the chunks cover [0, total_ms] without gaps.
+    """
+    segments = sorted((int(s), int(e)) for s, e in vad_segments if e > s)
+    if not segments or total_ms <= target_chunk_ms:
+        return [(0, total_ms)]
+
+    chunks = []
+    chunk_start = 0
+    for (_, prev_end), (next_start, _) in zip(segments, segments[1:]):
+        if prev_end - chunk_start >= target_chunk_ms:
+            boundary = (prev_end + next_start) // 2
+            chunks.append((chunk_start, boundary))
+            chunk_start = boundary
+    chunks.append((chunk_start, total_ms))
+    return chunks
+
+
+def offset_result(res: List[Dict[str, Any]], offset_ms: int) -> List[Dict[str, Any]]:
+    """Shift all timestamps of a FunASR result (in place) by offset_ms."""
+    def shift_pairs(pairs):
+        return [[p[0] + offset_ms, p[1] + offset_ms] for p in pairs]
+
+    for item in res:
+        if item.get("timestamp"):
+            item["timestamp"] = shift_pairs(item["timestamp"])
+        for sent in item.get("sentence_info", []):
+            if sent.get("start") is not None:
+                sent["start"] += offset_ms
+            if sent.get("end") is not None:
+                sent["end"] += offset_ms
+            if sent.get("timestamp"):
+                sent["timestamp"] = shift_pairs(sent["timestamp"])
+    return res
+
+
+def stitch_results(chunk_results: List[List[Dict[str, Any]]], key: str) -> List[Dict[str, Any]]:
+    """Concatenate per-chunk FunASR results (already offset) into one item."""
+    texts: list[str] = []
+    timestamps: list = []
+    sentence_info: list = []
+    for res in chunk_results:
+        for item in res:
+            if item.get("text"):
+                texts.append(item["text"])
+            timestamps.extend(item.get("timestamp") or [])
+            sentence_info.extend(item.get("sentence_info", []))
+    return [{"key": key, "text": "".join(texts), "timestamp": timestamps, "sentence_info": sentence_info}]
+
+
+def is_single_speaker(embeddings: np.ndarray, threshold: float) -> bool:
+    """
+    Cheap one-speaker check on a few speaker embeddings (one per row): True when
+    every embedding's cosine similarity to their mean direction is at least threshold.
+    """
+    if len(embeddings) < 2:
+        return True
+    normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-8)
+    centroid = normalized.mean(axis=0)
+    centroid /= np.linalg.norm(centroid) or 1.0
+    return bool((normalized @ centroid).min() >= threshold)
+
+
+def assign_speakers(res: List[Dict[str, Any]], turns: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Label every sentence (in place) with the speaker of the diarization turn
+    ([start_ms, end_ms, speaker]) it overlaps most, or of the nearest turn when
+    it overlaps none. Turns are disjoint, as diarization produces them; sentences
+    and turns are swept in time order, so only the turns around each sentence
+    are compared.
+    """
+    if not turns:
+        return res
+    turns = sorted(turns, key=lambda turn: turn[0])
+    sentences = sorted(
+        (sent for item in res for sent in item.get("sentence_info", [])
+         if sent.get("start") is not None and sent.get("end") is not None),
+        key=lambda sent: sent["start"],
+    )
+    first = 0
+    for sent in sentences:
+        start, end = sent["start"], sent["end"]
+        # Turns that end before this sentence starts also end before all later ones
+        while first < len(turns) - 1 and turns[first][1] <= start:
+            first += 1
+        # Candidates: the last turn before the sentence, the turns it overlaps and the first turn after it
+        best, best_score = None, None
+        for index in range(max(first - 1, 0), len(turns)):
+            turn = turns[index]
+            # Overlap when positive, minus the gap otherwise, so the nearest turn wins without overlap
+            score = min(end, turn[1]) - max(start, turn[0])
+            if best_score is None or score > best_score:
+                best, best_score = turn, score
+            if turn[0] >= end:
+                break
+        sent["spk"] = best[2]
+    return res
+
+
+class SpeakerReconciler:
+    """
+    Maps chunk-local speaker labels onto global labels by matching speaker
+    embeddings against running per-speaker centroids (cosine similarity).
+    Chunks must be added in time order so global labels are numbered by first appearance.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._centroids: List[np.ndarray] = []
+        self._weights: List[float] = []
+
+    @property
+    def num_speakers(self) -> int:
+        return len(self._centroids)
+
+    def add_chunk(self, embeddings: Dict[Any, tuple[np.ndarray, float]]) -> Dict[Any, int]:
+        """
+        embeddings maps a chunk-local label to (mean embedding, speech duration).
+        Returns the chunk-local -> global label mapping.
+        """
+        mapping: Dict[Any, int] = {}
+        taken: set[int] = set()
+        # Longest-speaking local speakers claim their best match first
+        for local, (embedding, weight) in sorted(embeddings.items(), key=lambda kv: kv[1][1], reverse=True):
+            embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+            best, best_score = None, self.threshold
+            for index, centroid in enumerate(self._centroids):
+                if index in taken:
+                    continue
+                score = float(np.dot(embedding, centroid / (np.linalg.norm(centroid) or 1.0)))
+                if score >= best_score:
+                    best, best_score = index, score
+            if best is None:
+                best = len(self._centroids)
+                self._centroids.append(embedding * weight)
+                self._weights.append(weight)
+            else:
+                self._centroids[best] = self._centroids[best] + embedding * weight
+                self._weights[best] += weight
+            taken.add(best)
+            mapping[local] = best
+        return mapping
+
+
+def slice_ms(audio: np.ndarray, start_ms: int, end_ms: int, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Zero-copy view of audio between two millisecond offsets."""
+    return audio[start_ms * sample_rate // 1000:end_ms * sample_rate // 1000]
+
+
+def first_value(res: Optional[List[Dict[str, Any]]], key: str, default: Any = None) -> Any:
+    if not res:
+        return default
+    return res[0].get(key, default)
+
+
+def plan_batches(durations: Sequence[tuple[Any, float]], batch_seconds: float) -> List[List[Any]]:
+    """
+    Group (key, duration_s) pairs into length-bucketed batches: inputs are sorted by
+    duration and packed greedily so each batch holds at most batch_seconds of audio
+    (an input longer than that forms a batch of its own). Similar lengths end up in
+    the same batch, which keeps padding low when their segments are batched together.
+    """
+    batches: List[List[Any]] = []
+    total = 0.0
+    for key, duration in sorted(durations, key=lambda kv: kv[1]):
+        if batches and total + duration <= batch_seconds:
+            batches[-1].append(key)
+            total += duration
+        else:
+            batches.append([key])
+            total = duration
+    return batches
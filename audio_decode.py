@@ -0,0 +1,69 @@
+import os
+from typing import Collection
+
+import numpy as np
+
+from asr_pipeline import SAMPLE_RATE
+
+
+def decoded_path(directory: str, audio_sha256: str) -> str:
+    return os.path.join(directory, f"{audio_sha256}.npy")
+
+
+def decode_to_npy(src_path: str, dst_path: str, sample_rate: int = SAMPLE_RATE) -> int:
+    """
+    Decode and resample an audio file to mono float32 at sample_rate and save it as
+    an .npy file at dst_path. Meant to run in a worker process, so librosa is
+    imported here rather than by the API process. Returns the number of samples.
+    """
+    import librosa
+
+    audio, _ = librosa.load(src_path, sr=sample_rate, mono=True, dtype=np.float32)
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp.npy"
+    try:
+        np.save(tmp_path, np.ascontiguousarray(audio, dtype=np.float32))
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(audio)
+
+
+def open_decoded(path: str) -> np.ndarray:
+    """Memory-map a decoded file read-only; slices of the result are views, not copies."""
+    audio = np.load(path, mmap_mode="r")
+    # Refresh the modification time, which evict_decoded() uses as the last-used time
+    os.utime(path)
+    return audio
+
+
+def evict_decoded(directory: str, max_bytes: int, keep: Collection[str] = ()) -> int:
+    """
+    Delete the least recently used decoded files until at most max_bytes remain.
+    Files in keep are still used by running jobs and are skipped: inference
+    processes open them again by path.
+    """
+    if max_bytes <= 0 or not os.path.isdir(directory):
+        return 0
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".npy") and ".tmp." not in entry.name and entry.path not in keep:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
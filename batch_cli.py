@@ -0,0 +1,378 @@
+"""
+Offline bulk transcription and summarization.
+
+Transcribes every recording of a directory (recursively) or manifest with a
+process pool of FunASR model replicas, then generates the minutes with the
+configured LLM. Transcripts (.txt, plus the raw ASR result as .json) and minutes
+(.md) are written to the output directory. Progress is appended to
+checkpoint.jsonl there, so an interrupted run picks up where it stopped.
+
+A manifest is a text file with one audio path per line, or a .jsonl file with
+objects holding "path" and optionally "topic", "date" (YYYY-MM-DD), "time"
+(HH:MM) and "location". Relative paths are resolved against the manifest.
+
+    python batch_cli.py recordings/ -o out/ --replicas 2
+    python batch_cli.py manifest.jsonl -o out/ --lang en --no-summary
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from asr_backends import load_asr_model
+from asr_pipeline import SAMPLE_RATE, assign_speakers
+from cache import DiskLRUCache
+from config import (
+    ASR_BACKEND,
+    ASR_BATCH_SIZE_S,
+    ASR_DEVICE,
+    ASR_DIARIZE_AUTO_THRESHOLD,
+    ASR_DIARIZE_DEFAULT,
+    ASR_DIARIZE_PROBE_WINDOWS,
+    ASR_MODEL_NAME,
+    ASR_MODEL_REPLICAS,
+    ASR_ONNX_INTRA_OP_THREADS,
+    ASR_ONNX_MODEL,
+    ASR_ONNX_PUNC_MODEL,
+    ASR_ONNX_QUANTIZE,
+    ASR_ONNX_VAD_MODEL,
+    ASR_PUNC_MODEL,
+    ASR_PUNC_MODEL_REVISION,
+    ASR_SPK_MODEL,
+    ASR_SPK_MODEL_REVISION,
+    ASR_VAD_MODEL,
+    ASR_VAD_MODEL_REVISION,
+    LLM_API_KEY,
+    LLM_API_URL,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CONTEXT_TOKENS,
+    LLM_MAX_PARALLEL,
+    LLM_MAX_RETRIES,
+    LLM_MAX_TOKENS,
+    LLM_MODEL_NAME,
+    LLM_RETRY_BACKOFF_SECONDS,
+    LLM_TEMPERATURE,
+    LLM_TIMEOUT_SECONDS,
+    LLM_TOP_P,
+)
+from diarization import Diarizer
+from summarization import LLMClient, summarize_transcript
+from transcript_format import format_recognition_result
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac")
+
+
+# --- Worker Processes ---
+# One model replica per worker process, loaded by the pool initializer, plus its
+# diarization models unless diarization is off
+_model = None
+_diarizer: Optional[Diarizer] = None
+
+
+def _init_worker(backend: str, model_kwargs: Dict[str, Any], onnx_kwargs: Dict[str, Any], diarize: str) -> None:
+    global _model, _diarizer
+    _model = load_asr_model(backend, model_kwargs, onnx_kwargs)
+    if diarize == "false":
+        return
+    try:
+        from funasr import AutoModel
+
+        aux_kwargs = {"disable_update": True}
+        if ASR_DEVICE:
+            aux_kwargs["device"] = ASR_DEVICE
+        _diarizer = Diarizer(
+            AutoModel(model=ASR_VAD_MODEL, model_revision=ASR_VAD_MODEL_REVISION, **aux_kwargs),
+            AutoModel(model=ASR_SPK_MODEL, model_revision=ASR_SPK_MODEL_REVISION, **aux_kwargs),
+            probe_windows=ASR_DIARIZE_PROBE_WINDOWS,
+            auto_threshold=ASR_DIARIZE_AUTO_THRESHOLD,
+        )
+    except Exception as e:
+        print(f"Speaker diarization is not available, transcripts will have no speakers: {e}")
+
+
+def _json_safe(value: Any) -> Any:
+    # numpy scalars/arrays and torch tensors coming out of FunASR
+    return json.loads(json.dumps(value, ensure_ascii=False, default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o)))
+
+
+def _transcribe_file(path: str, batch_size_s: int, diarize: str) -> Dict[str, Any]:
+    """
+    Decode, transcribe and diarize one file in a worker process, like the server
+    does. Returns the raw result, audio duration, diarized speaker count and timings.
+    """
+    started = time.perf_counter()
+    audio_input: Any = path
+    duration = None
+    try:
+        import librosa
+
+        audio_input, _ = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+        duration = len(audio_input) / SAMPLE_RATE
+    except ImportError:
+        pass
+    decode_seconds = time.perf_counter() - started
+    # Sentence-level results without a speaker model; speakers come from the diarization stage
+    res = _model.generate(input=audio_input, batch_size_s=batch_size_s, hotword='', sentence_timestamp=True)
+    res = _json_safe(res or [])
+    speakers = None
+    if _diarizer is not None and diarize != "false" and duration is not None:
+        diarization = _diarizer.diarize(audio_input, diarize)
+        assign_speakers(res, diarization["turns"])
+        speakers = diarization["speakers"]
+    if duration is None:
+        # Without librosa, approximate the duration by the end of the last sentence
+        ends = [sent.get("end") or 0 for item in res for sent in item.get("sentence_info", [])]
+        duration = max(ends, default=0) / 1000
+    return {
+        "res": res,
+        "duration": duration,
+        "speakers": speakers,
+        "decode_seconds": decode_seconds,
+        "asr_seconds": time.perf_counter() - started,
+    }
+
+
+# --- Inputs ---
+def _meeting_info(path: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    modified = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+    return {
+        "topic": fields.get("topic") or os.path.splitext(os.path.basename(path))[0],
+        "date": datetime.date.fromisoformat(fields["date"]) if fields.get("date") else modified.date(),
+        "time": datetime.time.fromisoformat(fields["time"]) if fields.get("time") else modified.time(),
+        "location": fields.get("location") or "",
+    }
+
+
+def load_inputs(source: str) -> List[Dict[str, Any]]:
+    """List the recordings of a directory or manifest as {"path", "name", "info"} dicts."""
+    entries = []
+    if os.path.isdir(source):
+        root = source
+        for directory, _, filenames in os.walk(source):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(AUDIO_EXTENSIONS):
+                    entries.append((os.path.join(directory, filename), {}))
+        entries.sort()
+    else:
+        root = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                fields = json.loads(line) if line.startswith("{") else {"path": line}
+                entries.append((os.path.join(root, fields["path"]), fields))
+
+    items = []
+    names = set()
+    root = os.path.abspath(root)
+    for path, fields in entries:
+        path = os.path.abspath(path)
+        relative = os.path.relpath(path, root)
+        name = os.path.splitext(relative if not relative.startswith("..") else os.path.basename(path))[0]
+        name = name.replace(os.sep, "__")
+        unique, suffix = name, 1
+        while unique in names:
+            suffix += 1
+            unique = f"{name}_{suffix}"
+        names.add(unique)
+        items.append({"path": path, "name": unique, "info": _meeting_info(path, fields)})
+    return items
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of finished stages per input path; the last line for a path wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["path"]] = entry
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(path)
+
+    def record(self, path: str, **fields: Any) -> Dict[str, Any]:
+        entry = {**self.entries.get(path, {}), "path": path, **fields, "updated_at": time.time()}
+        self.entries[path] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+
+# --- Batch Run ---
+async def run(args) -> int:
+    items = load_inputs(args.input)
+    os.makedirs(args.output, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(args.output, "checkpoint.jsonl"))
+    summarize = not args.no_summary
+    if summarize and not LLM_API_URL:
+        print("LLM_API_URL is not configured, minutes will not be generated.")
+        summarize = False
+    final_status = "done" if summarize else "transcribed"
+
+    pending = [item for item in items if (checkpoint.get(item["path"]) or {}).get("status") != final_status]
+    print(f"{len(items)} recording(s), {len(items) - len(pending)} already finished, {len(pending)} to process.")
+    if not pending:
+        return 0
+
+    model_kwargs = {
+        "model": ASR_MODEL_NAME,
+        "vad_model": ASR_VAD_MODEL,
+        "vad_model_revision": ASR_VAD_MODEL_REVISION,
+        "punc_model": ASR_PUNC_MODEL,
+        "punc_model_revision": ASR_PUNC_MODEL_REVISION,
+        # No spk_model: speakers are diarized separately, as on the server
+        "disable_update": True,
+    }
+    if ASR_DEVICE:
+        model_kwargs["device"] = ASR_DEVICE
+    replicas = max(args.replicas, 1)
+    onnx_kwargs = {
+        "model": ASR_ONNX_MODEL,
+        "vad_model": ASR_ONNX_VAD_MODEL,
+        "punc_model": ASR_ONNX_PUNC_MODEL,
+        "quantize": ASR_ONNX_QUANTIZE,
+        # Split the cores between the replicas unless set explicitly
+        "intra_op_threads": ASR_ONNX_INTRA_OP_THREADS or max((os.cpu_count() or 1) // replicas, 1),
+    }
+    llm_config = {
+        "api_url": LLM_API_URL,
+        "api_key": LLM_API_KEY,
+        "model_name": LLM_MODEL_NAME,
+        "temperature": LLM_TEMPERATURE,
+        "top_p": LLM_TOP_P,
+        "max_tokens": LLM_MAX_TOKENS,
+    }
+    llm_cache = (
+        DiskLRUCache(LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_BYTES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+        if summarize and LLM_CACHE_ENABLED else None
+    )
+    llm_client = LLMClient(
+        max_concurrency=args.llm_parallel,
+        max_retries=LLM_MAX_RETRIES,
+        backoff_seconds=LLM_RETRY_BACKOFF_SECONDS,
+        timeout=LLM_TIMEOUT_SECONDS,
+        cache=llm_cache,
+    ) if summarize else None
+
+    def needs_asr(item: Dict[str, Any]) -> bool:
+        entry = checkpoint.get(item["path"]) or {}
+        return (entry.get("status") not in ("transcribed", "done")
+                or not os.path.exists(os.path.join(args.output, f"{item['name']}.txt")))
+
+    pool = None
+    if any(needs_asr(item) for item in pending):
+        print(f"Loading {replicas} {ASR_BACKEND} ASR model replica(s)...")
+        # spawn, not fork: every worker loads its own replica in a clean interpreter
+        pool = ProcessPoolExecutor(
+            max_workers=replicas,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(ASR_BACKEND, model_kwargs, onnx_kwargs, args.diarize),
+        )
+    loop = asyncio.get_running_loop()
+    stats = {"files": 0, "failed": 0, "audio_seconds": 0.0, "asr_seconds": 0.0}
+    started = time.perf_counter()
+
+    async def process(item: Dict[str, Any]):
+        path, name = item["path"], item["name"]
+        transcript_path = os.path.join(args.output, f"{name}.txt")
+        if needs_asr(item):
+            try:
+                out = await loop.run_in_executor(pool, _transcribe_file, path, ASR_BATCH_SIZE_S, args.diarize)
+            except Exception as e:
+                stats["failed"] += 1
+                checkpoint.record(path, name=name, status="failed", error=f"ASR: {e}")
+                print(f"[{name}] ASR failed: {e}")
+                return
+            transcript, _ = format_recognition_result(out["res"])
+            with open(transcript_path, "w", encoding="utf-8") as f:
+                f.write(transcript)
+            with open(os.path.join(args.output, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(out["res"], f, ensure_ascii=False)
+            rtf = out["asr_seconds"] / out["duration"] if out["duration"] else None
+            checkpoint.record(
+                path,
+                name=name,
+                status="transcribed",
+                error=None,
+                duration=out["duration"],
+                speakers=out["speakers"],
+                asr_seconds=out["asr_seconds"],
+                rtf=rtf,
+            )
+            stats["audio_seconds"] += out["duration"]
+            stats["asr_seconds"] += out["asr_seconds"]
+            rtf_text = f"{rtf:.3f}" if rtf is not None else "n/a"
+            print(f"[{name}] {out['duration']:.1f}s of audio transcribed in {out['asr_seconds']:.1f}s "
+                  f"(decode {out['decode_seconds']:.1f}s), RTF {rtf_text}")
+
+        if summarize:
+            with open(transcript_path, encoding="utf-8") as f:
+                transcript = f.read()
+            try:
+                minutes, timings = await summarize_transcript(
+                    llm_client, item["info"], transcript, llm_config, lang=args.lang, context_tokens=args.context_tokens
+                )
+            except Exception as e:
+                stats["failed"] += 1
+                checkpoint.record(path, error=f"Summary: {e}")
+                print(f"[{name}] Summary failed: {e}")
+                return
+            with open(os.path.join(args.output, f"{name}.md"), "w", encoding="utf-8") as f:
+                f.write(minutes)
+            checkpoint.record(path, status="done", error=None, summary_seconds=timings.get("total_seconds"))
+            print(f"[{name}] Minutes written ({timings.get('llm_calls')} LLM call(s), {timings.get('total_seconds', 0):.1f}s).")
+        stats["files"] += 1
+
+    try:
+        await asyncio.gather(*(process(item) for item in pending))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if llm_client is not None:
+            await llm_client.aclose()
+        if llm_cache is not None:
+            llm_cache.close()
+
+    wall = time.perf_counter() - started
+    audio = stats["audio_seconds"]
+    print(
+        f"Finished {stats['files']} file(s), {stats['failed']} failed, in {wall:.1f}s. "
+        f"Transcribed {audio:.1f}s of audio: overall RTF {wall / audio if audio else 0:.3f}, "
+        f"{audio / wall if wall else 0:.1f} audio seconds per second, "
+        f"{stats['files'] * 60 / wall if wall else 0:.1f} files per minute."
+    )
+    return 1 if stats["failed"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Transcribe and summarize a directory or manifest of meeting recordings.")
+    parser.add_argument("input", help="Directory of recordings, or a manifest (.txt / .jsonl)")
+    parser.add_argument("-o", "--output", default="batch_output", help="Output directory for transcripts, minutes and the checkpoint")
+    parser.add_argument("--replicas", type=int, default=ASR_MODEL_REPLICAS, help="Number of model replicas (worker processes)")
+    parser.add_argument("--lang", choices=("zh", "en"), default="zh", help="Language of the minutes")
+    parser.add_argument("--diarize", choices=("true", "false", "auto"), default=ASR_DIARIZE_DEFAULT,
+                        help="Speaker diarization, as the server's diarize parameter")
+    parser.add_argument("--no-summary", action="store_true", help="Only transcribe, do not generate minutes")
+    parser.add_argument("--llm-parallel", type=int, default=LLM_MAX_PARALLEL, help="Concurrent LLM requests")
+    parser.add_argument("--context-tokens", type=int, default=LLM_CONTEXT_TOKENS, help="Transcript budget of one LLM prompt")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
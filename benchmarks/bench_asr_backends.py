@@ -0,0 +1,173 @@
+"""
+Compare the PyTorch and ONNX Runtime ASR backends on a local test set.
+
+The test set is a directory of recordings with the reference transcript of each
+in a .txt file of the same name (meeting.wav + meeting.txt), or a .jsonl manifest
+with "path" and "text" per line. Every backend transcribes every recording once
+after a warm-up run; audio is decoded up front, so decoding is not timed.
+Reports load time, real-time factor (RTF), character error rate (CER) and word
+error rate (WER, CJK characters count as words). Model settings come from .env.
+
+    python benchmarks/bench_asr_backends.py testset/ --backends torch onnx onnx-int8 --threads 4
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from asr_backends import load_asr_model  # noqa: E402
+from asr_pipeline import SAMPLE_RATE  # noqa: E402
+
+load_dotenv()
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac")
+# Every CJK character is a word of its own; other scripts are split at non-word characters
+_TOKEN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]|[^\W_\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def load_test_set(source: str) -> List[Tuple[str, str]]:
+    pairs = []
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(filename)
+            reference = os.path.join(source, stem + ".txt")
+            if ext.lower() in AUDIO_EXTENSIONS and os.path.exists(reference):
+                with open(reference, encoding="utf-8") as f:
+                    pairs.append((os.path.join(source, filename), f.read()))
+    else:
+        root = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    pairs.append((os.path.join(root, entry["path"]), entry["text"]))
+    return pairs
+
+
+def normalize(text: str) -> str:
+    """Lowercase, without punctuation, symbols and whitespace differences."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(" " if unicodedata.category(ch)[0] in "PSZ" else ch for ch in text)
+
+
+def edit_distance(ref: Sequence[str], hyp: Sequence[str]) -> int:
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def hypothesis_text(res) -> str:
+    texts = []
+    for item in res or []:
+        sentences = item.get("sentence_info")
+        if sentences:
+            texts.extend(sentence.get("text", "") for sentence in sentences)
+        else:
+            texts.append(item.get("text", ""))
+    return " ".join(texts)
+
+
+def backend_config(name: str, threads: int) -> Tuple[str, Dict, Dict]:
+    model_kwargs = {
+        "model": os.getenv("ASR_MODEL_NAME", "damo/speech_paraformer-large-vad-punc_asr_nat-zh-cn-16k-common-vocab8404-pytorch"),
+        "vad_model": os.getenv("ASR_VAD_MODEL", "fsmn-vad"),
+        "vad_model_revision": os.getenv("ASR_VAD_MODEL_REVISION", "v2.0.4"),
+        "punc_model": os.getenv("ASR_PUNC_MODEL", "ct-punc"),
+        "punc_model_revision": os.getenv("ASR_PUNC_MODEL_REVISION", "v2.0.4"),
+        "disable_update": True,
+        "device": os.getenv("ASR_DEVICE") or "cpu",
+    }
+    onnx_kwargs = {
+        "model": os.getenv("ASR_ONNX_MODEL", model_kwargs["model"]),
+        "vad_model": os.getenv("ASR_ONNX_VAD_MODEL", "damo/speech_fsmn_vad_zh-cn-16k-common-pytorch"),
+        "punc_model": os.getenv("ASR_ONNX_PUNC_MODEL", "damo/punc_ct-transformer_zh-cn-common-vocab272727-pytorch"),
+        "quantize": name == "onnx-int8",
+        "intra_op_threads": threads,
+    }
+    return ("onnx" if name.startswith("onnx") else "torch"), model_kwargs, onnx_kwargs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("test_set", help="Directory of recordings with .txt references, or a .jsonl manifest")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"],
+                        choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads per backend (0: library default)")
+    parser.add_argument("--batch-size-s", type=int, default=int(os.getenv("ASR_BATCH_SIZE_S", 300)))
+    parser.add_argument("--json", help="Also write per-file results to this file")
+    args = parser.parse_args()
+
+    import librosa
+
+    pairs = load_test_set(args.test_set)
+    if not pairs:
+        sys.exit(f"No recordings with reference transcripts found in {args.test_set}")
+    audios = [librosa.load(path, sr=SAMPLE_RATE, mono=True)[0] for path, _ in pairs]
+    total_audio = sum(len(audio) for audio in audios) / SAMPLE_RATE
+    print(f"{len(pairs)} recording(s), {total_audio:.1f}s of audio")
+    if args.threads:
+        try:
+            import torch
+
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    summary = []
+    details = []
+    for name in args.backends:
+        backend, model_kwargs, onnx_kwargs = backend_config(name, args.threads)
+        started = time.perf_counter()
+        model = load_asr_model(backend, model_kwargs, onnx_kwargs)
+        load_seconds = time.perf_counter() - started
+        model.generate(input=audios[0], batch_size_s=args.batch_size_s, hotword='')
+
+        seconds = char_errors = chars = word_errors = words = 0
+        for (path, reference), audio in zip(pairs, audios):
+            started = time.perf_counter()
+            res = model.generate(input=audio, batch_size_s=args.batch_size_s, hotword='')
+            elapsed = time.perf_counter() - started
+            ref, hyp = normalize(reference), normalize(hypothesis_text(res))
+            ref_chars, hyp_chars = ref.replace(" ", ""), hyp.replace(" ", "")
+            ref_words, hyp_words = _TOKEN_PATTERN.findall(ref), _TOKEN_PATTERN.findall(hyp)
+            file_char_errors = edit_distance(ref_chars, hyp_chars)
+            file_word_errors = edit_distance(ref_words, hyp_words)
+            seconds += elapsed
+            char_errors += file_char_errors
+            chars += len(ref_chars)
+            word_errors += file_word_errors
+            words += len(ref_words)
+            details.append({
+                "backend": name,
+                "path": path,
+                "duration": len(audio) / SAMPLE_RATE,
+                "seconds": elapsed,
+                "cer": file_char_errors / max(len(ref_chars), 1),
+                "wer": file_word_errors / max(len(ref_words), 1),
+                "hypothesis": hypothesis_text(res),
+            })
+        summary.append((name, load_seconds, seconds, seconds / total_audio, char_errors / max(chars, 1), word_errors / max(words, 1)))
+        del model
+
+    print(f"{'backend':>10} {'load s':>8} {'asr s':>8} {'RTF':>7} {'CER':>7} {'WER':>7}")
+    for name, load_seconds, seconds, rtf, cer, wer in summary:
+        print(f"{name:>10} {load_seconds:8.1f} {seconds:8.1f} {rtf:7.3f} {cer:7.2%} {wer:7.2%}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(details, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark format_recognition_result on synthetic all-day transcripts.
+
+Compares the implementation in transcript_format.py against the previous
+per-sentence loop and checks that both produce byte-identical output.
+
+    python benchmarks/bench_format_recognition.py --sentences 100000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from typing import Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_format import format_recognition_result  # noqa: E402
+
+
+def legacy_format_recognition_result(res) -> tuple[str, Set[str]]:
+    """Previous per-sentence implementation, kept as the byte-for-byte reference."""
+    all_speakers = set()
+    if not res:
+        return "No transcription results were returned.", all_speakers
+
+    sentences = []
+    for item in res:
+        sentences.extend(item.get("sentence_info", []))
+
+    formatted_output = []
+    current_speaker = None
+    buffer_text: list[str] = []
+    buf_start = buf_end = 0.0
+
+    for sent in sentences:
+        spk = sent.get("spk", "未知")
+        txt = sent.get("text", "").strip()
+        start_ms = sent.get("start")
+        end_ms   = sent.get("end")
+        if txt == "" or start_ms is None or end_ms is None:
+            continue
+        start_s = start_ms / 1000
+        end_s   = end_ms   / 1000
+        all_speakers.add(spk)
+
+        if spk == current_speaker:
+            buffer_text.append(txt)
+            buf_end = end_s
+        else:
+            if buffer_text:
+                formatted_output.append(
+                    f"说话人 {current_speaker} [{buf_start:.2f}s - {buf_end:.2f}s]: "
+                    + " ".join(buffer_text)
+                )
+            current_speaker = spk
+            buffer_text = [txt]
+            buf_start = start_s
+            buf_end   = end_s
+
+    if buffer_text:
+        formatted_output.append(
+            f"说话人 {current_speaker} [{buf_start:.2f}s - {buf_end:.2f}s]: "
+            + " ".join(buffer_text)
+        )
+
+    return "\n".join(formatted_output), all_speakers
+
+
+def synthetic_result(num_sentences: int, num_speakers: int, items: int, seed: int):
+    """FunASR-shaped result: `items` entries whose sentence_info add up to num_sentences."""
+    rng = random.Random(seed)
+    words = ["我们", "今天", "讨论", "一下", "项目", "进度", "预算", "好的", "没问题", "下周", "上线", "测试"]
+    res = []
+    t = 0
+    per_item = max(num_sentences // items, 1)
+    speaker = 0
+    for index in range(items):
+        sentence_info = []
+        for _ in range(per_item):
+            duration = rng.randint(300, 8000)
+            if rng.random() < 0.35:
+                speaker = rng.randrange(num_speakers)
+            text = "".join(rng.choice(words) for _ in range(rng.randint(1, 12))) + "。"
+            sentence = {"text": text if rng.random() > 0.01 else "  ", "start": t, "end": t + duration, "spk": speaker}
+            if rng.random() < 0.001:
+                sentence["start"] = None
+            sentence_info.append(sentence)
+            t += duration + rng.randint(0, 800)
+        res.append({"key": f"item{index}", "sentence_info": sentence_info})
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=100_000)
+    parser.add_argument("--speakers", type=int, default=6)
+    parser.add_argument("--items", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    res = synthetic_result(args.sentences, args.speakers, args.items, args.seed)
+    expected = legacy_format_recognition_result(res)
+    actual = format_recognition_result(res)
+    if actual != expected:
+        sys.exit("Output mismatch between current and legacy implementation!")
+    print(f"{args.sentences} sentences -> {expected[0].count(chr(10)) + 1} lines, "
+          f"{len(expected[0].encode('utf-8'))} bytes, {len(expected[1])} speakers (outputs identical)")
+
+    for name, func in (("legacy", legacy_format_recognition_result), ("current", format_recognition_result)):
+        best = min(timeit.repeat(lambda: func(res), number=1, repeat=args.repeat))
+        print(f"{name:>9}: {best * 1000:8.1f} ms  ({args.sentences / best / 1e6:.2f} M sentences/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def _json_default(obj: Any) -> Any:
+    # numpy scalars/arrays and torch tensors coming out of FunASR
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable SHA-256 key over JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    """
+    Disk-backed key/value cache on SQLite (WAL mode). Values are stored as JSON.
+    Entries are evicted least-recently-used first once the total stored size
+    exceeds max_bytes, and treated as missing once older than ttl_seconds.
+    Hit/miss counters are kept per process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, ttl_seconds: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._conn()
+        row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds):
+            if row is not None:
+                with conn:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count(False)
+            return None
+        with conn:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(True)
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        blob = json.dumps(value, ensure_ascii=False, default=_json_default).encode("utf-8")
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries")
+
+    def evict(self) -> int:
+        conn = self._conn()
+        evicted = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.ttl_seconds > 0:
+                evicted += conn.execute(
+                    "DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                ).rowcount
+            if self.max_bytes > 0:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    # Walk entries from least to most recently used until enough bytes are freed
+                    victims = []
+                    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+                        if total <= self.max_bytes:
+                            break
+                        victims.append((key,))
+                        total -= size
+                    conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+                    evicted += len(victims)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
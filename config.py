@@ -0,0 +1,55 @@
+"""
+Settings shared by the API server (main.py) and the batch CLI (batch_cli.py):
+the offline ASR pipeline, speaker diarization and the LLM used for the minutes.
+Read from the environment, after loading .env. Server-only settings stay in main.py.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- ASR Models ---
+ASR_MODEL_NAME = os.getenv("ASR_MODEL_NAME", "damo/speech_paraformer-large-vad-punc_asr_nat-zh-cn-16k-common-vocab8404-pytorch")
+ASR_VAD_MODEL = os.getenv("ASR_VAD_MODEL", "fsmn-vad")
+ASR_VAD_MODEL_REVISION = os.getenv("ASR_VAD_MODEL_REVISION", "v2.0.4")
+ASR_PUNC_MODEL = os.getenv("ASR_PUNC_MODEL", "ct-punc")
+ASR_PUNC_MODEL_REVISION = os.getenv("ASR_PUNC_MODEL_REVISION", "v2.0.4")
+ASR_SPK_MODEL = os.getenv("ASR_SPK_MODEL", "cam++")
+ASR_SPK_MODEL_REVISION = os.getenv("ASR_SPK_MODEL_REVISION", "v2.0.2")
+ASR_DEVICE = os.getenv("ASR_DEVICE")
+ASR_BACKEND = os.getenv("ASR_BACKEND", "torch").lower()
+ASR_ONNX_MODEL = os.getenv("ASR_ONNX_MODEL", ASR_MODEL_NAME)
+ASR_ONNX_VAD_MODEL = os.getenv("ASR_ONNX_VAD_MODEL", "damo/speech_fsmn_vad_zh-cn-16k-common-pytorch")
+ASR_ONNX_PUNC_MODEL = os.getenv("ASR_ONNX_PUNC_MODEL", "damo/punc_ct-transformer_zh-cn-common-vocab272727-pytorch")
+ASR_ONNX_QUANTIZE = os.getenv("ASR_ONNX_QUANTIZE", "false").lower() == "true"
+ASR_ONNX_INTRA_OP_THREADS = int(os.getenv("ASR_ONNX_INTRA_OP_THREADS", 0))
+ASR_BATCH_SIZE_S = int(os.getenv("ASR_BATCH_SIZE_S", 300))
+ASR_MODEL_REPLICAS = int(os.getenv("ASR_MODEL_REPLICAS", 1))
+
+# --- Speaker Diarization ---
+# Default of the per-request diarize parameter: true, false or auto
+ASR_DIARIZE_DEFAULT = os.getenv("ASR_DIARIZE_DEFAULT", "true").lower()
+ASR_DIARIZE_PROBE_WINDOWS = int(os.getenv("ASR_DIARIZE_PROBE_WINDOWS", 8))
+ASR_DIARIZE_AUTO_THRESHOLD = float(os.getenv("ASR_DIARIZE_AUTO_THRESHOLD", 0.6))
+
+if ASR_DIARIZE_DEFAULT not in ("false", "auto", "true"):
+    print(f"Warning: invalid ASR_DIARIZE_DEFAULT {ASR_DIARIZE_DEFAULT!r}, using 'true'.")
+    ASR_DIARIZE_DEFAULT = "true"
+
+# --- LLM ---
+LLM_API_URL = os.getenv("LLM_API_URL")
+LLM_API_KEY = os.getenv("LLM_API_KEY")
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME")
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", 24000))
+LLM_MAX_PARALLEL = int(os.getenv("LLM_MAX_PARALLEL", 4))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 180))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", 2))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE")) if os.getenv("LLM_TEMPERATURE") else None
+LLM_TOP_P = float(os.getenv("LLM_TOP_P")) if os.getenv("LLM_TOP_P") else None
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS")) if os.getenv("LLM_MAX_TOKENS") else None
@@ -0,0 +1,91 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from asr_pipeline import SAMPLE_RATE, first_value, is_single_speaker, slice_ms, to_numpy
+
+try:
+    # Speaker clustering of FunASR's own diarization
+    from funasr.models.campplus.cluster_backend import ClusterBackend
+    from funasr.models.campplus.utils import postprocess as merge_speaker_turns, sv_chunk
+except ImportError:
+    ClusterBackend = None
+
+
+class Diarizer:
+    """
+    Speaker diarization as a stage of its own, the way FunASR diarizes inside
+    AutoModel: VAD, speaker embeddings of 1.5s windows, spectral clustering.
+    Used by the API server and the batch CLI, so both label speakers alike.
+
+    The models may be shared with other users (chunking, live transcription);
+    every generate call is made under the model's lock, per window for the
+    speaker model, so other users can get in between.
+    """
+
+    def __init__(
+        self,
+        vad_model,
+        spk_embedder,
+        probe_windows: int = 8,
+        auto_threshold: float = 0.6,
+        vad_lock: Optional[threading.Lock] = None,
+        spk_lock: Optional[threading.Lock] = None,
+    ):
+        if ClusterBackend is None:
+            raise ImportError("FunASR speaker clustering could not be imported")
+        self.vad_model = vad_model
+        self.spk_embedder = spk_embedder
+        self.clusterer = ClusterBackend()
+        self.probe_windows = probe_windows
+        self.auto_threshold = auto_threshold
+        self.vad_lock = vad_lock or threading.Lock()
+        self.spk_lock = spk_lock or threading.Lock()
+
+    def detect_speech(self, audio: np.ndarray) -> List[List[int]]:
+        """[start_ms, end_ms] speech segments of 16 kHz mono audio."""
+        with self.vad_lock:
+            vad_res = self.vad_model.generate(input=audio, fs=SAMPLE_RATE)
+        return first_value(vad_res, "value", [])
+
+    def window_embeddings(self, windows: list) -> np.ndarray:
+        """Speaker embeddings of [start_s, end_s, samples] windows, one row each."""
+        vectors = []
+        for window in windows:
+            with self.spk_lock:
+                res = self.spk_embedder.generate(input=window[2], fs=SAMPLE_RATE)
+            vectors.append(to_numpy(first_value(res, "spk_embedding")))
+        return np.stack(vectors)
+
+    def diarize(self, audio: np.ndarray, mode: str = "true", speech: Optional[list] = None) -> Dict[str, Any]:
+        """
+        Speaker turns ([start_ms, end_ms, speaker]) of 16 kHz mono audio, with the
+        number of speakers. speech are its VAD segments, detected here if not given.
+        With mode "auto" a few windows spread over the recording are embedded first;
+        when they all match one speaker the remaining windows and the clustering are
+        skipped and all speech is attributed to speaker 0.
+        """
+        if speech is None:
+            speech = self.detect_speech(audio)
+        windows = sv_chunk([[start_ms / 1000, end_ms / 1000, slice_ms(audio, start_ms, end_ms)] for start_ms, end_ms in speech])
+        if not windows:
+            return {"turns": [], "speakers": 0, "skipped": False}
+
+        embeddings: Dict[int, np.ndarray] = {}
+        if mode == "auto":
+            probes = sorted(set(np.linspace(0, len(windows) - 1, max(self.probe_windows, 2)).astype(int).tolist()))
+            embeddings.update(zip(probes, self.window_embeddings([windows[i] for i in probes])))
+            if is_single_speaker(np.stack(list(embeddings.values())), self.auto_threshold):
+                return {"turns": [[start_ms, end_ms, 0] for start_ms, end_ms in speech], "speakers": 1, "skipped": True}
+        missing = [i for i in range(len(windows)) if i not in embeddings]
+        if missing:
+            embeddings.update(zip(missing, self.window_embeddings([windows[i] for i in missing])))
+        matrix = np.stack([embeddings[i] for i in range(len(windows))])
+        labels = self.clusterer(matrix, oracle_num=None)
+        turns = merge_speaker_turns([window[:2] for window in windows], None, labels, matrix)
+        return {
+            "turns": [[int(start_s * 1000), int(end_s * 1000), int(spk)] for start_s, end_s, spk in turns],
+            "speakers": len({spk for _, _, spk in turns}),
+            "skipped": False,
+        }
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+PROFILE_NAME_PATTERN = "^[A-Za-z0-9_-]{1,64}$"
+_PROFILE_NAME = re.compile(PROFILE_NAME_PATTERN)
+
+
+def normalize_hotwords(words: Sequence[str]) -> List[str]:
+    """
+    NFKC-normalized hotwords without duplicates, in order of first appearance.
+    Every entry is one hotword, which may be a phrase (runs of whitespace inside
+    it are collapsed); empty entries and lines starting with # are skipped.
+    """
+    seen: Dict[str, None] = {}
+    for word in words:
+        phrase = " ".join(unicodedata.normalize("NFKC", word).split())
+        if phrase and not phrase.startswith("#"):
+            seen[phrase] = None
+    return list(seen)
+
+
+def compile_hotwords(words: Sequence[str], profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The prepared form of a hotword list: the normalized hotwords, and a version
+    derived from them for cache keys.
+    """
+    normalized = normalize_hotwords(words)
+    return {
+        "profile": profile,
+        "version": hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()[:16],
+        "count": len(normalized),
+        "words": normalized,
+    }
+
+
+class HotwordStore:
+    """
+    Named hotword profiles, stored as one text file per profile in directory
+    with one hotword per line. Compiled profiles are cached by file modification
+    time and size, and ad-hoc lists by content (at most cache_size of each), so
+    repeated jobs with the same vocabulary do not read, normalize and hash it again.
+    """
+
+    def __init__(self, directory: str, max_words: int = 100, cache_size: int = 128):
+        self.directory = directory
+        self.max_words = max_words
+        self.cache_size = cache_size
+        self._profiles: Dict[str, tuple] = {}
+        self._lists: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        if not _PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid hotword profile name: {name!r}")
+        return os.path.join(self.directory, name + ".txt")
+
+    def _check_size(self, compiled: Dict[str, Any]) -> Dict[str, Any]:
+        if self.max_words > 0 and compiled["count"] > self.max_words:
+            raise ValueError(f"Too many hotwords ({compiled['count']}), at most {self.max_words} are allowed.")
+        return compiled
+
+    def compile(self, words: Sequence[str]) -> Dict[str, Any]:
+        key = tuple(words)
+        with self._lock:
+            compiled = self._lists.get(key)
+            if compiled is not None:
+                self._lists.move_to_end(key)
+                return compiled
+        compiled = self._check_size(compile_hotwords(words))
+        with self._lock:
+            self._lists[key] = compiled
+            while len(self._lists) > self.cache_size:
+                self._lists.popitem(last=False)
+        return compiled
+
+    def profile(self, name: str) -> Dict[str, Any]:
+        """The compiled profile. Raises KeyError if it does not exist."""
+        path = self._path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise KeyError(name)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._profiles.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        with open(path, encoding="utf-8") as f:
+            compiled = compile_hotwords(f.read().splitlines(), profile=name)
+        with self._lock:
+            self._profiles[name] = (signature, compiled)
+            while len(self._profiles) > self.cache_size:
+                self._profiles.pop(next(iter(self._profiles)))
+        return compiled
+
+    def resolve(self, profile: Optional[str], words: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """
+        Hotwords of a request: the named profile, the ad-hoc words, or both combined.
+        Returns None when there are none. Raises KeyError for an unknown profile and
+        ValueError for an invalid name or too many hotwords.
+        """
+        if profile and words:
+            base = self.profile(profile)
+            return self._check_size(compile_hotwords([*base["words"], *words], profile=profile))
+        if profile:
+            return self._check_size(self.profile(profile))
+        if words:
+            compiled = self.compile(words)
+            return compiled if compiled["count"] else None
+        return None
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        names = sorted(
+            filename[:-4] for filename in os.listdir(self.directory)
+            if filename.endswith(".txt") and _PROFILE_NAME.match(filename[:-4])
+        )
+        profiles = []
+        for name in names:
+            try:
+                profiles.append(self.profile(name))
+            except KeyError:
+                # Deleted concurrently
+                pass
+        return profiles
+
+    def save_profile(self, name: str, words: Sequence[str]) -> Dict[str, Any]:
+        path = self._path(name)
+        compiled = self._check_size(compile_hotwords(words, profile=name))
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(word + "\n" for word in compiled["words"]))
+        os.replace(tmp_path, path)
+        return self.profile(name)
+
+    def delete_profile(self, name: str) -> bool:
+        path = self._path(name)
+        with self._lock:
+            self._profiles.pop(name, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
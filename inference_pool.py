@@ -0,0 +1,282 @@
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+
+class _MappedArray:
+    """Stand-in for a slice of a memory-mapped .npy file, sent instead of the samples."""
+
+    def __init__(self, path: str, start: int, stop: int):
+        self.path = path
+        self.start = start
+        self.stop = stop
+
+
+def _pack(value: Any) -> Any:
+    """
+    Replace slices of memory-mapped .npy files (the decoded audio cache) by their
+    path and offsets, so a job does not pickle and copy the whole recording.
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value)(_pack(item) for item in value)
+    if not isinstance(value, np.memmap) or value.ndim != 1 or not value.flags.c_contiguous:
+        return value
+    root = value
+    while isinstance(root.base, np.memmap):
+        root = root.base
+    if not root.filename or not root.filename.endswith(".npy") or root.ndim != 1:
+        return value
+    start, remainder = divmod(value.ctypes.data - root.ctypes.data, value.itemsize)
+    if remainder or root.dtype != value.dtype:
+        return value
+    return _MappedArray(root.filename, start, start + value.shape[0])
+
+
+def _unpack(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unpack(item) for item in value)
+    if isinstance(value, _MappedArray):
+        return np.load(value.path, mmap_mode="r")[value.start:value.stop]
+    return value
+
+
+def _limit_torch_threads(threads: int) -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def _worker_main(index: int, model: Any, jobs, results, current, threads: int) -> None:
+    _limit_torch_threads(threads)
+    host_pid = os.getppid()
+    while True:
+        try:
+            job = jobs.get(timeout=1)
+        except queue.Empty:
+            # Do not outlive a host that was killed
+            if os.getppid() != host_pid:
+                break
+            continue
+        if job is None:
+            break
+        job_id, payload = job
+        current[index] = job_id
+        try:
+            # Pickle here rather than in the queue's feeder thread, so an unpicklable result fails the job
+            kwargs = {key: _unpack(value) for key, value in pickle.loads(payload).items()}
+            result = pickle.dumps((True, model.generate(**kwargs)))
+        except Exception as e:
+            result = pickle.dumps((False, f"{type(e).__name__}: {e}"))
+        results.put((job_id, result))
+        # Cleared after the put: if the process dies in between, the host's failure report for the job is ignored
+        current[index] = -1
+
+
+def _host_main(loader: Callable[..., Any], loader_args: Sequence[Any], processes: int, threads: int, jobs, results, cancels, stop) -> None:
+    """
+    Load the model once, then fork the worker processes, which share its weights
+    copy-on-write. Workers that die are replaced, and the job they were running fails.
+    A job ID received on cancels stops the worker running that job.
+    """
+    # Keep torch single-threaded until after the fork: an OpenMP thread pool
+    # started in this process does not survive into the forked workers.
+    _limit_torch_threads(1)
+    try:
+        model = loader(*loader_args)
+    except Exception as e:
+        results.put((None, pickle.dumps((False, f"{type(e).__name__}: {e}"))))
+        return
+
+    ctx = multiprocessing.get_context("fork")
+    current = ctx.RawArray("q", [-1] * processes)
+    # Workers forked after this process wrote to results would inherit its feeder
+    # thread state and never send; a queue created here is reset in every fork
+    worker_results = ctx.Queue()
+
+    def relay():
+        while True:
+            message = worker_results.get()
+            if message is None:
+                break
+            results.put(message)
+
+    relay_thread = threading.Thread(target=relay, name="asr-inference-relay", daemon=True)
+    relay_thread.start()
+
+    def start_worker(index: int):
+        process = ctx.Process(
+            target=_worker_main,
+            args=(index, model, jobs, worker_results, current, threads),
+            name=f"asr-inference-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    workers = [start_worker(index) for index in range(processes)]
+    results.put((None, pickle.dumps((True, [worker.pid for worker in workers]))))
+    while not stop.is_set():
+        wait([worker.sentinel for worker in workers], timeout=1)
+        while True:
+            try:
+                job_id = cancels.get_nowait()
+            except queue.Empty:
+                break
+            for index, worker in enumerate(workers):
+                if current[index] == job_id:
+                    print(f"ASR inference job {job_id} timed out, stopping process {index}.")
+                    worker.terminate()
+                    worker.join()
+        for index, worker in enumerate(workers):
+            if worker.is_alive() or stop.is_set():
+                continue
+            print(f"ASR inference process {index} exited with code {worker.exitcode}, restarting it.")
+            job_id = current[index]
+            if job_id >= 0:
+                current[index] = -1
+                results.put((job_id, pickle.dumps((False, f"Inference process exited with code {worker.exitcode}"))))
+            workers[index] = start_worker(index)
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.join()
+    worker_results.put(None)
+    relay_thread.join()
+
+
+class InferencePool:
+    """
+    ASR model replicas in separate processes, so CPU inference is not limited by
+    the GIL of the API process. A host process loads the model once and forks the
+    inference processes from it; they share the weights copy-on-write instead of
+    each loading a copy. Jobs and results travel over multiprocessing queues;
+    audio from the decoded .npy cache is sent as path and offsets and mapped by
+    the inference process. At most one job per process is in flight; a job that
+    times out keeps its slot until its process has been stopped. If the host
+    process dies, all outstanding and later jobs fail and the pool reports
+    itself unhealthy.
+    """
+
+    def __init__(self, loader: Callable[..., Any], loader_args: Sequence[Any], processes: int, threads_per_process: int = 0,
+                 timeout: Optional[float] = None):
+        """
+        loader(*loader_args) builds the model in the host; it must be a module-level function, as it is pickled.
+        A job that runs longer than timeout seconds fails and its process is restarted (None waits indefinitely).
+        """
+        self.processes = max(processes, 1)
+        self.timeout = timeout
+        self.healthy = False
+        self.threads_per_process = threads_per_process or max((os.cpu_count() or 1) // self.processes, 1)
+        # spawn, not fork: the API process runs threads; the host forks from a clean interpreter
+        ctx = multiprocessing.get_context("spawn")
+        self._jobs = ctx.Queue()
+        self._results = ctx.Queue()
+        self._cancels = ctx.Queue()
+        self._stop = ctx.Event()
+        self._host = ctx.Process(
+            target=_host_main,
+            args=(loader, tuple(loader_args), self.processes, self.threads_per_process, self._jobs, self._results,
+                  self._cancels, self._stop),
+            name="asr-inference-host",
+        )
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        # A job is only queued once a process is free, so the timeout does not count time spent waiting
+        self._slots = threading.Semaphore(self.processes)
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the host process and block until the model is loaded and the inference processes are running."""
+        self._host.start()
+        while True:
+            try:
+                _, payload = self._results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not self._host.is_alive():
+                    raise RuntimeError(f"ASR inference host exited with code {self._host.exitcode}")
+        ok, value = pickle.loads(payload)
+        if not ok:
+            self._host.join()
+            raise RuntimeError(value)
+        print(f"Started {self.processes} ASR inference process(es) {value}, {self.threads_per_process} thread(s) each.")
+        self.healthy = True
+        self._reader = threading.Thread(target=self._read_results, name="asr-inference-results", daemon=True)
+        self._reader.start()
+
+    def _read_results(self) -> None:
+        while True:
+            try:
+                job_id, payload = self._results.get(timeout=1)
+            except queue.Empty:
+                if self._host.is_alive():
+                    continue
+                if not self._stop.is_set():
+                    print(f"ASR inference host exited with code {self._host.exitcode}, failing outstanding jobs.")
+                self._fail_pending(f"ASR inference host exited with code {self._host.exitcode}")
+                break
+            except (EOFError, OSError) as e:
+                print(f"Reading ASR inference results failed ({e!r}), failing outstanding jobs.")
+                self._fail_pending(f"ASR inference results are unavailable: {e!r}")
+                break
+            if job_id is None:
+                break
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+            if future is None:
+                continue
+            ok, value = pickle.loads(payload)
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+
+    def _fail_pending(self, message: str) -> None:
+        with self._lock:
+            self.healthy = False
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError(message))
+
+    def generate(self, **kwargs) -> Any:
+        """Run model.generate(**kwargs) in one of the inference processes and wait for the result."""
+        payload = pickle.dumps({key: _pack(value) for key, value in kwargs.items()})
+        future: Future = Future()
+        self._slots.acquire()
+        with self._lock:
+            if not self.healthy:
+                self._slots.release()
+                raise RuntimeError("ASR inference pool is not running.")
+            job_id = next(self._ids)
+            self._pending[job_id] = future
+        # The slot is freed once the job's result (or failure) is in
+        future.add_done_callback(lambda _: self._slots.release())
+        self._jobs.put((job_id, payload))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The host stops the process running the job and then fails the job, which frees its slot
+            self._cancels.put(job_id)
+            raise RuntimeError(f"ASR inference job did not finish within {self.timeout:g}s")
+
+    def close(self) -> None:
+        self._stop.set()
+        self._host.join(timeout=10)
+        if self._host.is_alive():
+            self._host.terminate()
+            self._host.join()
+        if self._reader is not None:
+            self._results.put((None, None))
+            self._reader.join(timeout=5)
+        self._fail_pending("ASR inference pool was closed.")
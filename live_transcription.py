@@ -0,0 +1,205 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from asr_pipeline import SAMPLE_RATE, SpeakerReconciler, first_value, to_numpy
+
+
+class LatencyStats:
+    """Running latency statistics (milliseconds) for one kind of emitted message."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: List[float] = []
+
+    def add(self, latency_ms: float) -> None:
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self._recent.append(latency_ms)
+        if len(self._recent) > self.window:
+            del self._recent[0]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p95_ms": round(float(np.percentile(self._recent, 95)), 1) if self._recent else None,
+            "max_ms": round(self.max_ms, 1) if self.count else None,
+        }
+
+
+class LiveTranscriptionSession:
+    """
+    Per-connection state for live transcription of a 16 kHz mono PCM stream.
+
+    Audio is consumed in fixed strides matching the streaming ASR chunk size. Each
+    stride goes through streaming VAD first; while speech is active the stride is
+    fed to the streaming ASR model, producing provisional text. When VAD reports the
+    end of speech (or the segment reaches max_segment_ms) the segment is finalized:
+    punctuation is restored and a speaker label is assigned by matching its speaker
+    embedding against the speakers seen so far on this connection.
+
+    Models are shared between connections; FunASR keeps streaming state in the
+    per-call cache dict but writes call options onto the model, so every generate
+    call is made under the model's lock.
+    """
+
+    def __init__(
+        self,
+        asr_model,
+        asr_lock: threading.Lock,
+        vad_model,
+        vad_lock: threading.Lock,
+        punc_model=None,
+        punc_lock: Optional[threading.Lock] = None,
+        spk_embedder=None,
+        spk_lock: Optional[threading.Lock] = None,
+        spk_match_threshold: float = 0.6,
+        chunk_size: tuple = (0, 10, 5),
+        encoder_chunk_look_back: int = 4,
+        decoder_chunk_look_back: int = 1,
+        max_segment_ms: int = 30000,
+    ):
+        self.asr_model = asr_model
+        self.asr_lock = asr_lock
+        self.vad_model = vad_model
+        self.vad_lock = vad_lock
+        self.punc_model = punc_model
+        self.punc_lock = punc_lock or threading.Lock()
+        self.spk_embedder = spk_embedder
+        self.spk_lock = spk_lock or threading.Lock()
+        self.reconciler = SpeakerReconciler(spk_match_threshold)
+        self.chunk_size = list(chunk_size)
+        self.encoder_chunk_look_back = encoder_chunk_look_back
+        self.decoder_chunk_look_back = decoder_chunk_look_back
+        self.max_segment_ms = max_segment_ms
+        # chunk_size[1] is counted in 60 ms frames
+        self.stride = chunk_size[1] * 960
+        self.stride_ms = self.stride * 1000 // SAMPLE_RATE
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._processed_ms = 0
+        self._vad_cache: Dict[str, Any] = {}
+        self._reset_segment()
+        self._last_speaker: Any = None
+
+    @property
+    def buffered_samples(self) -> int:
+        return len(self._pending)
+
+    @property
+    def processed_ms(self) -> int:
+        return self._processed_ms
+
+    def _reset_segment(self) -> None:
+        self._asr_cache: Dict[str, Any] = {}
+        self._in_speech = False
+        self._segment_start_ms = 0
+        self._segment_audio: List[np.ndarray] = []
+        self._segment_text: List[str] = []
+
+    def feed(self, pcm: bytes, is_final: bool = False) -> List[Dict[str, Any]]:
+        """Add little-endian int16 PCM and process every complete stride. Returns emitted events."""
+        if pcm:
+            samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+            self._pending = np.concatenate([self._pending, samples])
+        events = []
+        while len(self._pending) >= self.stride or (is_final and len(self._pending)):
+            chunk, self._pending = self._pending[:self.stride], self._pending[self.stride:]
+            events.extend(self._process_chunk(chunk, is_final and not len(self._pending)))
+        if is_final and self._in_speech:
+            # Flush the open segment with a single frame of silence
+            events.extend(self._finalize(np.zeros(960, dtype=np.float32), self._processed_ms))
+        return events
+
+    def _process_chunk(self, chunk: np.ndarray, is_last: bool) -> List[Dict[str, Any]]:
+        self._processed_ms += len(chunk) * 1000 // SAMPLE_RATE
+        with self.vad_lock:
+            vad_res = self.vad_model.generate(
+                input=chunk, cache=self._vad_cache, is_final=is_last, chunk_size=self.stride_ms
+            )
+        speech_end_ms = restart_ms = None
+        for beg, end in first_value(vad_res, "value", []) or []:
+            if beg != -1:
+                if not self._in_speech:
+                    self._in_speech = True
+                    self._segment_start_ms = beg
+                elif speech_end_ms is not None:
+                    # A new utterance starts within the same stride as the previous one ended
+                    restart_ms = beg
+            if end != -1 and self._in_speech:
+                speech_end_ms = end
+
+        if not self._in_speech:
+            return []
+        self._segment_audio.append(chunk)
+        if speech_end_ms is None and self._processed_ms - self._segment_start_ms >= self.max_segment_ms:
+            speech_end_ms = self._processed_ms
+        if speech_end_ms is not None or is_last:
+            events = self._finalize(chunk, speech_end_ms if speech_end_ms is not None else self._processed_ms)
+            if restart_ms is not None and not is_last:
+                self._in_speech = True
+                self._segment_start_ms = restart_ms
+            return events
+
+        text = self._recognize(chunk, is_final=False)
+        if not text:
+            return []
+        self._segment_text.append(text)
+        return [{
+            "type": "partial",
+            "segment": self._segment(self._last_speaker, self._processed_ms),
+        }]
+
+    def _recognize(self, chunk: np.ndarray, is_final: bool) -> str:
+        with self.asr_lock:
+            res = self.asr_model.generate(
+                input=chunk,
+                cache=self._asr_cache,
+                is_final=is_final,
+                chunk_size=self.chunk_size,
+                encoder_chunk_look_back=self.encoder_chunk_look_back,
+                decoder_chunk_look_back=self.decoder_chunk_look_back,
+            )
+        return first_value(res, "text", "") or ""
+
+    def _finalize(self, chunk: np.ndarray, end_ms: int) -> List[Dict[str, Any]]:
+        self._segment_text.append(self._recognize(chunk, is_final=True))
+        text = "".join(self._segment_text).strip()
+        if text and self.punc_model is not None:
+            with self.punc_lock:
+                text = first_value(self.punc_model.generate(input=text), "text", text) or text
+        speaker = self._identify_speaker()
+        segment = self._segment(speaker, end_ms, text)
+        self._reset_segment()
+        if not text:
+            return []
+        self._last_speaker = speaker
+        return [{"type": "final", "segment": segment}]
+
+    def _identify_speaker(self) -> Any:
+        if self.spk_embedder is None or not self._segment_audio:
+            return self._last_speaker if self._last_speaker is not None else 0
+        audio = np.concatenate(self._segment_audio)
+        # Very short segments give unreliable embeddings; keep the previous speaker
+        if len(audio) < SAMPLE_RATE // 2 and self._last_speaker is not None:
+            return self._last_speaker
+        with self.spk_lock:
+            vector = first_value(self.spk_embedder.generate(input=audio, fs=SAMPLE_RATE), "spk_embedding")
+        if vector is None:
+            return self._last_speaker if self._last_speaker is not None else 0
+        mapping = self.reconciler.add_chunk({0: (to_numpy(vector), len(audio) * 1000 / SAMPLE_RATE)})
+        return mapping[0]
+
+    def _segment(self, speaker: Any, end_ms: int, text: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "speaker": speaker if speaker is not None else "未知",
+            "start": self._segment_start_ms / 1000,
+            "end": max(end_ms, self._segment_start_ms) / 1000,
+            "text": text if text is not None else "".join(self._segment_text),
+        }
@@ -1,153 +1,1324 @@
 import asyncio
+import contextlib
+import datetime
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
 import os
+import socket
 import tempfile
+import threading
+import time
 import uuid
-from typing import Dict, Any, Set, Optional
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Set, Optional, List, Callable, Union, Awaitable
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, status
-from pydantic import BaseModel
-from dotenv import load_dotenv
+from fastapi import FastAPI, File, Form, UploadFile, Header, HTTPException, Path, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+import httpx
+import numpy as np
 
-# Load environment variables
-load_dotenv()
+from config import (
+    ASR_MODEL_NAME,
+    ASR_VAD_MODEL,
+    ASR_VAD_MODEL_REVISION,
+    ASR_PUNC_MODEL,
+    ASR_PUNC_MODEL_REVISION,
+    ASR_SPK_MODEL,
+    ASR_SPK_MODEL_REVISION,
+    ASR_DEVICE,
+    ASR_BACKEND,
+    ASR_ONNX_MODEL,
+    ASR_ONNX_VAD_MODEL,
+    ASR_ONNX_PUNC_MODEL,
+    ASR_ONNX_QUANTIZE,
+    ASR_ONNX_INTRA_OP_THREADS,
+    ASR_BATCH_SIZE_S,
+    ASR_MODEL_REPLICAS,
+    ASR_DIARIZE_DEFAULT,
+    ASR_DIARIZE_PROBE_WINDOWS,
+    ASR_DIARIZE_AUTO_THRESHOLD,
+    LLM_API_URL,
+    LLM_API_KEY,
+    LLM_MODEL_NAME,
+    LLM_CONTEXT_TOKENS,
+    LLM_MAX_PARALLEL,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF_SECONDS,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_TEMPERATURE,
+    LLM_TOP_P,
+    LLM_MAX_TOKENS,
+)
+from asr_pipeline import (
+    SAMPLE_RATE,
+    assign_speakers,
+    first_value,
+    offset_result,
+    plan_batches,
+    plan_chunks,
+    slice_ms,
+    stitch_results,
+)
+from asr_backends import ASR_BACKENDS, load_asr_model
+from diarization import Diarizer
+from audio_decode import decode_to_npy, decoded_path, evict_decoded, open_decoded
+from cache import DiskLRUCache, make_cache_key
+from transcript_format import (
+    TranscriptBuilder,
+    build_segments,
+    format_recognition_result,
+    render_segment,
+    render_srt,
+    render_vtt,
+    segment_speakers,
+)
+from live_transcription import LatencyStats, LiveTranscriptionSession
+from summarization import LLMClient, summarize_transcript
+from task_store import create_task_store
+from hotwords import PROFILE_NAME_PATTERN, HotwordStore
+from inference_pool import InferencePool
+from upload_store import UploadStore
 
-# --- Import FunASR and Starlette Concurrency ---
+# --- Import FunASR ---
 try:
     from funasr import AutoModel
-    from starlette.concurrency import run_in_threadpool
 except ImportError:
-    print("Error: funasr library not found. Please install it using 'pip install funasr starlette'")
-    AutoModel = None
-    run_in_threadpool = None # Mark as unavailable
+    print("Error: funasr library not found. Please install it using 'pip install funasr'")
+    AutoModel = None # Mark as unavailable
+
+try:
+    import librosa
+except ImportError:
+    print("Warning: librosa not found. Chunked long-audio transcription will be disabled.")
+    librosa = None
 
 # --- Configuration from Environment Variables ---
-ASR_MODEL_NAME = os.getenv("ASR_MODEL_NAME", "damo/speech_paraformer-large-vad-punc_asr_nat-zh-cn-16k-common-vocab8404-pytorch")
-ASR_VAD_MODEL = os.getenv("ASR_VAD_MODEL", "fsmn-vad")
-ASR_VAD_MODEL_REVISION = os.getenv("ASR_VAD_MODEL_REVISION", "v2.0.4")
-ASR_PUNC_MODEL = os.getenv("ASR_PUNC_MODEL", "ct-punc")
-ASR_PUNC_MODEL_REVISION = os.getenv("ASR_PUNC_MODEL_REVISION", "v2.0.4")
-ASR_SPK_MODEL = os.getenv("ASR_SPK_MODEL", "cam++")
-ASR_SPK_MODEL_REVISION = os.getenv("ASR_SPK_MODEL_REVISION", "v2.0.2")
-ASR_DEVICE = os.getenv("ASR_DEVICE")
+ASR_INFERENCE_PROCESSES = int(os.getenv("ASR_INFERENCE_PROCESSES", 0))
+ASR_INFERENCE_THREADS = int(os.getenv("ASR_INFERENCE_THREADS", 0))
+ASR_INFERENCE_TIMEOUT_SECONDS = float(os.getenv("ASR_INFERENCE_TIMEOUT_SECONDS", 1800))
+ASR_NUM_WORKERS = int(os.getenv("ASR_NUM_WORKERS", ASR_INFERENCE_PROCESSES or ASR_MODEL_REPLICAS))
+ASR_MAX_QUEUE_SIZE = int(os.getenv("ASR_MAX_QUEUE_SIZE", 16))
+ASR_RETRY_AFTER_SECONDS = int(os.getenv("ASR_RETRY_AFTER_SECONDS", 30))
+ASR_CHUNKING_ENABLED = os.getenv("ASR_CHUNKING_ENABLED", "true").lower() == "true"
+ASR_CHUNK_SECONDS = int(os.getenv("ASR_CHUNK_SECONDS", 600))
+ASR_CHUNK_RETRIES = int(os.getenv("ASR_CHUNK_RETRIES", 1))
+ASR_SPK_MATCH_THRESHOLD = float(os.getenv("ASR_SPK_MATCH_THRESHOLD", 0.6))
+ASR_WORD_TIMESTAMPS = os.getenv("ASR_WORD_TIMESTAMPS", "false").lower() == "true"
+ASR_STREAMING_ENABLED = os.getenv("ASR_STREAMING_ENABLED", "true").lower() == "true"
+ASR_STREAMING_MODEL = os.getenv("ASR_STREAMING_MODEL", "paraformer-zh-streaming")
+ASR_STREAMING_MODEL_REVISION = os.getenv("ASR_STREAMING_MODEL_REVISION", "v2.0.4")
+ASR_WARMUP_ENABLED = os.getenv("ASR_WARMUP_ENABLED", "true").lower() == "true"
+ASR_WARMUP_AUDIO = os.getenv("ASR_WARMUP_AUDIO")
+# false: a deployment without ASR (funasr not installed) still reports ready, e.g. to serve only summarization
+ASR_REQUIRED = os.getenv("ASR_REQUIRED", "true").lower() == "true"
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", 8))
+STREAM_MAX_FRAME_SECONDS = float(os.getenv("STREAM_MAX_FRAME_SECONDS", 10))
+STREAM_MAX_SEGMENT_SECONDS = float(os.getenv("STREAM_MAX_SEGMENT_SECONDS", 30))
+STREAM_METRICS_INTERVAL_SECONDS = float(os.getenv("STREAM_METRICS_INTERVAL_SECONDS", 5))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "data/uploads")
+UPLOAD_RESUMABLE_CHUNK_SIZE = int(os.getenv("UPLOAD_RESUMABLE_CHUNK_SIZE", 8 * 1024 * 1024))
+UPLOAD_RESUMABLE_TTL_SECONDS = float(os.getenv("UPLOAD_RESUMABLE_TTL_SECONDS", 24 * 3600))
+TASK_STORE_BACKEND = os.getenv("TASK_STORE_BACKEND", "sqlite")
+TASK_STORE_PATH = os.getenv("TASK_STORE_PATH", "data/tasks.sqlite3")
+TASK_STORE_TTL_SECONDS = float(os.getenv("TASK_STORE_TTL_SECONDS", 7 * 24 * 3600))
+TASK_STORE_MAX_FINISHED = int(os.getenv("TASK_STORE_MAX_FINISHED", 10000))
+TASK_STORE_ARCHIVE = os.getenv("TASK_STORE_ARCHIVE", "false").lower() == "true"
+TASK_STORE_EVICT_INTERVAL = float(os.getenv("TASK_STORE_EVICT_INTERVAL", 300))
+# Partial transcripts of a running task are written to the task store at most this often
+TASK_PROGRESS_INTERVAL_SECONDS = float(os.getenv("TASK_PROGRESS_INTERVAL_SECONDS", 1.0))
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", 1.0))
+JOB_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("JOB_EVENTS_HEARTBEAT_SECONDS", 15))
+ASR_CACHE_ENABLED = os.getenv("ASR_CACHE_ENABLED", "true").lower() == "true"
+ASR_CACHE_PATH = os.getenv("ASR_CACHE_PATH", "data/asr_cache.sqlite3")
+ASR_CACHE_MAX_BYTES = int(os.getenv("ASR_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+ASR_BATCH_MAX_FILES = int(os.getenv("ASR_BATCH_MAX_FILES", 100))
+# Server-side paths may only be submitted to the batch endpoint from below this directory; unset disables them
+ASR_BATCH_INPUT_DIR = os.getenv("ASR_BATCH_INPUT_DIR")
+ASR_DECODE_ENABLED = os.getenv("ASR_DECODE_ENABLED", "true").lower() == "true"
+ASR_DECODE_WORKERS = int(os.getenv("ASR_DECODE_WORKERS", 2))
+ASR_DECODE_CACHE_DIR = os.getenv("ASR_DECODE_CACHE_DIR", "data/decoded")
+ASR_DECODE_CACHE_MAX_BYTES = int(os.getenv("ASR_DECODE_CACHE_MAX_BYTES", 4 * 1024 * 1024 * 1024))
+ASR_HOTWORD_DIR = os.getenv("ASR_HOTWORD_DIR", "data/hotwords")
+ASR_HOTWORD_MAX_WORDS = int(os.getenv("ASR_HOTWORD_MAX_WORDS", 100))
+# Other LLM endpoints a summarize request may name (comma-separated); the server key is never sent to them
+LLM_ALLOWED_API_URLS = {url.strip().rstrip("/") for url in os.getenv("LLM_ALLOWED_API_URLS", "").split(",") if url.strip()}
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+SUMMARY_MAX_QUEUE_SIZE = int(os.getenv("SUMMARY_MAX_QUEUE_SIZE", 32))
+SUMMARY_NUM_WORKERS = int(os.getenv("SUMMARY_NUM_WORKERS", 4))
 # --- End Configuration ---
 
 # Global variables for models
 asr_model: Optional[AutoModel] = None
+# Pool of loaded model replicas; a model is leased for the duration of one generate call
+model_pool: Optional[asyncio.Queue] = None
+# Standalone VAD and speaker embedding models used to split long audio into chunks and for speaker diarization
+vad_model: Optional[AutoModel] = None
+spk_embedder: Optional[AutoModel] = None
+diarizer: Optional[Diarizer] = None
+vad_lock = threading.Lock()
+spk_lock = threading.Lock()
+# Streaming ASR and standalone punctuation models for live transcription
+streaming_asr_model: Optional[AutoModel] = None
+punc_model: Optional[AutoModel] = None
+streaming_asr_lock = threading.Lock()
+punc_lock = threading.Lock()
+live_sessions: Set[LiveTranscriptionSession] = set()
+asr_queue: Optional["JobQueue"] = None
+# Worker processes decoding uploads to 16 kHz mono float32 .npy files, and the decodes in flight by audio hash
+decode_pool: Optional[ProcessPoolExecutor] = None
+decode_futures: Dict[str, asyncio.Future] = {}
+# Decoded files in use by running jobs (audio hash -> number of jobs), never evicted
+decoded_pins: Dict[str, int] = {}
+# Inference worker processes sharing one copy of the model weights (ASR_INFERENCE_PROCESSES > 0)
+inference_pool: Optional[InferencePool] = None
+worker_tasks: List[asyncio.Task] = []
+# Load state of every model component for /readyz: {"state": pending|loading|ready|failed|disabled, "seconds", "error"}
+model_status: Dict[str, Dict[str, Any]] = {}
+models_loading = False
+startup_seconds: Optional[float] = None
 
-# In-memory storage for tasks
-tasks: Dict[str, Dict[str, Any]] = {}
+# Task records, shared between processes when the SQLite backend is used
+task_store = create_task_store(
+    TASK_STORE_BACKEND,
+    TASK_STORE_PATH,
+    ttl_seconds=TASK_STORE_TTL_SECONDS,
+    max_finished=TASK_STORE_MAX_FINISHED,
+    archive=TASK_STORE_ARCHIVE,
+)
+# Partially received resumable uploads, swept by the eviction loop once abandoned
+upload_store = UploadStore(UPLOAD_DIR, ttl_seconds=UPLOAD_RESUMABLE_TTL_SECONDS)
+# Named hotword profiles and the compiled (normalized, versioned) form of recently used hotword lists
+hotword_store = HotwordStore(ASR_HOTWORD_DIR, max_words=ASR_HOTWORD_MAX_WORDS)
+# Raw FunASR results keyed by audio content hash plus ASR configuration
+asr_cache: Optional[DiskLRUCache] = (
+    DiskLRUCache(ASR_CACHE_PATH, max_bytes=ASR_CACHE_MAX_BYTES) if ASR_CACHE_ENABLED else None
+)
+# Task updates posted by synchronous progress callbacks and not written yet, merged per task
+pending_task_updates: Dict[str, Dict[str, Any]] = {}
+task_update_writers: Set[asyncio.Task] = set()
+# Keep the writes of each task in order; a task's lock is dropped once no update holds it
+task_update_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+# LLM answers keyed by model, prompt hash and sampling parameters
+llm_cache: Optional[DiskLRUCache] = (
+    DiskLRUCache(LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_BYTES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+    if LLM_CACHE_ENABLED else None
+)
+# Pooled async LLM client and queue for summarization jobs, created on startup
+llm_client: Optional[LLMClient] = None
+summary_queue: Optional["JobQueue"] = None
+# Event-stream subscribers waiting for updates of a task, woken by update_task()
+task_subscribers: Dict[str, Set[asyncio.Event]] = {}
+# Identifies the process that owns a task, used to detect jobs orphaned by a restart
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
 # --- Pydantic Models (Updated) ---
 class ProcessAudioResponse(BaseModel):
     task_id: str
     status: str
     detail: str = "Processing started."
+    queue_position: Optional[int] = None
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0)
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$", description="Hex SHA-256 of the whole file, checked on finalize")
+
+class UploadStatusResponse(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    received_bytes: int
+    missing: List[List[int]] = Field(default_factory=list, description="[start, end) byte ranges not received yet")
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    entries: int = 0
+    size_bytes: int = 0
+    max_bytes: int = 0
+
+class ComponentStatus(BaseModel):
+    state: str
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    loading: bool
+    startup_seconds: Optional[float] = None
+    components: Dict[str, ComponentStatus] = Field(default_factory=dict)
 
 class TaskStatusResponse(BaseModel):
     task_id: str
     status: str
     transcription: Optional[str] = None
     error: Optional[str] = None
+    queue_position: Optional[int] = None
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    asr_seconds: Optional[float] = None
+    cache_hit: Optional[bool] = None
+    progress: Optional[float] = None
+    duration: Optional[float] = None
+    segments: Optional[List[str]] = None
+    next_cursor: Optional[int] = None
+    # Changes when the published segments are replaced by their diarized version; re-read them from cursor 0
+    segments_revision: Optional[int] = None
+    summary: Optional[str] = None
+    summary_timings: Optional[Dict[str, Any]] = None
+    batch_task_id: Optional[str] = None
+    file_tasks: Optional[List[str]] = None
+    batch_stats: Optional[Dict[str, Any]] = None
+    # {"mode", "speakers", "skipped", "seconds"}, or {"mode", "error"} when diarization failed
+    diarization: Optional[Dict[str, Any]] = None
+    # {"profile", "version", "count"} of the hotwords the task was transcribed with
+    hotwords: Optional[Dict[str, Any]] = None
+
+class BatchFileTask(BaseModel):
+    filename: str
+    task_id: str
+    status: str
+    detail: str = ""
+
+class BatchTranscribeResponse(BaseModel):
+    batch_task_id: str
+    status: str
+    queue_position: Optional[int] = None
+    tasks: List[BatchFileTask]
+
+class MeetingInfo(BaseModel):
+    topic: str = ""
+    date: datetime.date = Field(default_factory=datetime.date.today)
+    time: datetime.time = Field(default_factory=lambda: datetime.datetime.now().time())
+    location: str = ""
 
-def format_recognition_result(res) -> tuple[str, Set[str]]:
+class LLMConfig(BaseModel):
+    # Unset fields fall back to the server's LLM_* settings
+    api_url: Optional[str] = None
+    api_key: Optional[str] = None
+    model_name: Optional[str] = None
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+class SummarizeRequest(BaseModel):
+    transcript: str
+    meeting_info: MeetingInfo = Field(default_factory=MeetingInfo)
+    lang: str = Field("zh", pattern="^(zh|en)$")
+    llm: LLMConfig = Field(default_factory=LLMConfig)
+    # Ignore cached LLM answers and generate new minutes (the new answers replace the cached ones)
+    regenerate: bool = False
+
+class HotwordProfileRequest(BaseModel):
+    hotwords: List[str]
+
+class HotwordProfileResponse(BaseModel):
+    name: str
+    version: str
+    count: int
+    hotwords: List[str] = []
+
+class TranscriptSegment(BaseModel):
+    speaker: Any
+    start: float
+    end: float
+    text: str
+    # [start, end, word] triples, present when ASR_WORD_TIMESTAMPS is enabled
+    words: Optional[List[List[Any]]] = None
+
+class TranscriptResponse(BaseModel):
+    task_id: str
+    status: str
+    error: Optional[str] = None
+    progress: Optional[float] = None
+    duration: Optional[float] = None
+    speakers: List[Any] = []
+    segments: List[TranscriptSegment] = []
+    next_cursor: int = 0
+    segments_revision: int = 0
+
+
+# --- Task Updates ---
+async def update_task(task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
     """
-    扁平化所有 sentence_info，然后按时间顺序合并同一说话人连续句子，
-    并且不输出“语音识别结果：”标题，直接以“说话人 X [start-end]: 文本”开头。
+    Update a task record and wake any event-stream subscribers in this process.
+    The store is written in a worker thread, so a slow or locked store does not
+    block the event loop; the updates of one task are written in order.
     """
-    all_speakers = set()
-    if not res:
-        return "No transcription results were returned.", all_speakers
+    lock = task_update_locks.get(task_id)
+    if lock is None:
+        lock = task_update_locks[task_id] = asyncio.Lock()
+    async with lock:
+        # Posted updates not written yet go first, so they cannot overwrite this one later
+        fields = {**pending_task_updates.pop(task_id, {}), **fields}
+        if not fields:
+            return None
+        record = await asyncio.to_thread(task_store.update, task_id, **fields)
+    for event in task_subscribers.get(task_id, ()):
+        event.set()
+    return record
 
-    sentences = []
-    for item in res:
-        sentences.extend(item.get("sentence_info", []))
 
-    formatted_output = []
-    current_speaker = None
-    buffer_text: list[str] = []
-    buf_start = buf_end = 0.0
+def post_task_update(task_id: str, fields: Dict[str, Any], delay: float = 0.0) -> None:
+    """
+    Update a task from a synchronous callback on the event loop, without waiting for
+    the write. Updates posted before the write starts are merged into one, and delay
+    holds the write back, so frequent progress reports coalesce into few writes.
+    """
+    pending = pending_task_updates.get(task_id)
+    if pending is not None:
+        pending.update(fields)
+        return
+    pending_task_updates[task_id] = dict(fields)
 
-    for sent in sentences:
-        spk = sent.get("spk", "未知")
-        txt = sent.get("text", "").strip()
-        start_ms = sent.get("start")
-        end_ms   = sent.get("end")
-        if txt == "" or start_ms is None or end_ms is None:
-            continue
-        start_s = start_ms / 1000
-        end_s   = end_ms   / 1000
-        all_speakers.add(spk)
+    async def write():
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await update_task(task_id)
+        except Exception as e:
+            print(f"[{task_id}] Failed to update task: {e}")
 
-        if spk == current_speaker:
-            buffer_text.append(txt)
-            buf_end = end_s
-        else:
-            if buffer_text:
-                formatted_output.append(
-                    f"说话人 {current_speaker} [{buf_start:.2f}s - {buf_end:.2f}s]: "
-                    + " ".join(buffer_text)
-                )
-            current_speaker = spk
-            buffer_text = [txt]
-            buf_start = start_s
-            buf_end   = end_s
-
-    if buffer_text:
-        formatted_output.append(
-            f"说话人 {current_speaker} [{buf_start:.2f}s - {buf_end:.2f}s]: "
-            + " ".join(buffer_text)
+    writer = asyncio.create_task(write())
+    task_update_writers.add(writer)
+    writer.add_done_callback(task_update_writers.discard)
+
+
+# --- Job Scheduling ---
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Bounded priority queue for background jobs. Lower priority values are served first,
+    jobs with equal priority are served in submission (FIFO) order.
+    """
+
+    def __init__(self, maxsize: int, name: str = "ASR"):
+        self.maxsize = maxsize
+        self.name = name
+        self._heap: list[tuple[int, int, str, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._not_empty = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def full(self) -> bool:
+        return self.maxsize > 0 and len(self._heap) >= self.maxsize
+
+    def put_nowait(self, task_id: str, job: Dict[str, Any], priority: int = 0) -> int:
+        if self.full():
+            raise QueueFullError(f"{self.name} queue is full ({self.maxsize} jobs waiting).")
+        heapq.heappush(self._heap, (priority, next(self._counter), task_id, job))
+        asyncio.get_running_loop().create_task(self._notify())
+        return self.position(task_id)
+
+    async def _notify(self):
+        async with self._not_empty:
+            self._not_empty.notify()
+
+    async def get(self) -> tuple[str, Dict[str, Any]]:
+        async with self._not_empty:
+            while not self._heap:
+                await self._not_empty.wait()
+            _, _, task_id, job = heapq.heappop(self._heap)
+            return task_id, job
+
+    def position(self, task_id: str) -> Optional[int]:
+        """1-based position of a waiting job, or None if it is not queued."""
+        for index, entry in enumerate(sorted(self._heap)):
+            if entry[2] == task_id:
+                return index + 1
+        return None
+
+
+# --- Upload Handling ---
+class UploadTooLargeError(Exception):
+    pass
+
+
+async def save_upload_to_disk(file: UploadFile, suffix: str) -> tuple[str, int, str]:
+    """
+    Stream an upload to a temporary file in UPLOAD_CHUNK_SIZE pieces, enforcing
+    UPLOAD_MAX_BYTES and hashing the content on the fly.
+    Returns (temp_file_path, size_in_bytes, sha256_hex).
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    try:
+        with tmp_file:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if UPLOAD_MAX_BYTES > 0 and size > UPLOAD_MAX_BYTES:
+                    raise UploadTooLargeError(
+                        f"Upload exceeds the maximum allowed size of {UPLOAD_MAX_BYTES} bytes."
+                    )
+                sha256.update(chunk)
+                await asyncio.to_thread(tmp_file.write, chunk)
+    except BaseException:
+        os.remove(tmp_file.name)
+        raise
+    return tmp_file.name, size, sha256.hexdigest()
+
+
+def file_sha256(path: str) -> tuple[int, str]:
+    """Size and SHA-256 of a file on disk, read in UPLOAD_CHUNK_SIZE pieces."""
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            sha256.update(chunk)
+    return size, sha256.hexdigest()
+
+
+def resolve_batch_input(path: str) -> str:
+    """Resolve a server-side batch input path, which must be a file below ASR_BATCH_INPUT_DIR."""
+    if not ASR_BATCH_INPUT_DIR:
+        raise ValueError("Server-side paths are disabled (ASR_BATCH_INPUT_DIR is not set).")
+    root = os.path.realpath(ASR_BATCH_INPUT_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root or not os.path.isfile(resolved):
+        raise ValueError(f"Not a file inside ASR_BATCH_INPUT_DIR: {path}")
+    return resolved
+
+
+# --- Transcription Cache ---
+def asr_cache_key(audio_sha256: str, hotwords: Optional[Dict[str, Any]] = None, diarize: str = ASR_DIARIZE_DEFAULT) -> str:
+    """
+    Cache key covering everything that influences the raw FunASR output. Hotwords
+    enter through their version, which changes whenever a profile is edited.
+    """
+    diarization = {"diarize": diarize}
+    if diarize != "false":
+        diarization.update(spk_model=ASR_SPK_MODEL, spk_model_revision=ASR_SPK_MODEL_REVISION)
+    if diarize == "auto":
+        diarization.update(probe_windows=ASR_DIARIZE_PROBE_WINDOWS, auto_threshold=ASR_DIARIZE_AUTO_THRESHOLD)
+    backend = {}
+    if ASR_BACKEND == "onnx":
+        backend = {
+            "backend": ASR_BACKEND,
+            "onnx_models": [ASR_ONNX_MODEL, ASR_ONNX_VAD_MODEL, ASR_ONNX_PUNC_MODEL],
+            "quantize": ASR_ONNX_QUANTIZE,
+        }
+    return make_cache_key(
+        audio_sha256,
+        {
+            **backend,
+            **diarization,
+            "model": ASR_MODEL_NAME,
+            "vad_model": ASR_VAD_MODEL,
+            "vad_model_revision": ASR_VAD_MODEL_REVISION,
+            "punc_model": ASR_PUNC_MODEL,
+            "punc_model_revision": ASR_PUNC_MODEL_REVISION,
+            "batch_size_s": ASR_BATCH_SIZE_S,
+            "chunk_seconds": ASR_CHUNK_SECONDS if ASR_CHUNKING_ENABLED else None,
+            "predecoded": ASR_DECODE_ENABLED,
+            "hotwords": hotwords["version"] if hotwords else None,
+        },
+    )
+
+
+# --- Hotwords ---
+async def resolve_hotwords(profile: Optional[str], words: List[str]) -> Optional[Dict[str, Any]]:
+    """Compiled hotwords of a request (profile and/or ad-hoc words), or None; 404/400 for unknown profiles and invalid lists."""
+    try:
+        return await asyncio.to_thread(hotword_store.resolve, profile, words)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Hotword profile not found: {profile}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def hotword_fields(hotwords: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """What a task records about its hotwords; the words themselves stay in the job."""
+    if not hotwords:
+        return None
+    return {"profile": hotwords["profile"], "version": hotwords["version"], "count": hotwords["count"]}
+
+
+def hotword_argument(hotwords: Optional[Dict[str, Any]]) -> str:
+    """The hotword argument of FunASR's generate(): the hotwords separated by spaces."""
+    return " ".join(hotwords["words"]) if hotwords else ''
+
+
+async def finish_transcription(task_id: str, asr_res, replace_segments: bool = False) -> str:
+    """
+    Store the formatted transcript and segments of asr_res and complete the task.
+    replace_segments marks the segments as replacing the ones published while the
+    task ran, which were not diarized yet.
+    """
+    await update_task(task_id, status="FORMATTING_TRANSCRIPTION")
+    if not asr_res:
+         transcription = "Transcription result is empty or invalid."
+         print(f"[{task_id}] funasr returned empty result.")
+    else:
+        transcription, speakers = format_recognition_result(asr_res)
+        print(f"[{task_id}] Formatted transcription generated.")
+    fields: Dict[str, Any] = {"segments_revision": 1} if replace_segments else {}
+    await update_task(
+        task_id,
+        transcription=transcription,
+        segments=build_segments(asr_res, words=ASR_WORD_TIMESTAMPS),
+        progress=1.0,
+        status="COMPLETED",
+        **fields,
+    )
+    return transcription
+
+
+async def create_audio_task(
+    task_id: str,
+    audio_path: str,
+    file_size: int,
+    audio_sha256: str,
+    delete_file: bool = True,
+    diarize: str = ASR_DIARIZE_DEFAULT,
+    hotwords: Optional[Dict[str, Any]] = None,
+    **fields: Any,
+) -> bool:
+    """
+    Create the task for an audio file on disk and complete it right away if the
+    ASR cache has its result. Returns True on a cache hit. With delete_file=False
+    (server-side batch inputs) the file is never removed.
+    """
+    await asyncio.to_thread(
+        task_store.create,
+        task_id,
+        status="SAVED_FILE",
+        transcription=None,
+        error=None,
+        temp_file=audio_path if delete_file else None,
+        file_size=file_size,
+        audio_sha256=audio_sha256,
+        hotwords=hotword_fields(hotwords),
+        owner=PROCESS_ID,
+        **fields,
+    )
+
+    cache_key = asr_cache_key(audio_sha256, hotwords=hotwords, diarize=diarize)
+    cached_res = await asyncio.to_thread(asr_cache.get, cache_key) if asr_cache is not None else None
+    if cached_res is None:
+        return False
+    if delete_file:
+        os.remove(audio_path)
+    await update_task(task_id, temp_file=None, cache_hit=True)
+    await finish_transcription(task_id, cached_res)
+    print(f"[{task_id}] Served from ASR cache (sha256 {audio_sha256[:12]}).")
+    return True
+
+
+async def enqueue_saved_audio(
+    task_id: str,
+    temp_file_path: str,
+    file_size: int,
+    audio_sha256: str,
+    original_filename: str,
+    priority: int = 0,
+    diarize: str = ASR_DIARIZE_DEFAULT,
+    hotwords: Optional[Dict[str, Any]] = None,
+) -> ProcessAudioResponse:
+    """
+    Create the task for an audio file saved to disk and either serve it from the
+    ASR cache or queue it. Raises QueueFullError if the queue filled up meanwhile.
+    """
+    if await create_audio_task(task_id, temp_file_path, file_size, audio_sha256, diarize=diarize, hotwords=hotwords):
+        return ProcessAudioResponse(task_id=task_id, status="COMPLETED", detail="Served from transcription cache.")
+
+    job = {
+        "temp_file_path": temp_file_path,
+        "original_filename": original_filename,
+        "cache_key": asr_cache_key(audio_sha256, hotwords=hotwords, diarize=diarize),
+        "audio_sha256": audio_sha256,
+        "diarize": diarize,
+        "hotword": hotword_argument(hotwords),
+    }
+    queue_position = asr_queue.put_nowait(task_id, job, priority=priority)
+    start_decode(audio_sha256, temp_file_path)
+    task = await update_task(task_id, status="QUEUED")
+    print(f"[{task_id}] Saved {file_size} bytes (sha256 {audio_sha256[:12]}) to {temp_file_path}. Queued at position {queue_position}.")
+    return ProcessAudioResponse(
+        task_id=task_id,
+        status=task["status"],
+        detail="Queued for processing.",
+        queue_position=queue_position,
+    )
+
+
+class PartialResultPublisher:
+    """
+    Publishes merged transcript segments and progress of a running task as chunks finish.
+    Segments are published without speakers while diarization is pending; the
+    task's final segments then replace them (see finish_transcription).
+    Updates are posted, not awaited, and written at most every TASK_PROGRESS_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.builder = TranscriptBuilder(words=ASR_WORD_TIMESTAMPS)
+        self.segments: List[Dict[str, Any]] = []
+
+    def __call__(self, chunk_res, processed_ms: int, total_ms: int):
+        fields: Dict[str, Any] = {
+            "progress": min(processed_ms / total_ms, 1.0) if total_ms else 0.0,
+            "duration": total_ms / 1000,
+        }
+        if chunk_res is not None:
+            closed = self.builder.feed(chunk_res)
+            if closed:
+                self.segments.extend(closed)
+                # A copy, as the list keeps growing while the write is pending
+                fields["segments"] = list(self.segments)
+        post_task_update(self.task_id, fields, delay=TASK_PROGRESS_INTERVAL_SECONDS)
+
+
+# --- Audio Decoding ---
+def start_decode(audio_sha256: str, audio_path: str) -> Optional[asyncio.Future]:
+    """
+    Start decoding an audio file into the decoded-audio cache on the process pool,
+    unless it is cached already or being decoded. Called when a job is queued, so
+    decoding overlaps with inference of the jobs ahead of it.
+    """
+    if decode_pool is None:
+        return None
+    future = decode_futures.get(audio_sha256)
+    if future is None:
+        path = decoded_path(ASR_DECODE_CACHE_DIR, audio_sha256)
+        if os.path.exists(path):
+            return None
+        future = asyncio.get_running_loop().run_in_executor(decode_pool, decode_to_npy, audio_path, path)
+        decode_futures[audio_sha256] = future
+
+        def forget(done: asyncio.Future):
+            decode_futures.pop(audio_sha256, None)
+            # Retrieve the exception so it is not logged as unhandled; the task waiting for it reports it
+            if not done.cancelled():
+                done.exception()
+
+        future.add_done_callback(forget)
+    return future
+
+
+@contextlib.contextmanager
+def pin_decoded(audio_sha256s: List[Optional[str]]):
+    """Keep the decoded files of these audio hashes from being evicted while a job uses them."""
+    audio_sha256s = [audio_sha256 for audio_sha256 in audio_sha256s if audio_sha256]
+    for audio_sha256 in audio_sha256s:
+        decoded_pins[audio_sha256] = decoded_pins.get(audio_sha256, 0) + 1
+    try:
+        yield
+    finally:
+        for audio_sha256 in audio_sha256s:
+            decoded_pins[audio_sha256] -= 1
+            if not decoded_pins[audio_sha256]:
+                del decoded_pins[audio_sha256]
+
+
+async def load_decoded_audio(task_id: str, audio_sha256: Optional[str], audio_path: str):
+    """
+    Memory-mapped 16 kHz mono float32 samples of the audio from the decoded-audio
+    cache, decoding it first if needed. Returns None when decoding is disabled or
+    fails, in which case FunASR decodes the file itself. The caller must hold
+    pin_decoded() for the audio for as long as it uses the samples.
+    """
+    if decode_pool is None or not audio_sha256:
+        return None
+    try:
+        future = start_decode(audio_sha256, audio_path)
+        if future is not None:
+            wait_start = time.time()
+            await future
+            print(f"[{task_id}] Waited {time.time() - wait_start:.1f}s for audio decoding.")
+        audio = await asyncio.to_thread(open_decoded, decoded_path(ASR_DECODE_CACHE_DIR, audio_sha256))
+        keep = {decoded_path(ASR_DECODE_CACHE_DIR, pinned) for pinned in decoded_pins}
+        await asyncio.to_thread(evict_decoded, ASR_DECODE_CACHE_DIR, ASR_DECODE_CACHE_MAX_BYTES, keep)
+        return audio
+    except Exception as e:
+        print(f"[{task_id}] Audio decoding failed ({e}), passing the file to FunASR instead.")
+        return None
+
+
+# --- ASR Pipeline ---
+@contextlib.asynccontextmanager
+async def lease_model():
+    model = await model_pool.get()
+    try:
+        yield model
+    finally:
+        model_pool.put_nowait(model)
+
+
+async def transcribe_single_pass(audio_input, hotword: str = ''):
+    async with lease_model() as model:
+        return await asyncio.to_thread(
+            model.generate,
+            input=audio_input,
+            batch_size_s=ASR_BATCH_SIZE_S,
+            hotword=hotword,
+            # Sentence-level results without a speaker model; speakers come from the diarization stage
+            sentence_timestamp=True,
         )
 
-    return "\n".join(formatted_output), all_speakers
+
+def chunking_available() -> bool:
+    return ASR_CHUNKING_ENABLED and librosa is not None and vad_model is not None
+
+
+def load_audio(audio_path: str):
+    audio, _ = librosa.load(audio_path, sr=SAMPLE_RATE, mono=True)
+    return audio
+
+
+def detect_speech(audio) -> list:
+    with vad_lock:
+        vad_res = vad_model.generate(input=audio, fs=SAMPLE_RATE)
+    return first_value(vad_res, "value", [])
+
+
+async def transcribe_chunked(
+    task_id: str,
+    audio_input,
+    original_filename: str,
+    on_progress: Optional[Callable[[Optional[list], int, int], None]] = None,
+    hotword: str = '',
+    speech: Optional[Awaitable[list]] = None,
+):
+    """
+    VAD-split long audio into chunks, transcribe the chunks concurrently on the
+    model pool, then stitch them in order with global timestamps.
+    audio_input is a file path or already decoded 16 kHz mono samples; speech,
+    when given, resolves to its VAD segments, so they are not detected again.
+    Audio that fits in one chunk goes through the plain single-pass path.
+    on_progress(chunk_res, processed_ms, total_ms) is called whenever a chunk
+    finishes; chunk_res is set for each chunk that becomes final in time order.
+    """
+    if isinstance(audio_input, str):
+        duration_s = await asyncio.to_thread(librosa.get_duration, path=audio_input)
+    else:
+        duration_s = len(audio_input) / SAMPLE_RATE
+    if duration_s <= ASR_CHUNK_SECONDS:
+        return await transcribe_single_pass(audio_input, hotword)
+
+    audio = await asyncio.to_thread(load_audio, audio_input) if isinstance(audio_input, str) else audio_input
+    total_ms = len(audio) * 1000 // SAMPLE_RATE
+    speech_segments = await speech if speech is not None else await asyncio.to_thread(detect_speech, audio)
+    chunks = plan_chunks(speech_segments, total_ms, ASR_CHUNK_SECONDS * 1000)
+    if len(chunks) == 1:
+        return await transcribe_single_pass(audio_input, hotword)
+    print(f"[{task_id}] Split {duration_s:.0f}s of audio into {len(chunks)} chunks.")
+
+    async def run_chunk(index: int, start_ms: int, end_ms: int):
+        for attempt in range(ASR_CHUNK_RETRIES + 1):
+            try:
+                res = await transcribe_single_pass(slice_ms(audio, start_ms, end_ms), hotword)
+                return index, offset_result(res or [], start_ms)
+            except Exception as e:
+                if attempt == ASR_CHUNK_RETRIES:
+                    raise
+                print(f"[{task_id}] Chunk {index} failed ({e}), retrying...")
+
+    results: list = [None] * len(chunks)
+    next_index = 0
+    processed_ms = 0
+    if on_progress is not None:
+        on_progress(None, 0, total_ms)
+    pending = [asyncio.create_task(run_chunk(i, start, end)) for i, (start, end) in enumerate(chunks)]
+    try:
+        for finished in asyncio.as_completed(pending):
+            index, res = await finished
+            results[index] = res
+            processed_ms += chunks[index][1] - chunks[index][0]
+            released = False
+            # Chunks are released strictly in time order
+            while next_index < len(chunks) and results[next_index] is not None:
+                chunk_res = results[next_index]
+                next_index += 1
+                released = True
+                if on_progress is not None:
+                    on_progress(chunk_res, processed_ms, total_ms)
+            if not released and on_progress is not None:
+                on_progress(None, processed_ms, total_ms)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+
+    return stitch_results(results, key=os.path.splitext(original_filename or "audio")[0])
+
+
+async def run_asr(
+    task_id: str,
+    audio_path: str,
+    original_filename: str,
+    on_progress=None,
+    audio_sha256: Optional[str] = None,
+    diarize: str = "false",
+    hotword: str = '',
+):
+    """
+    Transcribe a recording, diarizing it concurrently when requested. Returns the
+    result and whether it is complete; a result whose requested diarization failed
+    is returned without speakers and must not be cached.
+    """
+    with pin_decoded([audio_sha256]):
+        # Decoded samples are memory-mapped, so the model, chunk retries and chunk slices all share one buffer
+        audio = await load_decoded_audio(task_id, audio_sha256, audio_path)
+        audio_input = audio if audio is not None else audio_path
+        speech = None
+        if chunking_available() and diarization_requested(diarize):
+            # Chunking and diarization share one decode and one VAD pass
+            if audio is None:
+                audio_input = await asyncio.to_thread(load_audio, audio_path)
+            speech = asyncio.create_task(asyncio.to_thread(detect_speech, audio_input))
+        diarization = start_diarization(audio_input, diarize, speech)
+        try:
+            if chunking_available():
+                asr_res = await transcribe_chunked(
+                    task_id, audio_input, original_filename, on_progress=on_progress, hotword=hotword, speech=speech
+                )
+            else:
+                asr_res = await transcribe_single_pass(audio_input, hotword)
+        except BaseException:
+            if diarization is not None:
+                diarization.cancel()
+            if speech is not None:
+                speech.cancel()
+            raise
+        return asr_res, await apply_diarization(task_id, diarize, diarization, asr_res)
+
+
+# --- Speaker Diarization ---
+def diarization_available() -> bool:
+    return diarizer is not None
+
+
+def diarization_requested(diarize: str) -> bool:
+    return diarize != "false" and diarization_available()
+
+
+def diarize_audio(audio_input, mode: str, speech: Optional[list] = None) -> Dict[str, Any]:
+    """Speaker turns of a recording (file path or samples); speech are its VAD segments, if known."""
+    audio = load_audio(audio_input) if isinstance(audio_input, str) else audio_input
+    return diarizer.diarize(audio, mode, speech)
+
+
+def start_diarization(audio_input, diarize: str, speech: Optional[Awaitable[list]] = None) -> Optional[asyncio.Task]:
+    """
+    Start diarizing in the thread pool, alongside ASR and punctuation; None when not
+    requested or not available. speech resolves to VAD segments shared with ASR.
+    """
+    if not diarization_requested(diarize):
+        return None
+
+    async def run():
+        started = time.perf_counter()
+        segments = await speech if speech is not None else None
+        result = await asyncio.to_thread(diarize_audio, audio_input, diarize, segments)
+        result["seconds"] = round(time.perf_counter() - started, 2)
+        return result
+
+    return asyncio.create_task(run())
+
+
+async def apply_diarization(task_id: str, diarize: str, diarization: Optional[asyncio.Task], asr_res) -> bool:
+    """
+    Wait for the diarization started by start_diarization and label the sentences
+    of asr_res with its speakers. Returns False when diarization was requested but
+    could not be done; the transcript then has no speakers.
+    """
+    if diarize == "false":
+        return True
+    if diarization is None:
+        await update_task(task_id, diarization={"mode": diarize, "error": "Speaker diarization models are not available."})
+        print(f"[{task_id}] Speaker diarization is not available, the transcript has no speakers.")
+        return False
+    try:
+        result = await diarization
+    except Exception as e:
+        await update_task(task_id, diarization={"mode": diarize, "error": str(e)})
+        print(f"[{task_id}] Speaker diarization failed, the transcript has no speakers: {e}")
+        return False
+    assign_speakers(asr_res or [], result.pop("turns"))
+    await update_task(task_id, diarization={"mode": diarize, **result})
+    print(
+        f"[{task_id}] Diarized {result['speakers']} speaker(s) in {result['seconds']:.1f}s"
+        f"{' (single speaker, clustering skipped)' if result['skipped'] else ''}."
+    )
+    return True
+
 
 # --- Background Task Function ---
-async def async_process_audio_task(task_id: str, temp_file_path: str, original_filename: str):
-    tasks[task_id]["status"] = "PROCESSING"
-    transcription = None
+async def store_transcription(task_id: str, cache_key: Optional[str], asr_res, replace_segments: bool = False) -> str:
+    if asr_cache is not None and cache_key and asr_res:
+        try:
+            await asyncio.to_thread(asr_cache.set, cache_key, asr_res)
+        except Exception as e:
+            print(f"[{task_id}] Failed to store ASR result in cache: {e}")
+    return await finish_transcription(task_id, asr_res, replace_segments=replace_segments)
+
+
+async def remove_temp_file(task_id: str, temp_file_path: str) -> None:
+    if os.path.exists(temp_file_path):
+        try:
+            os.remove(temp_file_path)
+            print(f"[{task_id}] Cleaned up temporary file: {temp_file_path}")
+        except OSError as e:
+            print(f"[{task_id}] Error removing temporary file {temp_file_path}: {e}")
+    await update_task(task_id, temp_file=None)
+
+
+async def async_process_audio_task(
+    task_id: str,
+    temp_file_path: str,
+    original_filename: str,
+    cache_key: Optional[str] = None,
+    audio_sha256: Optional[str] = None,
+    delete_file: bool = True,
+    diarize: str = ASR_DIARIZE_DEFAULT,
+    hotword: str = '',
+):
+    await update_task(task_id, status="PROCESSING", started_at=time.time(), progress=0.0)
     error = None
 
     try:
-        if asr_model is None or run_in_threadpool is None:
-             raise RuntimeError("ASR model or thread pool executor is not available.")
+        if model_pool is None:
+             raise RuntimeError("ASR model is not available.")
 
         print(f"[{task_id}] Starting ASR for '{original_filename}'...")
-        asr_res = await run_in_threadpool(
-            asr_model.generate,
-            input=temp_file_path,
-            batch_size_s=300,
-            hotword=''
+        asr_start = time.time()
+        publisher = PartialResultPublisher(task_id)
+        asr_res, complete = await run_asr(
+            task_id,
+            temp_file_path,
+            original_filename,
+            on_progress=publisher,
+            audio_sha256=audio_sha256,
+            diarize=diarize,
+            hotword=hotword,
         )
-        print(f"[{task_id}] ASR completed.")
-
-        tasks[task_id]["status"] = "FORMATTING_TRANSCRIPTION"
-        if not asr_res:
-             transcription = "Transcription result is empty or invalid."
-             print(f"[{task_id}] funasr returned empty result.")
-        else:
-            transcription, speakers = format_recognition_result(asr_res)
-            print(f"[{task_id}] Formatted transcription generated.")
+        asr_seconds = time.time() - asr_start
+        print(f"[{task_id}] ASR completed in {asr_seconds:.1f}s.")
+        await update_task(task_id, asr_seconds=asr_seconds)
 
-        tasks[task_id]["transcription"] = transcription
-        tasks[task_id]["status"] = "COMPLETED"
+        # Segments published while chunks finished had no speakers yet
+        replace_segments = bool(publisher.segments) and diarization_requested(diarize)
+        await store_transcription(task_id, cache_key if complete else None, asr_res, replace_segments=replace_segments)
         print(f"[{task_id}] Task completed successfully (Transcription Ready).")
 
     except Exception as e:
         error = f"Error during ASR transcription: {e}"
-        tasks[task_id]["status"] = "FAILED"
-        tasks[task_id]["error"] = error
-        if 'transcription' not in tasks[task_id]:
-             tasks[task_id]['transcription'] = "Transcription failed."
+        await update_task(task_id, status="FAILED", error=error)
         print(f"[{task_id}] Task failed with error: {error}")
 
     finally:
-        if os.path.exists(temp_file_path):
+        if delete_file:
+            await remove_temp_file(task_id, temp_file_path)
+
+
+async def asr_worker(worker_id: int):
+    """Pull jobs from the ASR queue and run them; model replicas are leased per generate call."""
+    print(f"ASR worker {worker_id} started.")
+    while True:
+        task_id, job = await asr_queue.get()
+        try:
+            print(f"[{task_id}] Picked up by ASR worker {worker_id}.")
+            if job.get("kind") == "batch":
+                await async_process_batch_task(task_id, job)
+                continue
+            await async_process_audio_task(
+                task_id,
+                job["temp_file_path"],
+                job["original_filename"],
+                cache_key=job.get("cache_key"),
+                audio_sha256=job.get("audio_sha256"),
+                diarize=job.get("diarize", ASR_DIARIZE_DEFAULT),
+                hotword=job.get("hotword", ''),
+            )
+        except Exception as e:
+            print(f"[{task_id}] ASR worker {worker_id} crashed while processing: {e}")
+
+
+# --- Batch Transcription ---
+async def audio_duration(audio, audio_path: str) -> Optional[float]:
+    if audio is not None:
+        return len(audio) / SAMPLE_RATE
+    if librosa is None:
+        return None
+    try:
+        return await asyncio.to_thread(librosa.get_duration, path=audio_path)
+    except Exception:
+        return None
+
+
+async def transcribe_batch(inputs: list, hotword: str = '') -> list:
+    """Transcribe several inputs with one generate call on one model replica; one result list per input."""
+    async with lease_model() as model:
+        res = await asyncio.to_thread(
+            model.generate, input=inputs, batch_size_s=ASR_BATCH_SIZE_S, hotword=hotword, sentence_timestamp=True
+        )
+    if not res or len(res) != len(inputs):
+        raise RuntimeError(f"expected {len(inputs)} results, got {len(res or [])}")
+    return [[item] for item in res]
+
+
+async def async_process_batch_task(batch_id: str, job: Dict[str, Any]):
+    """
+    Transcribe the files of a batch job. Files no longer than ASR_BATCH_SIZE_S are
+    grouped into length-bucketed batches of at most ASR_BATCH_SIZE_S seconds, one
+    generate call each; longer files (and files whose duration is unknown) take the
+    regular single-file path, including chunking. Batches and long files run
+    concurrently on the model pool. Per-file tasks are completed as their batch
+    finishes; the batch task tracks progress and ends with throughput statistics.
+    """
+    items = job["items"]
+    # One hotword list for the whole batch, so every bucket can share a generate call
+    hotword = job.get("hotword", '')
+    start = time.time()
+    await update_task(batch_id, status="PROCESSING", started_at=start, progress=0.0)
+    counts = {"completed": 0, "failed": 0}
+    audio_seconds = 0.0
+
+    async def file_finished(task_id: str, duration: Optional[float]):
+        nonlocal audio_seconds
+        task = await asyncio.to_thread(task_store.get, task_id) or {}
+        counts["completed" if task.get("status") == "COMPLETED" else "failed"] += 1
+        audio_seconds += duration or task.get("duration") or 0.0
+        await update_task(batch_id, progress=(counts["completed"] + counts["failed"]) / len(items))
+
+    async def run_single(item: Dict[str, Any], duration: Optional[float]):
+        await async_process_audio_task(
+            item["task_id"],
+            item["temp_file_path"],
+            item["original_filename"],
+            cache_key=item["cache_key"],
+            audio_sha256=item["audio_sha256"],
+            delete_file=item["delete_file"],
+            diarize=item["diarize"],
+            hotword=hotword,
+        )
+        await file_finished(item["task_id"], duration)
+
+    async def run_bucket(bucket: List[int]):
+        bucket_start = time.time()
+        for index in bucket:
+            await update_task(items[index]["task_id"], status="PROCESSING", started_at=bucket_start, progress=0.0, duration=durations[index])
+        inputs = [audios[index] if audios[index] is not None else items[index]["temp_file_path"] for index in bucket]
+        diarizations = [start_diarization(audio_input, items[index]["diarize"]) for index, audio_input in zip(bucket, inputs)]
+        try:
+            results = await transcribe_batch(inputs, hotword)
+        except Exception as e:
+            for diarization in diarizations:
+                if diarization is not None:
+                    diarization.cancel()
+            print(f"[{batch_id}] Batch of {len(bucket)} file(s) failed ({e}), transcribing them one by one.")
+            for index in bucket:
+                await run_single(items[index], durations[index])
+            return
+        asr_seconds = time.time() - bucket_start
+        for index, diarization, asr_res in zip(bucket, diarizations, results):
+            item = items[index]
             try:
-                os.remove(temp_file_path)
-                print(f"[{task_id}] Cleaned up temporary file: {temp_file_path}")
-            except OSError as e:
-                print(f"[{task_id}] Error removing temporary file {temp_file_path}: {e}")
-        if "temp_file" in tasks[task_id]:
-             del tasks[task_id]["temp_file"]
+                await update_task(item["task_id"], asr_seconds=asr_seconds)
+                complete = await apply_diarization(item["task_id"], item["diarize"], diarization, asr_res)
+                await store_transcription(item["task_id"], item["cache_key"] if complete else None, asr_res)
+            except Exception as e:
+                await update_task(item["task_id"], status="FAILED", error=f"Error during ASR transcription: {e}")
+            finally:
+                if item["delete_file"]:
+                    await remove_temp_file(item["task_id"], item["temp_file_path"])
+            await file_finished(item["task_id"], durations[index])
+
+    try:
+        if model_pool is None:
+            raise RuntimeError("ASR model is not available.")
+        with pin_decoded([item["audio_sha256"] for item in items]):
+            # Decoding was started when the batch was queued; this mostly collects the results
+            audios = await asyncio.gather(*(
+                load_decoded_audio(item["task_id"], item["audio_sha256"], item["temp_file_path"]) for item in items
+            ))
+            durations = await asyncio.gather(*(
+                audio_duration(audio, item["temp_file_path"]) for audio, item in zip(audios, items)
+            ))
+            short = [(index, d) for index, d in enumerate(durations) if d is not None and d <= ASR_BATCH_SIZE_S]
+            buckets = plan_batches(short, ASR_BATCH_SIZE_S)
+            batched = {index for index, _ in short}
+            singles = [index for index in range(len(items)) if index not in batched]
+            print(f"[{batch_id}] {len(items)} file(s): {len(short)} in {len(buckets)} batch(es), {len(singles)} on their own.")
+
+            await asyncio.gather(
+                *(run_bucket(bucket) for bucket in buckets),
+                *(run_single(items[index], durations[index]) for index in singles),
+            )
+        wall_seconds = time.time() - start
+        stats = {
+            "files": len(items) + job.get("cached", 0),
+            "cached": job.get("cached", 0),
+            "completed": counts["completed"],
+            "failed": counts["failed"],
+            "batches": len(buckets),
+            "batched_files": len(short),
+            "audio_seconds": round(audio_seconds, 1),
+            "wall_seconds": round(wall_seconds, 2),
+            "rtf": round(wall_seconds / audio_seconds, 4) if audio_seconds else None,
+            "audio_seconds_per_second": round(audio_seconds / wall_seconds, 2) if wall_seconds else None,
+            "files_per_minute": round(len(items) * 60 / wall_seconds, 2) if wall_seconds else None,
+        }
+        await update_task(
+            batch_id,
+            status="COMPLETED" if counts["completed"] or not items else "FAILED",
+            error=None if counts["completed"] or not items else "All files in the batch failed.",
+            asr_seconds=wall_seconds,
+            batch_stats=stats,
+            progress=1.0,
+        )
+        print(f"[{batch_id}] Batch finished: {stats}")
+    except Exception as e:
+        for item in items:
+            task = await asyncio.to_thread(task_store.get, item["task_id"]) or {}
+            if task.get("status") not in ("COMPLETED", "FAILED"):
+                await update_task(item["task_id"], status="FAILED", error=f"Batch failed: {e}")
+                if item["delete_file"]:
+                    await remove_temp_file(item["task_id"], item["temp_file_path"])
+        await update_task(batch_id, status="FAILED", error=f"Error during batch transcription: {e}")
+        print(f"[{batch_id}] Batch failed with error: {e}")
+
+
+# --- Summarization Jobs ---
+async def async_summarize_task(task_id: str, job: Dict[str, Any]):
+    await update_task(task_id, status="PROCESSING", started_at=time.time(), progress=0.0)
+    try:
+        if llm_client is None:
+            raise RuntimeError("LLM client is not available.")
+        llm_config = job["llm_config"]
+
+        def publish_progress(done: int, total: int):
+            post_task_update(task_id, {"progress": done / total})
+
+        def publish_text(text: str):
+            post_task_update(task_id, {"summary": text})
+
+        print(f"[{task_id}] Starting summarization with model '{llm_config['model_name']}'...")
+        summary, timings = await summarize_transcript(
+            llm_client,
+            job["meeting_info"],
+            job["transcript"],
+            llm_config,
+            lang=job["lang"],
+            context_tokens=LLM_CONTEXT_TOKENS,
+            on_progress=publish_progress,
+            on_text=publish_text,
+            use_cache=not job.get("regenerate"),
+        )
+        await update_task(
+            task_id,
+            summary=summary,
+            summary_timings=timings,
+            cache_hit=timings["cached"],
+            progress=1.0,
+            status="COMPLETED",
+        )
+        print(f"[{task_id}] Summary completed in {timings['total_seconds']:.1f}s "
+              f"({timings['llm_calls']} LLM call(s), first token after {timings['ttft_seconds'] or 0:.1f}s).")
+
+    except httpx.HTTPStatusError as e:
+        error = f"LLM API request failed (HTTP {e.response.status_code}): {e.response.text[:500]}"
+        await update_task(task_id, status="FAILED", error=error)
+        print(f"[{task_id}] Task failed with error: {error}")
+
+    except Exception as e:
+        error = f"Error during summarization: {e!r}"
+        await update_task(task_id, status="FAILED", error=error)
+        print(f"[{task_id}] Task failed with error: {error}")
+
+
+async def summary_worker(worker_id: int):
+    print(f"Summary worker {worker_id} started.")
+    while True:
+        task_id, job = await summary_queue.get()
+        try:
+            await async_summarize_task(task_id, job)
+        except Exception as e:
+            print(f"[{task_id}] Summary worker {worker_id} crashed while processing: {e}")
+
+
+def queue_position(task_id: str) -> Optional[int]:
+    for queue in (asr_queue, summary_queue):
+        position = queue.position(task_id) if queue is not None else None
+        if position is not None:
+            return position
+    return None
+
+
+# --- Task Store Maintenance ---
+def _owner_is_alive(owner: Optional[str]) -> bool:
+    if not owner:
+        return False
+    host, pid, _ = (owner.split(":") + ["", ""])[:3]
+    if host != socket.gethostname():
+        # Owned by a process on another host sharing the store; assume it is alive
+        return True
+    if pid == str(os.getpid()):
+        # PIDs are reused across restarts (e.g. PID 1 in containers), so compare the full ID
+        return owner == PROCESS_ID
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def fail_orphaned_tasks() -> int:
+    """Mark unfinished tasks whose owning process is gone as FAILED."""
+    orphaned = 0
+    for task in task_store.list_unfinished():
+        if _owner_is_alive(task.get("owner")):
+            continue
+        task_store.update(task["task_id"], status="FAILED", error="Task was interrupted by a server restart.")
+        temp_file = task.get("temp_file")
+        if temp_file and os.path.exists(temp_file):
+            os.remove(temp_file)
+        orphaned += 1
+    return orphaned
+
+
+async def task_eviction_loop():
+    while True:
+        await asyncio.sleep(TASK_STORE_EVICT_INTERVAL)
+        try:
+            evicted = await asyncio.to_thread(task_store.evict)
+            if evicted:
+                print(f"Evicted {evicted} finished task(s) from the task store.")
+            abandoned = await asyncio.to_thread(upload_store.evict)
+            if abandoned:
+                print(f"Removed {abandoned} abandoned resumable upload(s).")
+        except Exception as e:
+            print(f"Error during task store eviction: {e}")
 
 
 # --- FastAPI App and Endpoints ---
@@ -158,41 +1329,269 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    global asr_model
-    print("Loading ASR model...")
+    global models_loading
+    # Blocking work (model calls, file and database I/O) runs in the default executor through asyncio.to_thread;
+    # size it like Starlette's thread pool so long model calls do not starve the short I/O calls
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=40))
+    orphaned = await asyncio.to_thread(fail_orphaned_tasks)
+    if orphaned:
+        print(f"Marked {orphaned} interrupted task(s) as FAILED.")
+    worker_tasks.append(asyncio.create_task(task_eviction_loop()))
+    start_summary_workers()
 
-    if AutoModel is None or run_in_threadpool is None:
-        print("funasr or starlette.concurrency not found. ASR functionality will be disabled.")
+    if AutoModel is None:
+        print("funasr not found. ASR functionality will be disabled.")
+        set_component_status("asr", "disabled", error="funasr is not installed")
     else:
-        try:
-            print("Initializing FunASR AutoModel...")
-            model_kwargs = {
-                "model": ASR_MODEL_NAME,
-                "vad_model": ASR_VAD_MODEL,
-                "vad_model_revision": ASR_VAD_MODEL_REVISION,
-                "punc_model": ASR_PUNC_MODEL,
-                "punc_model_revision": ASR_PUNC_MODEL_REVISION,
-                "spk_model": ASR_SPK_MODEL,
-                "spk_model_revision": ASR_SPK_MODEL_REVISION,
-                "disable_update": True,
-            }
-            if ASR_DEVICE:
-                model_kwargs["device"] = ASR_DEVICE
+        # Models load in the background so the server answers /healthz and /readyz meanwhile
+        models_loading = True
+        worker_tasks.append(asyncio.create_task(load_models()))
+    print("Startup complete.")
+
+
+def set_component_status(name: str, state: str, seconds: Optional[float] = None, error: Optional[str] = None):
+    model_status[name] = {"state": state, "seconds": seconds, "error": error}
 
-            asr_model = AutoModel(**model_kwargs)
-            print("ASR model loaded successfully.")
 
+async def load_component(name: str, factory: Callable[[], Any]) -> Any:
+    """Run a blocking model constructor in the thread pool, recording its state and load time."""
+    set_component_status(name, "loading")
+    started = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(factory)
+    except Exception as e:
+        set_component_status(name, "failed", seconds=time.perf_counter() - started, error=str(e))
+        raise
+    seconds = time.perf_counter() - started
+    set_component_status(name, "ready", seconds=seconds)
+    print(f"Loaded {name} in {seconds:.1f}s.")
+    return result
+
+
+def warmup_audio() -> np.ndarray:
+    if ASR_WARMUP_AUDIO and librosa is not None:
+        audio, _ = librosa.load(ASR_WARMUP_AUDIO, sr=SAMPLE_RATE, mono=True, dtype=np.float32)
+        return audio
+    # Two seconds of a quiet tone over noise, enough to run every stage of the pipeline once
+    t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+    noise = np.random.default_rng(0).standard_normal(t.size)
+    return (0.1 * np.sin(2 * np.pi * 220 * t) + 0.01 * noise).astype(np.float32)
+
+
+def warm_up_models(models: List[Any]):
+    """One inference per loaded model, so the first real request does not pay the cold-start costs."""
+    audio = warmup_audio()
+    # Concurrently, so that with inference processes every process takes one of the calls
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        list(pool.map(lambda model: model.generate(input=audio, batch_size_s=ASR_BATCH_SIZE_S, hotword=''), models))
+    if vad_model is not None and spk_embedder is not None:
+        with vad_lock:
+            vad_model.generate(input=audio, fs=SAMPLE_RATE)
+        with spk_lock:
+            spk_embedder.generate(input=audio, fs=SAMPLE_RATE)
+    if punc_model is not None:
+        with punc_lock:
+            punc_model.generate(input="你好")
+
+
+async def load_models():
+    global asr_model, model_pool, asr_queue, decode_pool, inference_pool, vad_model, spk_embedder, diarizer, streaming_asr_model, punc_model, models_loading, startup_seconds
+    started = time.perf_counter()
+    set_component_status("asr", "pending")
+    set_component_status("vad", "pending")
+    set_component_status("spk", "pending")
+    set_component_status("streaming_asr", "pending" if ASR_STREAMING_ENABLED else "disabled")
+    set_component_status("punc", "pending" if ASR_STREAMING_ENABLED else "disabled")
+    set_component_status("decode_pool", "pending" if ASR_DECODE_ENABLED and librosa is not None else "disabled")
+    set_component_status("warmup", "pending" if ASR_WARMUP_ENABLED else "disabled")
+    try:
+        model_kwargs = {
+            "model": ASR_MODEL_NAME,
+            "vad_model": ASR_VAD_MODEL,
+            "vad_model_revision": ASR_VAD_MODEL_REVISION,
+            "punc_model": ASR_PUNC_MODEL,
+            "punc_model_revision": ASR_PUNC_MODEL_REVISION,
+            # No spk_model: speaker diarization is a separate stage, run only for requests that ask for it
+            "disable_update": True,
+        }
+        if ASR_DEVICE:
+            model_kwargs["device"] = ASR_DEVICE
+
+        replicas = max(ASR_MODEL_REPLICAS, 1)
+        use_processes = ASR_INFERENCE_PROCESSES > 0
+        if use_processes and (ASR_DEVICE or "").startswith("cuda"):
+            # CUDA does not survive a fork; GPU replicas stay in this process
+            print("ASR_INFERENCE_PROCESSES is ignored on CUDA devices, loading in-process replicas instead.")
+            use_processes = False
+
+        onnx_kwargs = {
+            "model": ASR_ONNX_MODEL,
+            "vad_model": ASR_ONNX_VAD_MODEL,
+            "punc_model": ASR_ONNX_PUNC_MODEL,
+            "quantize": ASR_ONNX_QUANTIZE,
+            "intra_op_threads": ASR_ONNX_INTRA_OP_THREADS,
+        }
+        if ASR_BACKEND not in ASR_BACKENDS:
+            raise ValueError(f"Unknown ASR_BACKEND {ASR_BACKEND!r}, expected one of {', '.join(ASR_BACKENDS)}")
+
+        def build_replicas() -> List[Any]:
+            global inference_pool
+            if use_processes:
+                print(f"Loading the ASR model for {ASR_INFERENCE_PROCESSES} inference process(es)...")
+                threads = ASR_INFERENCE_THREADS or max((os.cpu_count() or 1) // ASR_INFERENCE_PROCESSES, 1)
+                # ONNX Runtime would otherwise start one thread per core in every process
+                process_onnx_kwargs = {**onnx_kwargs, "intra_op_threads": ASR_ONNX_INTRA_OP_THREADS or threads}
+                inference_pool = InferencePool(
+                    load_asr_model, (ASR_BACKEND, model_kwargs, process_onnx_kwargs), ASR_INFERENCE_PROCESSES, threads,
+                    timeout=ASR_INFERENCE_TIMEOUT_SECONDS or None,
+                )
+                inference_pool.start()
+                # One lease per process; every lease dispatches through the shared job queue
+                return [inference_pool] * inference_pool.processes
+            models = []
+            for replica in range(replicas):
+                print(f"Loading ASR model replica {replica + 1}/{replicas}...")
+                models.append(load_asr_model(ASR_BACKEND, model_kwargs, onnx_kwargs))
+            return models
+
+        print(f"Initializing the {ASR_BACKEND} ASR backend...")
+        models = await load_component("asr", build_replicas)
+
+        aux_kwargs = {"disable_update": True}
+        if ASR_DEVICE:
+            aux_kwargs["device"] = ASR_DEVICE
+        try:
+            print("Loading standalone VAD and speaker embedding models...")
+            vad_model = await load_component(
+                "vad", lambda: AutoModel(model=ASR_VAD_MODEL, model_revision=ASR_VAD_MODEL_REVISION, **aux_kwargs)
+            )
+            spk_embedder = await load_component(
+                "spk", lambda: AutoModel(model=ASR_SPK_MODEL, model_revision=ASR_SPK_MODEL_REVISION, **aux_kwargs)
+            )
+            try:
+                diarizer = Diarizer(
+                    vad_model,
+                    spk_embedder,
+                    probe_windows=ASR_DIARIZE_PROBE_WINDOWS,
+                    auto_threshold=ASR_DIARIZE_AUTO_THRESHOLD,
+                    vad_lock=vad_lock,
+                    spk_lock=spk_lock,
+                )
+            except ImportError as e:
+                print(f"{e}, speaker diarization is disabled.")
         except Exception as e:
-            print(f"Error during ASR model loading: {e}")
-            asr_model = None
-    print("Startup complete.")
+            print(f"Error loading standalone VAD/speaker models, chunked transcription, diarization and live transcription are disabled: {e}")
+            vad_model = spk_embedder = diarizer = None
+
+        if ASR_STREAMING_ENABLED and vad_model is not None:
+            try:
+                print("Loading streaming ASR and punctuation models for live transcription...")
+                streaming_asr_model = await load_component(
+                    "streaming_asr",
+                    lambda: AutoModel(model=ASR_STREAMING_MODEL, model_revision=ASR_STREAMING_MODEL_REVISION, **aux_kwargs),
+                )
+                punc_model = await load_component(
+                    "punc", lambda: AutoModel(model=ASR_PUNC_MODEL, model_revision=ASR_PUNC_MODEL_REVISION, **aux_kwargs)
+                )
+            except Exception as e:
+                print(f"Error loading streaming models, live transcription is disabled: {e}")
+                streaming_asr_model = punc_model = None
+        for name in ("vad", "spk", "streaming_asr", "punc"):
+            if model_status[name]["state"] == "pending":
+                set_component_status(name, "disabled")
+
+        if ASR_DECODE_ENABLED and librosa is not None:
+            # spawn, not fork: the API process already runs threads and holds the models
+            decode_pool = ProcessPoolExecutor(
+                max_workers=max(ASR_DECODE_WORKERS, 1), mp_context=multiprocessing.get_context("spawn")
+            )
+            os.makedirs(ASR_DECODE_CACHE_DIR, exist_ok=True)
+            set_component_status("decode_pool", "ready")
+            print(f"Started {max(ASR_DECODE_WORKERS, 1)} audio decoding process(es), cache in {ASR_DECODE_CACHE_DIR}.")
+
+        if ASR_WARMUP_ENABLED:
+            try:
+                print("Warming up models...")
+                await load_component("warmup", lambda: warm_up_models(models))
+            except Exception as e:
+                # A failed warm-up only means a slower first request
+                print(f"Error during model warm-up: {e}")
+
+        model_pool = asyncio.Queue()
+        for model in models:
+            model_pool.put_nowait(model)
+        asr_queue = JobQueue(ASR_MAX_QUEUE_SIZE)
+        for worker_id in range(max(ASR_NUM_WORKERS, 1)):
+            worker_tasks.append(asyncio.create_task(asr_worker(worker_id)))
+        asr_model = models[0]
+        print(f"Started {max(ASR_NUM_WORKERS, 1)} ASR worker(s), queue size limit {ASR_MAX_QUEUE_SIZE}.")
+    except Exception as e:
+        print(f"Error during ASR model loading: {e}")
+        if model_status["asr"]["state"] != "failed":
+            set_component_status("asr", "failed", error=str(e))
+        asr_model = None
+        model_pool = None
+        if inference_pool is not None:
+            await asyncio.to_thread(inference_pool.close)
+            inference_pool = None
+    finally:
+        models_loading = False
+        startup_seconds = time.perf_counter() - started
+    timings = ", ".join(f"{name} {info['seconds']:.1f}s" for name, info in model_status.items() if info["seconds"] is not None)
+    print(f"ASR model loading finished in {startup_seconds:.1f}s ({timings or 'nothing loaded'}).")
+
+
+def asr_unavailable_detail() -> str:
+    if models_loading:
+        return "ASR models are still loading. Please retry later."
+    return "ASR service is not loaded or available. Check server logs for startup errors."
+
+
+def start_summary_workers():
+    global llm_client, summary_queue
+    llm_client = LLMClient(
+        max_concurrency=LLM_MAX_PARALLEL,
+        max_retries=LLM_MAX_RETRIES,
+        backoff_seconds=LLM_RETRY_BACKOFF_SECONDS,
+        timeout=LLM_TIMEOUT_SECONDS,
+        max_connections=LLM_MAX_CONNECTIONS,
+        cache=llm_cache,
+    )
+    summary_queue = JobQueue(SUMMARY_MAX_QUEUE_SIZE, name="Summary")
+    for worker_id in range(max(SUMMARY_NUM_WORKERS, 1)):
+        worker_tasks.append(asyncio.create_task(summary_worker(worker_id)))
+    print(f"Started {max(SUMMARY_NUM_WORKERS, 1)} summary worker(s), at most {LLM_MAX_PARALLEL} concurrent request(s) per LLM endpoint.")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global asr_model
+    global asr_model, model_pool, decode_pool, inference_pool, vad_model, spk_embedder, diarizer, streaming_asr_model, punc_model, llm_client
     print("Shutting down...")
+    for worker in worker_tasks:
+        worker.cancel()
+    await asyncio.gather(*worker_tasks, return_exceptions=True)
+    worker_tasks.clear()
+    if decode_pool is not None:
+        decode_pool.shutdown(wait=False, cancel_futures=True)
+        decode_pool = None
+    if inference_pool is not None:
+        await asyncio.to_thread(inference_pool.close)
+        inference_pool = None
+    if llm_client is not None:
+        await llm_client.aclose()
+        llm_client = None
     asr_model = None
+    model_pool = None
+    vad_model = spk_embedder = diarizer = None
+    streaming_asr_model = punc_model = None
+    # Write the posted task updates still pending before closing the store
+    await asyncio.gather(*task_update_writers, return_exceptions=True)
+    task_store.close()
+    upload_store.close()
+    if asr_cache is not None:
+        asr_cache.close()
+    if llm_cache is not None:
+        llm_cache.close()
     print("Shutdown complete.")
 
 
@@ -203,13 +1602,36 @@ async def shutdown_event():
     summary="Submit audio for transcription",
     description="Upload an audio file. The transcription runs in the background. Returns a task ID to query the status and results."
 )
-async def process_audio_endpoint(file: UploadFile = File(..., description="Audio file of the meeting")):
-    if asr_model is None or run_in_threadpool is None:
+async def process_audio_endpoint(
+    file: UploadFile = File(..., description="Audio file of the meeting"),
+    priority: int = Query(0, description="Scheduling priority, lower values are processed first."),
+    diarize: str = Query(
+        ASR_DIARIZE_DEFAULT,
+        pattern="^(false|auto|true)$",
+        description="Speaker diarization: true, false, or auto (skipped when the recording has a single speaker).",
+    ),
+    hotwords: List[str] = Query(
+        [], description="Hotwords biasing recognition, e.g. product or people's names; repeat the parameter for several."
+    ),
+    hotword_profile: Optional[str] = Query(
+        None, pattern=PROFILE_NAME_PATTERN, description="Name of a saved hotword profile, combined with hotwords."
+    ),
+):
+    if asr_model is None or asr_queue is None:
          raise HTTPException(
              status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-             detail="ASR service is not loaded or available. Check server logs for startup errors."
+             detail=asr_unavailable_detail(),
+             headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+         )
+    if asr_queue.full():
+         raise HTTPException(
+             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+             detail="ASR queue is full. Please retry later.",
+             headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
          )
 
+    compiled_hotwords = await resolve_hotwords(hotword_profile, hotwords)
+
     task_id = uuid.uuid4().hex
     temp_file_path = None
     try:
@@ -219,21 +1641,27 @@ async def process_audio_endpoint(file: UploadFile = File(..., description="Audio
         if not file_extension.startswith('.'):
              file_extension = '.' + file_extension
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            temp_file_path = tmp_file.name
-
-        tasks[task_id] = {
-            "task_id": task_id,
-            "status": "SAVED_FILE",
-            "transcription": None,
-            "error": None,
-            "temp_file": temp_file_path,
-        }
-        print(f"[{task_id}] Saved file to {temp_file_path}. Starting background task.")
-        asyncio.create_task(async_process_audio_task(task_id, temp_file_path, file.filename))
-        return ProcessAudioResponse(task_id=task_id, status=tasks[task_id]["status"])
+        temp_file_path, file_size, audio_sha256 = await save_upload_to_disk(file, file_extension)
+        return await enqueue_saved_audio(
+            task_id, temp_file_path, file_size, audio_sha256, file.filename, priority, diarize, compiled_hotwords
+        )
+
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+
+    except QueueFullError as e:
+        # Lost the race for the last queue slot while the upload was being saved
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        await asyncio.to_thread(task_store.delete, task_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+        )
 
     except Exception as e:
         current_task_id = locals().get('task_id', 'N/A')
@@ -244,10 +1672,14 @@ async def process_audio_endpoint(file: UploadFile = File(..., description="Audio
              except OSError as oe:
                   print(f"[{current_task_id}] Error removing temporary file after exception {temp_file_path}: {oe}")
 
-        if current_task_id != 'N/A' and current_task_id in tasks:
-             tasks[current_task_id]["status"] = "FAILED"
-             tasks[current_task_id]["error"] = f"Failed during file saving or task initiation: {e}"
-             tasks[current_task_id]["transcription"] = f"Initialization failed: {e}" if tasks[current_task_id].get("transcription") is None else tasks[current_task_id]["transcription"]
+        current_task = await asyncio.to_thread(task_store.get, current_task_id) if current_task_id != 'N/A' else None
+        if current_task is not None:
+             await update_task(
+                 current_task_id,
+                 status="FAILED",
+                 error=f"Failed during file saving or task initiation: {e}",
+                 transcription=f"Initialization failed: {e}" if current_task.get("transcription") is None else current_task["transcription"],
+             )
         else:
              print(f"Error before task ID {current_task_id} generated or task not in dict: {e}")
 
@@ -257,22 +1689,826 @@ async def process_audio_endpoint(file: UploadFile = File(..., description="Audio
         )
 
 
+@app.post(
+    "/api/transcribe/batch",
+    response_model=BatchTranscribeResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit many audio files for transcription at once",
+    description=(
+        "Accepts uploaded files and/or server-side paths relative to ASR_BATCH_INPUT_DIR. Every file gets its own "
+        "task; files already in the transcription cache complete immediately. The rest are queued as one batch job, "
+        "whose task (`batch_task_id`) reports progress and, when done, throughput statistics."
+    ),
+)
+async def process_batch_endpoint(
+    files: List[UploadFile] = File(default=[], description="Audio files"),
+    paths: List[str] = Form(default=[], description="Server-side audio paths, relative to ASR_BATCH_INPUT_DIR"),
+    priority: int = Query(0, description="Scheduling priority, lower values are processed first."),
+    diarize: str = Query(
+        ASR_DIARIZE_DEFAULT,
+        pattern="^(false|auto|true)$",
+        description="Speaker diarization: true, false, or auto (skipped when the recording has a single speaker).",
+    ),
+    hotwords: List[str] = Query(
+        [], description="Hotwords biasing recognition, e.g. product or people's names; repeat the parameter for several."
+    ),
+    hotword_profile: Optional[str] = Query(
+        None, pattern=PROFILE_NAME_PATTERN, description="Name of a saved hotword profile, combined with hotwords."
+    ),
+):
+    if asr_model is None or asr_queue is None:
+         raise HTTPException(
+             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+             detail=asr_unavailable_detail(),
+             headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+         )
+    if asr_queue.full():
+         raise HTTPException(
+             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+             detail="ASR queue is full. Please retry later.",
+             headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+         )
+    if not files and not paths:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files or paths given.")
+    if len(files) + len(paths) > ASR_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {ASR_BATCH_MAX_FILES} files.",
+        )
+    try:
+        resolved_paths = [resolve_batch_input(path) for path in paths]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    compiled_hotwords = await resolve_hotwords(hotword_profile, hotwords)
+
+    batch_id = uuid.uuid4().hex
+    tasks: List[BatchFileTask] = []
+    items: List[Dict[str, Any]] = []
+    try:
+        inputs = [(file.filename, file) for file in files] + [(os.path.basename(path), path) for path in resolved_paths]
+        for filename, source in inputs:
+            task_id = uuid.uuid4().hex
+            if isinstance(source, str):
+                audio_path, delete_file = source, False
+                file_size, audio_sha256 = await asyncio.to_thread(file_sha256, source)
+            else:
+                audio_path, file_size, audio_sha256 = await save_upload_to_disk(source, os.path.splitext(filename)[1] or ".wav")
+                delete_file = True
+            if await create_audio_task(
+                task_id,
+                audio_path,
+                file_size,
+                audio_sha256,
+                delete_file=delete_file,
+                diarize=diarize,
+                hotwords=compiled_hotwords,
+                batch_task_id=batch_id,
+            ):
+                tasks.append(BatchFileTask(filename=filename, task_id=task_id, status="COMPLETED", detail="Served from transcription cache."))
+                continue
+            items.append({
+                "task_id": task_id,
+                "temp_file_path": audio_path,
+                "original_filename": filename,
+                "cache_key": asr_cache_key(audio_sha256, hotwords=compiled_hotwords, diarize=diarize),
+                "audio_sha256": audio_sha256,
+                "delete_file": delete_file,
+                "diarize": diarize,
+            })
+            tasks.append(BatchFileTask(filename=filename, task_id=task_id, status="QUEUED", detail="Queued in batch."))
+
+        await asyncio.to_thread(
+            task_store.create,
+            batch_id,
+            kind="batch",
+            status="SAVED_FILE",
+            error=None,
+            file_tasks=[task.task_id for task in tasks],
+            owner=PROCESS_ID,
+        )
+        cached = len(tasks) - len(items)
+        if not items:
+            await update_task(batch_id, status="COMPLETED", progress=1.0, batch_stats={"files": cached, "cached": cached})
+            return BatchTranscribeResponse(batch_task_id=batch_id, status="COMPLETED", tasks=tasks)
+
+        job = {
+            "kind": "batch",
+            "items": items,
+            "cached": cached,
+            "hotword": hotword_argument(compiled_hotwords),
+        }
+        position = asr_queue.put_nowait(batch_id, job, priority=priority)
+        for item in items:
+            await update_task(item["task_id"], status="QUEUED")
+            start_decode(item["audio_sha256"], item["temp_file_path"])
+        await update_task(batch_id, status="QUEUED")
+        print(f"[{batch_id}] Batch of {len(tasks)} file(s) ({cached} cached) queued at position {position}.")
+        return BatchTranscribeResponse(batch_task_id=batch_id, status="QUEUED", queue_position=position, tasks=tasks)
+
+    except UploadTooLargeError as e:
+        await asyncio.to_thread(discard_batch, batch_id, tasks, items)
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    except QueueFullError as e:
+        await asyncio.to_thread(discard_batch, batch_id, tasks, items)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+        )
+
+    except Exception as e:
+        await asyncio.to_thread(discard_batch, batch_id, tasks, items)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start batch transcription: {e}",
+        )
+
+
+def discard_batch(batch_id: str, tasks: List[BatchFileTask], items: List[Dict[str, Any]]) -> None:
+    """Undo a partially submitted batch; the client resubmits it as a unit."""
+    for item in items:
+        if item["delete_file"] and os.path.exists(item["temp_file_path"]):
+            os.remove(item["temp_file_path"])
+    for task in tasks:
+        task_store.delete(task.task_id)
+    task_store.delete(batch_id)
+
+
+@app.post(
+    "/api/transcribe/hash/{audio_sha256}",
+    response_model=ProcessAudioResponse,
+    summary="Submit already-transcribed audio by content hash",
+    description=(
+        "Looks up the SHA-256 of an audio file in the transcription cache. On a hit a completed task is "
+        "created without uploading the file; on a miss 404 is returned and the file must be uploaded "
+        "through /api/transcribe."
+    ),
+)
+async def process_audio_hash_endpoint(
+    audio_sha256: str = Path(..., pattern="^[0-9a-f]{64}$", description="Hex SHA-256 of the audio file"),
+    diarize: str = Query(
+        ASR_DIARIZE_DEFAULT,
+        pattern="^(false|auto|true)$",
+        description="Speaker diarization: true, false, or auto (skipped when the recording has a single speaker).",
+    ),
+    hotwords: List[str] = Query(
+        [], description="Hotwords biasing recognition, e.g. product or people's names; repeat the parameter for several."
+    ),
+    hotword_profile: Optional[str] = Query(
+        None, pattern=PROFILE_NAME_PATTERN, description="Name of a saved hotword profile, combined with hotwords."
+    ),
+):
+    compiled_hotwords = await resolve_hotwords(hotword_profile, hotwords)
+    cache_key = asr_cache_key(audio_sha256, hotwords=compiled_hotwords, diarize=diarize)
+    cached_res = await asyncio.to_thread(asr_cache.get, cache_key) if asr_cache is not None else None
+    if cached_res is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio not found in transcription cache.")
+
+    task_id = uuid.uuid4().hex
+    await asyncio.to_thread(
+        task_store.create,
+        task_id,
+        status="SAVED_FILE",
+        transcription=None,
+        error=None,
+        temp_file=None,
+        audio_sha256=audio_sha256,
+        hotwords=hotword_fields(compiled_hotwords),
+        cache_hit=True,
+        owner=PROCESS_ID,
+    )
+    await finish_transcription(task_id, cached_res)
+    print(f"[{task_id}] Served from ASR cache by hash (sha256 {audio_sha256[:12]}), upload skipped.")
+    return ProcessAudioResponse(task_id=task_id, status="COMPLETED", detail="Served from transcription cache.")
+
+
+# --- Resumable Uploads ---
+async def _require_upload(upload_id: str, finalizing_ok: bool = True) -> Dict[str, Any]:
+    record = await asyncio.to_thread(upload_store.get, upload_id)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found or expired.")
+    if record["finalizing"] and not finalizing_ok:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already being finalized.")
+    return record
+
+
+@app.post(
+    "/api/uploads",
+    response_model=UploadStatusResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start a resumable upload",
+    description=(
+        "Reserves space for a file of the given size. Send its chunks with PUT /api/uploads/{upload_id}, "
+        "in any order and in parallel, then start transcription with POST /api/uploads/{upload_id}/finalize."
+    ),
+)
+async def create_upload_endpoint(request: UploadInitRequest):
+    if UPLOAD_MAX_BYTES > 0 and request.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the maximum allowed size of {UPLOAD_MAX_BYTES} bytes.",
+        )
+    upload_id = uuid.uuid4().hex
+    record = await asyncio.to_thread(
+        upload_store.create, upload_id, request.filename, request.size, UPLOAD_RESUMABLE_CHUNK_SIZE, request.sha256
+    )
+    print(f"[upload {upload_id}] Started resumable upload of {request.size} bytes ({request.filename}).")
+    return UploadStatusResponse(**record)
+
+
+@app.put(
+    "/api/uploads/{upload_id}",
+    response_model=UploadStatusResponse,
+    summary="Upload one chunk of a resumable upload",
+    description=(
+        "The request body is the raw chunk written at `offset`, at most `chunk_size` bytes. "
+        "The X-Chunk-SHA256 header must hold the chunk's hex SHA-256; mismatching chunks are rejected "
+        "with 400 and can simply be sent again."
+    ),
+)
+async def upload_chunk_endpoint(
+    request: Request,
+    upload_id: str,
+    offset: int = Query(..., ge=0, description="Byte offset of the chunk in the file."),
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256", pattern="^[0-9a-fA-F]{64}$"),
+):
+    record = await _require_upload(upload_id, finalizing_ok=False)
+    data = bytearray()
+    async for piece in request.stream():
+        data += piece
+        if len(data) > record["chunk_size"]:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunk exceeds the chunk size of {record['chunk_size']} bytes.",
+            )
+    if not data or offset + len(data) > record["size"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Chunk is empty or extends past the end of the file.")
+    if await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest()) != chunk_sha256.lower():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Chunk checksum mismatch.")
+    try:
+        await asyncio.to_thread(upload_store.write_chunk, upload_id, offset, bytes(data), chunk_sha256.lower())
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found or expired.")
+    return UploadStatusResponse(**await _require_upload(upload_id))
+
+
+@app.get(
+    "/api/uploads/{upload_id}",
+    response_model=UploadStatusResponse,
+    summary="Get the state of a resumable upload",
+    description="Lists the byte ranges still missing, so an interrupted upload can resume where it stopped.",
+)
+async def get_upload_endpoint(upload_id: str):
+    return UploadStatusResponse(**await _require_upload(upload_id))
+
+
+@app.delete(
+    "/api/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Abort a resumable upload",
+)
+async def delete_upload_endpoint(upload_id: str):
+    await _require_upload(upload_id, finalizing_ok=False)
+    await asyncio.to_thread(upload_store.delete, upload_id)
+
+
+@app.post(
+    "/api/uploads/{upload_id}/finalize",
+    response_model=ProcessAudioResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Finish a resumable upload and start transcription",
+    description=(
+        "Verifies that every byte was received (409 otherwise) and, if a SHA-256 was given on init, "
+        "the checksum of the whole file. The assembled file is then transcribed like an upload to /api/transcribe."
+    ),
+)
+async def finalize_upload_endpoint(
+    upload_id: str,
+    priority: int = Query(0, description="Scheduling priority, lower values are processed first."),
+    diarize: str = Query(
+        ASR_DIARIZE_DEFAULT,
+        pattern="^(false|auto|true)$",
+        description="Speaker diarization: true, false, or auto (skipped when the recording has a single speaker).",
+    ),
+    hotwords: List[str] = Query(
+        [], description="Hotwords biasing recognition, e.g. product or people's names; repeat the parameter for several."
+    ),
+    hotword_profile: Optional[str] = Query(
+        None, pattern=PROFILE_NAME_PATTERN, description="Name of a saved hotword profile, combined with hotwords."
+    ),
+):
+    if asr_model is None or asr_queue is None:
+         raise HTTPException(
+             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+             detail=asr_unavailable_detail(),
+             headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+         )
+    if asr_queue.full():
+         raise HTTPException(
+             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+             detail="ASR queue is full. Please retry later.",
+             headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+         )
+    record = await _require_upload(upload_id, finalizing_ok=False)
+    compiled_hotwords = await resolve_hotwords(hotword_profile, hotwords)
+    if record["missing"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is incomplete: {record['size'] - record['received_bytes']} bytes missing.",
+        )
+    # Only one finalize may hash and move the file; an overlapping call gets 409
+    if not await asyncio.to_thread(upload_store.claim, upload_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already being finalized.")
+    temp_file_path = os.path.join(UPLOAD_DIR, upload_id + (os.path.splitext(record["filename"])[1] or ".wav"))
+    try:
+        audio_sha256 = await asyncio.to_thread(upload_store.hash_file, upload_id)
+        if record["sha256"] and record["sha256"] != audio_sha256:
+            await asyncio.to_thread(upload_store.delete, upload_id)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File checksum mismatch, upload discarded.")
+        await asyncio.to_thread(upload_store.release, upload_id, temp_file_path)
+    except Exception:
+        # Allow the finalize to be retried (a no-op if the upload was discarded)
+        await asyncio.to_thread(upload_store.unclaim, upload_id)
+        raise
+    task_id = uuid.uuid4().hex
+    try:
+        return await enqueue_saved_audio(
+            task_id, temp_file_path, record["size"], audio_sha256, record["filename"], priority, diarize, compiled_hotwords
+        )
+    except QueueFullError as e:
+        # Lost the race for the last queue slot while the file was being verified
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        await asyncio.to_thread(task_store.delete, task_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+        )
+
+
+# --- Hotword Profiles ---
+def _profile_response(compiled: Dict[str, Any]) -> HotwordProfileResponse:
+    return HotwordProfileResponse(
+        name=compiled["profile"],
+        version=compiled["version"],
+        count=compiled["count"],
+        hotwords=compiled["words"],
+    )
+
+
+@app.get(
+    "/api/hotwords",
+    response_model=List[HotwordProfileResponse],
+    summary="List hotword profiles",
+)
+async def list_hotword_profiles():
+    return [_profile_response(compiled) for compiled in await asyncio.to_thread(hotword_store.list_profiles)]
+
+
+@app.get(
+    "/api/hotwords/{name}",
+    response_model=HotwordProfileResponse,
+    summary="Get a hotword profile",
+)
+async def get_hotword_profile(name: str = Path(..., pattern=PROFILE_NAME_PATTERN)):
+    try:
+        return _profile_response(await asyncio.to_thread(hotword_store.profile, name))
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Hotword profile not found: {name}")
+
+
+@app.put(
+    "/api/hotwords/{name}",
+    response_model=HotwordProfileResponse,
+    summary="Create or replace a hotword profile",
+    description=(
+        "Saves the hotwords under a name that transcription requests can refer to with `hotword_profile`. "
+        "Hotwords are normalized and deduplicated; the returned `version` changes whenever the list does."
+    ),
+)
+async def put_hotword_profile(request: HotwordProfileRequest, name: str = Path(..., pattern=PROFILE_NAME_PATTERN)):
+    try:
+        compiled = await asyncio.to_thread(hotword_store.save_profile, name, request.hotwords)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    print(f"Saved hotword profile {name} ({compiled['count']} hotwords, version {compiled['version']}).")
+    return _profile_response(compiled)
+
+
+@app.delete(
+    "/api/hotwords/{name}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a hotword profile",
+)
+async def delete_hotword_profile(name: str = Path(..., pattern=PROFILE_NAME_PATTERN)):
+    if not await asyncio.to_thread(hotword_store.delete_profile, name):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Hotword profile not found: {name}")
+
+
+@app.post(
+    "/api/summarize",
+    response_model=ProcessAudioResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a transcript for meeting-minutes generation",
+    description=(
+        "Queues a summarization job and returns its task ID. Follow it with /api/job/{task_id}/events: "
+        "`summary` events carry the minutes as they are generated, `completed` the final minutes."
+    ),
+)
+async def summarize_endpoint(request: SummarizeRequest, priority: int = Query(0, description="Scheduling priority, lower values are processed first.")):
+    if summary_queue is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Summarization service is not available.")
+    api_url = request.llm.api_url or LLM_API_URL
+    if not api_url:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="LLM API URL is not configured.")
+    if LLM_API_URL and api_url.rstrip("/") == LLM_API_URL.rstrip("/"):
+        api_key = request.llm.api_key or LLM_API_KEY
+    elif api_url.rstrip("/") in LLM_ALLOWED_API_URLS:
+        # Only the caller's own key goes to an endpoint other than the server's
+        api_key = request.llm.api_key
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="LLM API URL is not allowed.")
+    llm_config = {
+        "api_url": api_url,
+        "api_key": api_key,
+        "model_name": request.llm.model_name or LLM_MODEL_NAME,
+        "temperature": request.llm.temperature if request.llm.temperature is not None else LLM_TEMPERATURE,
+        "top_p": request.llm.top_p if request.llm.top_p is not None else LLM_TOP_P,
+        "max_tokens": request.llm.max_tokens if request.llm.max_tokens is not None else LLM_MAX_TOKENS,
+    }
+    if not request.transcript.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transcript is empty.")
+
+    task_id = uuid.uuid4().hex
+    await asyncio.to_thread(task_store.create, task_id, status="QUEUED", kind="summary", summary=None, error=None, owner=PROCESS_ID)
+    job = {
+        "transcript": request.transcript,
+        "meeting_info": request.meeting_info.model_dump(),
+        "lang": request.lang,
+        "llm_config": llm_config,
+        "regenerate": request.regenerate,
+    }
+    try:
+        position = summary_queue.put_nowait(task_id, job, priority=priority)
+    except QueueFullError as e:
+        await asyncio.to_thread(task_store.delete, task_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(ASR_RETRY_AFTER_SECONDS)},
+        )
+    print(f"[{task_id}] Summarization of {len(request.transcript)} characters queued at position {position}.")
+    return ProcessAudioResponse(task_id=task_id, status="QUEUED", detail="Queued for summarization.", queue_position=position)
+
+
 @app.get(
     "/api/job/{task_id}",
-    response_model=TaskStatusResponse,
+    response_model=Union[TaskStatusResponse, TranscriptResponse],
     summary="Get status and transcription of an audio processing task",
-    description="Query the status of a submitted audio processing task using its ID. Returns transcription when completed."
+    description=(
+        "Query the status of a submitted audio processing task using its ID. Returns transcription when completed. "
+        "Pass `cursor` to receive only the transcript segments published since that offset (as `segments`, "
+        "with `next_cursor` for the following poll) instead of the full transcription. "
+        "`format=json` returns the transcript as structured segments (speaker, start, end, text and, if enabled, "
+        "word timings) plus the list of speakers; `format=srt` and `format=vtt` return subtitles of a completed task."
+    )
 )
-async def get_task_status(task_id: str):
-    task = tasks.get(task_id)
+async def get_task_status(
+    task_id: str,
+    cursor: Optional[int] = Query(None, ge=0, description="Number of segments the client already has."),
+    format: str = Query("text", pattern="^(text|json|srt|vtt)$", description="Transcript format: text, json, srt or vtt."),
+):
+    task = await asyncio.to_thread(task_store.get, task_id)
     if task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task ID not found.")
+    segments = task.get("segments") or []
+
+    if format in ("srt", "vtt"):
+        if task.get("status") != "COMPLETED":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Transcript is not available yet (status: {task.get('status')}).",
+            )
+        if format == "srt":
+            return PlainTextResponse(render_srt(segments), media_type="application/x-subrip")
+        return PlainTextResponse(render_vtt(segments), media_type="text/vtt")
+
+    if format == "json":
+        return TranscriptResponse(
+            task_id=task.get("task_id"),
+            status=task.get("status"),
+            error=task.get("error"),
+            progress=task.get("progress"),
+            duration=task.get("duration"),
+            speakers=segment_speakers(segments),
+            segments=segments[cursor or 0:],
+            next_cursor=len(segments),
+            segments_revision=task.get("segments_revision") or 0,
+        )
+
     return TaskStatusResponse(
         task_id=task.get("task_id"),
         status=task.get("status"),
-        transcription=task.get("transcription"),
-        error=task.get("error")
+        transcription=task.get("transcription") if cursor is None else None,
+        error=task.get("error"),
+        queue_position=queue_position(task_id),
+        created_at=task.get("created_at"),
+        started_at=task.get("started_at"),
+        finished_at=task.get("finished_at"),
+        asr_seconds=task.get("asr_seconds"),
+        cache_hit=task.get("cache_hit"),
+        progress=task.get("progress"),
+        duration=task.get("duration"),
+        segments=[render_segment(seg) for seg in segments[cursor:]] if cursor is not None else None,
+        next_cursor=len(segments) if cursor is not None else None,
+        segments_revision=(task.get("segments_revision") or 0) if cursor is not None else None,
+        summary=task.get("summary"),
+        summary_timings=task.get("summary_timings"),
+        batch_task_id=task.get("batch_task_id"),
+        file_tasks=task.get("file_tasks"),
+        batch_stats=task.get("batch_stats"),
+        diarization=task.get("diarization"),
+        hotwords=task.get("hotwords"),
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def job_event_stream(request: Request, task_id: str, cursor: int):
+    """
+    Yield Server-Sent Events for a task until it finishes or the client disconnects:
+    `status` on every status transition, `progress` when progress or queue position
+    change, `segments` with newly published transcript lines (all lines with
+    `replace` set when the published ones were replaced), `summary` with the
+    minutes generated so far (text replacing everything after `offset`), and a final
+    `completed` (with the full transcription and the speaker labels, or the
+    minutes and their timings for summarization jobs, or the file task IDs and
+    throughput statistics for batch jobs) or `failed` event.
+    Subscribers are woken immediately by updates made in this process; updates made
+    by other processes sharing the task store are picked up every JOB_EVENTS_POLL_INTERVAL.
+    """
+    wakeup = asyncio.Event()
+    task_subscribers.setdefault(task_id, set()).add(wakeup)
+    last_status = last_progress = None
+    last_revision = None
+    last_summary = ""
+    last_heartbeat = time.monotonic()
+    try:
+        while True:
+            task = await asyncio.to_thread(task_store.get, task_id)
+            if task is None:
+                yield _sse("failed", {"task_id": task_id, "status": "UNKNOWN", "error": "Task ID not found."})
+                return
+
+            task_status = task.get("status")
+            if task_status != last_status:
+                yield _sse("status", {"task_id": task_id, "status": task_status})
+                last_status = task_status
+
+            progress = {
+                "progress": task.get("progress"),
+                "duration": task.get("duration"),
+                "queue_position": queue_position(task_id),
+            }
+            if progress != last_progress:
+                yield _sse("progress", progress)
+                last_progress = progress
+
+            segments = task.get("segments") or []
+            revision = task.get("segments_revision") or 0
+            if last_revision is not None and revision != last_revision:
+                # The segments sent so far had no speakers; send the diarized ones in their place
+                yield _sse("segments", {
+                    "segments": [render_segment(seg) for seg in segments],
+                    "next_cursor": len(segments),
+                    "replace": True,
+                })
+                cursor = len(segments)
+            elif len(segments) > cursor:
+                yield _sse("segments", {
+                    "segments": [render_segment(seg) for seg in segments[cursor:]],
+                    "next_cursor": len(segments),
+                })
+                cursor = len(segments)
+            last_revision = revision
+
+            summary = task.get("summary") or ""
+            if summary != last_summary:
+                # Cleaned streaming text is append-only except for its last few characters
+                offset = len(os.path.commonprefix([summary, last_summary]))
+                yield _sse("summary", {"offset": offset, "text": summary[offset:]})
+                last_summary = summary
+
+            if task_status == "COMPLETED" and task.get("kind") == "batch":
+                yield _sse("completed", {
+                    "task_id": task_id,
+                    "file_tasks": task.get("file_tasks"),
+                    "batch_stats": task.get("batch_stats"),
+                })
+                return
+            if task_status == "COMPLETED" and task.get("kind") == "summary":
+                yield _sse("completed", {
+                    "task_id": task_id,
+                    "summary": summary,
+                    "timings": task.get("summary_timings"),
+                })
+                return
+            if task_status == "COMPLETED":
+                yield _sse("completed", {
+                    "task_id": task_id,
+                    "transcription": task.get("transcription"),
+                    "speakers": segment_speakers(segments),
+                })
+                return
+            if task_status == "FAILED":
+                yield _sse("failed", {"task_id": task_id, "error": task.get("error")})
+                return
+
+            if await request.is_disconnected():
+                return
+            if time.monotonic() - last_heartbeat >= JOB_EVENTS_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                last_heartbeat = time.monotonic()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=JOB_EVENTS_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+    finally:
+        subscribers = task_subscribers.get(task_id)
+        if subscribers is not None:
+            subscribers.discard(wakeup)
+            if not subscribers:
+                del task_subscribers[task_id]
+
+
+@app.get(
+    "/api/job/{task_id}/events",
+    summary="Stream status, progress and partial results of a task",
+    description=(
+        "Server-Sent Events stream replacing status polling. Emits `status`, `progress`, `segments`, "
+        "`summary` (for summarization jobs), and finally `completed` or `failed`. Pass `cursor` to skip segments the client already has."
+    ),
+)
+async def stream_task_events(
+    request: Request,
+    task_id: str,
+    cursor: int = Query(0, ge=0, description="Number of segments the client already has."),
+):
+    if await asyncio.to_thread(task_store.get, task_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task ID not found.")
+    return StreamingResponse(
+        job_event_stream(request, task_id, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def live_metrics(session: LiveTranscriptionSession, partial_stats: LatencyStats, final_stats: LatencyStats, processing_seconds: float) -> Dict[str, Any]:
+    audio_seconds = session.processed_ms / 1000
+    return {
+        "type": "metrics",
+        "audio_seconds": audio_seconds,
+        "processing_seconds": round(processing_seconds, 3),
+        "rtf": round(processing_seconds / audio_seconds, 3) if audio_seconds else None,
+        "buffered_ms": session.buffered_samples * 1000 // SAMPLE_RATE,
+        "partial_latency": partial_stats.summary(),
+        "final_latency": final_stats.summary(),
+    }
+
+
+@app.websocket("/api/stream")
+async def live_transcription_endpoint(websocket: WebSocket):
+    """
+    Live transcription over WebSocket. The client sends binary frames of 16 kHz mono
+    little-endian int16 PCM and a text message {"type": "stop"} to end the stream.
+    The server replies with JSON messages: `partial` (provisional text of the current
+    utterance), `final` (finished utterance), `metrics` (latency and real-time factor,
+    sent every STREAM_METRICS_INTERVAL_SECONDS and at the end) and `error`.
+    `partial` and `final` carry the structured `segment` and its `text` rendered like
+    format_recognition_result lines.
+    """
+    if streaming_asr_model is None or vad_model is None:
+        await websocket.close(code=1013, reason="Live transcription is not available.")
+        return
+    if len(live_sessions) >= STREAM_MAX_CONNECTIONS:
+        await websocket.close(code=1013, reason="Too many live transcription connections.")
+        return
+
+    # Take the connection slot before the first await, so concurrent connects cannot exceed the limit
+    session = LiveTranscriptionSession(
+        streaming_asr_model,
+        streaming_asr_lock,
+        vad_model,
+        vad_lock,
+        punc_model=punc_model,
+        punc_lock=punc_lock,
+        spk_embedder=spk_embedder,
+        spk_lock=spk_lock,
+        spk_match_threshold=ASR_SPK_MATCH_THRESHOLD,
+        max_segment_ms=int(STREAM_MAX_SEGMENT_SECONDS * 1000),
     )
+    live_sessions.add(session)
+    partial_stats, final_stats = LatencyStats(), LatencyStats()
+    processing_seconds = 0.0
+    max_frame_bytes = int(STREAM_MAX_FRAME_SECONDS * SAMPLE_RATE * 2)
+    try:
+        await websocket.accept()
+        last_metrics = time.monotonic()
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            pcm = message.get("bytes") or b""
+            is_final = False
+            if message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {"type": message["text"].strip()}
+                if control.get("type") == "stop":
+                    is_final = True
+                elif control.get("type") == "metrics":
+                    await websocket.send_json(live_metrics(session, partial_stats, final_stats, processing_seconds))
+                    continue
+            # feed() consumes every complete stride, so a single frame is all the audio a session buffers
+            if len(pcm) > max_frame_bytes:
+                await websocket.send_json({
+                    "type": "error",
+                    "detail": f"Audio frame longer than {STREAM_MAX_FRAME_SECONDS}s; send smaller frames.",
+                })
+                await websocket.close(code=1009)
+                break
+
+            received = time.monotonic()
+            events = await asyncio.to_thread(session.feed, pcm, is_final)
+            done = time.monotonic()
+            processing_seconds += done - received
+            for event in events:
+                latency_ms = (done - received) * 1000
+                (final_stats if event["type"] == "final" else partial_stats).add(latency_ms)
+                await websocket.send_json({
+                    "type": event["type"],
+                    "text": render_segment(event["segment"]),
+                    "segment": event["segment"],
+                    "latency_ms": round(latency_ms, 1),
+                })
+
+            if is_final or done - last_metrics >= STREAM_METRICS_INTERVAL_SECONDS:
+                await websocket.send_json(live_metrics(session, partial_stats, final_stats, processing_seconds))
+                last_metrics = done
+            if is_final:
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_sessions.discard(session)
+        print(f"Live transcription session closed after {session.processed_ms / 1000:.1f}s of audio "
+              f"({final_stats.count} final segments).")
+
+
+@app.get(
+    "/api/cache/stats",
+    response_model=CacheStatsResponse,
+    summary="Get transcription cache statistics",
+)
+async def get_cache_stats():
+    if asr_cache is None:
+        return CacheStatsResponse(enabled=False)
+    return CacheStatsResponse(enabled=True, **await asyncio.to_thread(asr_cache.stats))
+
+@app.get(
+    "/api/summarize/cache/stats",
+    response_model=CacheStatsResponse,
+    summary="Get LLM answer cache statistics",
+)
+async def get_llm_cache_stats():
+    if llm_cache is None:
+        return CacheStatsResponse(enabled=False)
+    return CacheStatsResponse(enabled=True, **await asyncio.to_thread(llm_cache.stats))
+
+@app.get("/healthz", summary="Liveness probe")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get(
+    "/readyz",
+    response_model=ReadinessResponse,
+    summary="Readiness probe",
+    description="200 once the ASR models are loaded and warmed up, 503 while loading, after a failure, or when ASR is unavailable and ASR_REQUIRED is set. Lists the state and load time of every model component.",
+    responses={503: {"model": ReadinessResponse}},
+)
+async def readyz():
+    asr_state = model_status.get("asr", {}).get("state")
+    asr_ready = asr_state == "ready" and asr_queue is not None and (inference_pool is None or inference_pool.healthy)
+    ready = not models_loading and (asr_ready or (asr_state == "disabled" and not ASR_REQUIRED))
+    body = ReadinessResponse(ready=ready, loading=models_loading, startup_seconds=startup_seconds, components=model_status)
+    if ready:
+        return body
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body.model_dump())
 
 @app.get("/")
 async def read_root():
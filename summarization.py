@@ -0,0 +1,577 @@
+"""
+Meeting-minutes generation, run by the backend as summarization jobs.
+
+Transcripts that fit into LLM_CONTEXT_TOKENS are summarized with a single
+prompt as before. Longer transcripts are split on speaker-turn lines into
+chunks, every chunk is condensed into partial notes concurrently (map), and
+the notes are merged by the minutes template (reduce). Notes that are still
+too long are condensed again, so the transcript length only affects the number
+of LLM calls, not whether a prompt fits.
+"""
+import asyncio
+import contextlib
+import datetime
+import hashlib
+import json
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from cache import DiskLRUCache, make_cache_key
+
+# Rough token estimate: CJK characters are about one token each, other text about four characters per token
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+# Places where an overlong single turn may be cut
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[。！？!?；;.])\s*")
+
+
+# Upstream answers worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Optional llm_config entries passed through to the chat completion request
+SAMPLING_PARAMS = ("temperature", "top_p", "max_tokens")
+
+
+class LLMResponseError(Exception):
+    """The LLM API answered, but without usable content."""
+
+
+def estimate_tokens(text: str) -> int:
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_turn(turn: str, max_tokens: int) -> List[str]:
+    """Split one overlong speaker turn at sentence ends, falling back to hard cuts."""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END_PATTERN.split(turn):
+        while estimate_tokens(sentence) > max_tokens:
+            # No sentence boundary to use; cut by characters (one char is at most one token)
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_tokens])
+            sentence = sentence[max_tokens:]
+        if current and estimate_tokens(current + sentence) > max_tokens:
+            pieces.append(current)
+            current = ""
+        current += sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most max_tokens (estimated), cutting
+    only between lines, i.e. between speaker turns. A single turn longer than
+    max_tokens is cut at sentence ends.
+    """
+    chunks: List[str] = []
+    lines: List[str] = []
+    used = 0
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        tokens = estimate_tokens(line) + 1
+        if tokens > max_tokens:
+            parts = _split_turn(line, max_tokens)
+        else:
+            parts = [line]
+        for part in parts:
+            tokens = estimate_tokens(part) + 1
+            if lines and used + tokens > max_tokens:
+                chunks.append("\n".join(lines))
+                lines, used = [], 0
+            lines.append(part)
+            used += tokens
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+def _minutes_prompt_zh(info: dict, formatted_transcription: str) -> str:
+    topic = info['topic'] or '未指定主题'
+    date_str = info['date'].strftime('%Y年%m月%d日')
+    time_s = info['time'].strftime('%H:%M')
+    loc = info['location'] or '未指定地点'
+    example_date_1 = (datetime.date.today() + datetime.timedelta(days=10)).strftime('%Y-%m-%d')
+    example_date_2 = (datetime.date.today() + datetime.timedelta(days=15)).strftime('%Y-%m-%d')
+
+    return f"""
+下面是一段会议录音的转写文本（已按发言人分离，但可能存在少量错译和说话者识别误差）。请你根据以下要求，生成一份高质量的会议纪要（Markdown格式）：
+
+1. **自动校正**：修正明显的错别字、口语冗余和翻译失误。
+2. **说话者融合**：如果发现同一内容被拆分，应合并；说话者标识不准确时，请根据上下文合并或统一标记为“某某（未知）”。
+3. **结构清晰**：
+   - 标题层级：`# 会议纪要`、`## 基本信息`、`## 主要讨论内容`、`## 会议决议/结论`、`## 行动项`
+   - 要点使用无序列表 `-` 或有序列表 `1.`
+   - 关键术语、决策或数据用**加粗**突出
+4. **详细度**：
+   - “主要讨论内容”中，列出 3–5 个议题，每个议题下简要总结讨论要点（2–3 行）。
+   - “会议决议/结论”中，明确达成的结论或决定。
+   - “行动项”中，为每条行动添加负责人与**建议**的完成期限格式：`- [负责人姓名] — 在 YYYY-MM-DD 前完成：任务描述`。 如果原文中未提及具体负责人或日期，请留空或写“待定”。
+
+**会议基本信息**
+- 主题：{topic}
+- 时间：{date_str} {time_s}
+- 地点：{loc}
+
+**会议内容（转写文本）：**
+{formatted_transcription}
+
+---
+请基于以上信息生成会议纪要：
+# 会议纪要
+## 基本信息
+- **主题**: {topic}
+- **时间**: {date_str} {time_s}
+- **地点**: {loc}
+- **参会人员**: (如果转写文本中能识别，请列出；否则留空或写“未记录”)
+
+## 主要讨论内容
+(请根据会议内容填写，每个议题后附上主要发言人的讨论摘要)
+1. **议题一**：...
+   - [发言人A]: ...
+   - [发言人B]: ...
+2. **议题二**：...
+3. **议题三**：...
+
+## 会议决议/结论
+(请根据会议内容明确总结)
+- ...
+- ...
+
+## 行动项
+(请按格式填写，如无明确负责人/日期则留空或标注“待定”)
+- [张三] — 在 {example_date_1} 前完成：整理会议资料并分发
+- [李四] — 在 {example_date_2} 前完成：与供应商确认下一步细节
+"""
+
+
+def _minutes_prompt_en(info: dict, formatted_transcription: str) -> str:
+    topic = info['topic'] or 'Untitled Topic'
+    # Format date and time for an English audience if necessary, though current format is universal
+    date_str = info['date'].strftime('%Y-%m-%d') # Standard international format
+    time_s = info['time'].strftime('%H:%M')
+    loc = info['location'] or 'Not specified'
+    example_date_1 = (datetime.date.today() + datetime.timedelta(days=10)).strftime('%Y-%m-%d')
+    example_date_2 = (datetime.date.today() + datetime.timedelta(days=15)).strftime('%Y-%m-%d')
+
+    return f"""
+The following is the transcribed text of a meeting recording (separated by speaker, but may contain minor inaccuracies and speaker identification errors). Please generate a high-quality meeting minutes document (Markdown format) according to the following requirements:
+
+1.  **Auto-correction**: Correct obvious typos, colloquial redundancies, and minor grammatical errors.
+2.  **Speaker Consolidation**: If the same content appears split under slightly different speaker variations that seem to be the same person, it should be merged. If speaker identification is clearly inaccurate for a segment, please use context to assign it to the correct speaker or mark as "Unknown Speaker" if context is insufficient.
+3.  **Clear Structure**:
+    - Heading levels: Use `# Meeting Minutes`, `## Basic Information`, `## Main Discussion Points`, `## Resolutions/Conclusions`, `## Action Items`.
+    - Use unordered lists (`-`) or ordered lists (`1.`) for key points.
+    - Highlight key terms, decisions, or data using **bold**.
+4.  **Level of Detail**:
+    - In "Main Discussion Points", list 3–5 main topics. For each topic, briefly summarize the key discussion points (2–3 lines).
+    - In "Resolutions/Conclusions", clearly state the conclusions, decisions, or agreements reached.
+    - In "Action Items", for each action, specify the responsible person and a **suggested** completion deadline in the format: `- [Person's Name] — By YYYY-MM-DD: Task description`. If the original text does not mention a specific person or date, leave it blank, write "To be determined", or infer reasonably if possible.
+
+**Meeting Basic Information**
+- Topic: {topic}
+- Time: {date_str} {time_s}
+- Location: {loc}
+
+**Meeting Content (Transcribed Text):**
+{formatted_transcription}
+
+---
+Please generate the meeting minutes based on the information above:
+# Meeting Minutes
+
+## Basic Information
+- **Topic**: {topic}
+- **Time**: {date_str} {time_s}
+- **Location**: {loc}
+- **Attendees**: (If identifiable from the transcript, please list them. Otherwise, leave blank or write "Not recorded")
+
+## Main Discussion Points
+(Fill in according to the meeting content. For each topic, provide a summary of discussions, attributing points to speakers where possible.)
+1.  **Topic One**: ...
+    - [Speaker A's Name or Role]: ...
+    - [Speaker B's Name or Role]: ...
+2.  **Topic Two**: ...
+3.  **Topic Three**: ...
+
+## Resolutions/Conclusions
+(Clearly summarize the outcomes based on the meeting content.)
+- ...
+- ...
+
+## Action Items
+(Fill in according to the format. If no clear responsible person/date, use "To be determined" or omit that part.)
+- [John Doe] — By {example_date_1}: Compile and distribute meeting materials.
+- [Jane Smith] — By {example_date_2}: Confirm next steps with the supplier.
+"""
+
+
+def generate_summary_prompt(info: dict, formatted_transcription: str, lang: str = "zh") -> str:
+    if lang == "en":
+        return _minutes_prompt_en(info, formatted_transcription)
+    return _minutes_prompt_zh(info, formatted_transcription)
+
+
+def _partial_notes_prompt(info: dict, chunk: str, index: int, total: int, lang: str, from_notes: bool = False) -> str:
+    topic = info['topic'] or ('Untitled Topic' if lang == "en" else '未指定主题')
+    if lang == "en":
+        material = (
+            "notes already taken from consecutive parts of a meeting" if from_notes else
+            "the transcript of a meeting (separated by speaker, but may contain minor inaccuracies and speaker identification errors)"
+        )
+        return f"""
+The following is part {index} of {total} of {material} on "{topic}".
+Condense this part into concise notes in Markdown for later merging into the full meeting minutes:
+- Topics discussed, with the key points each speaker made (keep speaker names)
+- Decisions or conclusions reached
+- Action items, with responsible person and deadline if mentioned
+Keep concrete facts, numbers and dates. Do not add a title or anything that is not in this part.
+
+**Part {index}/{total}:**
+{chunk}
+"""
+    material = "按时间顺序分段整理的会议要点" if from_notes else "会议录音转写文本（已按发言人分离，但可能存在少量错译和说话者识别误差）"
+    return f"""
+下面是主题为“{topic}”的{material}的第 {index}/{total} 部分。
+请将这一部分整理为简洁的 Markdown 要点，供之后合并为完整的会议纪要：
+- 讨论的议题，以及各发言人的主要观点（保留发言人姓名）
+- 达成的决议或结论
+- 行动项（如提及，注明负责人与期限）
+保留具体的事实、数字和日期。不要添加标题，也不要加入本部分没有的内容。
+
+**第 {index}/{total} 部分：**
+{chunk}
+"""
+
+
+def _merged_notes(notes: List[str], lang: str) -> str:
+    """Stand-in for the transcript in the minutes prompt, built from partial notes."""
+    if lang == "en":
+        header = "(The transcript was too long for one prompt; below are notes of its consecutive parts, in chronological order.)"
+        parts = [f"### Part {i}\n{note}" for i, note in enumerate(notes, start=1)]
+    else:
+        header = "（转写文本过长，以下为按时间顺序分段整理的会议要点。）"
+        parts = [f"### 第 {i} 部分\n{note}" for i, note in enumerate(notes, start=1)]
+    return "\n\n".join([header] + parts)
+
+
+def clean_llm_output(content: str) -> str:
+    content = content.split("</think>\n")[-1] if "</think>" in content else content
+    content = re.sub(r'^```markdown\s*', '', content, flags=re.IGNORECASE)
+    content = re.sub(r'\s*```$', '', content, flags=re.IGNORECASE)
+    return content.strip()
+
+
+class StreamingOutputCleaner:
+    """
+    Applies clean_llm_output to a completion while it is still streaming.
+    Nothing is shown while a leading <think> block or a possible opening
+    ```markdown fence is incomplete. Once the start of the answer is known it is
+    fixed, and each delta only re-checks the tail for a (partial) closing fence.
+    The text returned after the last delta matches clean_llm_output.
+    """
+
+    _TAIL = 32
+
+    def __init__(self):
+        self.raw = ""
+        self._start: Optional[int] = None
+
+    def feed(self, delta: str) -> str:
+        self.raw += delta
+        if self._start is None:
+            self._start = self._find_start()
+            if self._start is None:
+                return ""
+        body = self.raw[self._start:]
+        head, tail = body[:-self._TAIL], body[-self._TAIL:]
+        tail = re.sub(r'\s*`{1,3}$', '', tail)
+        return (head + tail).strip()
+
+    def finish(self) -> str:
+        return clean_llm_output(self.raw)
+
+    def _find_start(self) -> Optional[int]:
+        raw = self.raw
+        start = 0
+        if "</think>" in raw:
+            if raw.endswith("</think>"):
+                return None
+            end = raw.rfind("</think>\n")
+            start = end + len("</think>\n") if end != -1 else 0
+        elif raw.lstrip().startswith("<think>") or "<think>".startswith(raw.lstrip()):
+            # Empty output or (the start of) a reasoning block that is still being written
+            return None
+        rest = raw[start:]
+        if "```markdown".startswith(rest.lower()):
+            return None
+        fence = re.match(r'```markdown\s*', rest, flags=re.IGNORECASE)
+        return start + fence.end() if fence else start
+
+
+async def _iter_completion_deltas(res: httpx.Response) -> AsyncIterator[str]:
+    """Content deltas of an OpenAI-compatible streamed chat completion (SSE)."""
+    if not res.headers.get('Content-Type', '').startswith('text/event-stream'):
+        # The server ignored "stream"; treat the whole answer as one delta
+        await res.aread()
+        yield _message_content(res.json())
+        return
+    async for line in res.aiter_lines():
+        if not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return
+        chunk = json.loads(data)
+        if chunk.get('error'):
+            raise LLMResponseError(str(chunk['error']))
+        for choice in chunk.get('choices') or []:
+            content = (choice.get('delta') or {}).get('content')
+            if content:
+                yield content
+
+
+def _message_content(response_data: Dict[str, Any]) -> str:
+    if not response_data.get('choices'):
+        raise LLMResponseError(str(response_data.get('error', response_data)))
+    return response_data['choices'][0].get('message', {}).get('content', '') or ''
+
+
+class LLMClient:
+    """
+    Async client for OpenAI-compatible chat completion endpoints, shared by all
+    summarization jobs of the process. One pooled httpx.AsyncClient is reused for
+    every call; concurrent requests are capped per endpoint URL; 429/5xx answers
+    and connection errors are retried with exponential backoff (honouring
+    Retry-After); cleaned answers are cached by model, prompt hash and sampling
+    parameters. use_cache=False skips the lookup but still stores the new answer.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_seconds: float = 2.0,
+        timeout: float = 180,
+        max_connections: int = 20,
+        cache: Optional[DiskLRUCache] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.cache = cache
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=10),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _limit(self, api_url: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(api_url)
+        if semaphore is None:
+            semaphore = self._semaphores[api_url] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _retry_delay(self, attempt: int, res: Optional[httpx.Response] = None) -> float:
+        retry_after = res.headers.get('Retry-After') if res is not None else None
+        if retry_after:
+            with contextlib.suppress(ValueError):
+                return float(retry_after)
+        return self.backoff_seconds * (2 ** attempt)
+
+    @staticmethod
+    def _request(llm_config: dict, prompt: str, stream: bool) -> Dict[str, Any]:
+        payload = {
+            'model': llm_config['model_name'],
+            'messages': [{'role': 'user', 'content': prompt}],
+        }
+        for param in SAMPLING_PARAMS:
+            if llm_config.get(param) is not None:
+                payload[param] = llm_config[param]
+        if stream:
+            payload['stream'] = True
+        headers = {'Content-Type': 'application/json'}
+        if llm_config.get('api_key'):
+            headers['Authorization'] = f"Bearer {llm_config['api_key']}"
+        return {'url': llm_config['api_url'], 'headers': headers, 'json': payload}
+
+    @staticmethod
+    def cache_key(llm_config: dict, prompt: str) -> str:
+        sampling = {param: llm_config.get(param) for param in SAMPLING_PARAMS}
+        return make_cache_key("llm", llm_config['model_name'], hashlib.sha256(prompt.encode('utf-8')).hexdigest(), sampling)
+
+    async def _cached(self, key: str, use_cache: bool) -> Optional[str]:
+        if self.cache is None or not use_cache:
+            return None
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _store(self, key: str, content: str) -> None:
+        if self.cache is not None and content:
+            await asyncio.to_thread(self.cache.set, key, content)
+
+    async def complete(self, llm_config: dict, prompt: str, use_cache: bool = True) -> str:
+        key = self.cache_key(llm_config, prompt)
+        cached = await self._cached(key, use_cache)
+        if cached is not None:
+            return cached
+        request = self._request(llm_config, prompt, stream=False)
+        async with self._limit(request['url']):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    res = await self._client.post(**request)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    print(f"LLM request failed ({e!r}), retrying in {delay:.1f}s...")
+                else:
+                    if res.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                        res.raise_for_status()
+                        break
+                    delay = self._retry_delay(attempt, res)
+                    print(f"LLM endpoint returned HTTP {res.status_code}, retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+        content = clean_llm_output(_message_content(res.json()))
+        await self._store(key, content)
+        return content
+
+    async def stream(
+        self,
+        llm_config: dict,
+        prompt: str,
+        on_text: Optional[Callable[[str], None]] = None,
+        render_interval: float = 0.5,
+        use_cache: bool = True,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Streaming variant of complete(). on_text receives the cleaned text so far,
+        at most every render_interval seconds and once more at the end. Returns the
+        cleaned answer and its timings (time to first token and total time).
+        A failed attempt is only retried if no token has been received yet.
+        """
+        started = time.perf_counter()
+        key = self.cache_key(llm_config, prompt)
+        cached = await self._cached(key, use_cache)
+        if cached is not None:
+            if on_text:
+                on_text(cached)
+            return cached, {"ttft_seconds": 0.0, "total_seconds": time.perf_counter() - started, "cached": True}
+
+        request = self._request(llm_config, prompt, stream=True)
+        first_token_at = None
+        async with self._limit(request['url']):
+            for attempt in range(self.max_retries + 1):
+                cleaner = StreamingOutputCleaner()
+                last_render = 0.0
+                try:
+                    async with self._client.stream("POST", **request) as res:
+                        if res.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                            delay = self._retry_delay(attempt, res)
+                            print(f"LLM endpoint returned HTTP {res.status_code}, retrying in {delay:.1f}s...")
+                        else:
+                            if res.is_error:
+                                await res.aread()
+                                res.raise_for_status()
+                            async for delta in _iter_completion_deltas(res):
+                                now = time.perf_counter()
+                                if first_token_at is None:
+                                    first_token_at = now
+                                text = cleaner.feed(delta)
+                                if on_text and text and now - last_render >= render_interval:
+                                    on_text(text)
+                                    last_render = now
+                            break
+                except httpx.TransportError as e:
+                    if first_token_at is not None or attempt == self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    print(f"LLM request failed ({e!r}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+        content = cleaner.finish()
+        if on_text:
+            on_text(content)
+        await self._store(key, content)
+        timings = {
+            "ttft_seconds": first_token_at - started if first_token_at is not None else None,
+            "total_seconds": time.perf_counter() - started,
+            "cached": False,
+        }
+        return content, timings
+
+
+async def summarize_transcript(
+    client: LLMClient,
+    info: dict,
+    transcript: str,
+    llm_config: dict,
+    lang: str = "zh",
+    context_tokens: int = 24000,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+    use_cache: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Generate meeting minutes for a transcript of any length.
+    context_tokens is the transcript budget of one prompt (the template itself
+    and the model's answer need room on top of it). Partial notes are requested
+    concurrently, limited by the client's per-endpoint cap; on_progress(done, total)
+    is called after every finished LLM call. The final minutes are streamed;
+    on_text receives the cleaned text generated so far. use_cache=False
+    regenerates every answer instead of reusing cached ones.
+    Returns the minutes and timings of the run.
+    """
+    started = time.perf_counter()
+    notes = [transcript]
+    from_notes = False
+    done = planned = 0
+    while estimate_tokens("\n\n".join(notes)) > context_tokens:
+        chunks = split_transcript(_merged_notes(notes, lang) if from_notes else transcript, context_tokens)
+        if from_notes and len(chunks) >= len(notes):
+            # Condensing would not shrink the notes any further; merge what we have
+            break
+        planned += len(chunks)
+
+        async def condense(index: int, chunk: str) -> Tuple[int, str]:
+            prompt = _partial_notes_prompt(info, chunk, index + 1, len(chunks), lang, from_notes)
+            return index, await client.complete(llm_config, prompt, use_cache)
+
+        results: Dict[int, str] = {}
+        tasks = [asyncio.ensure_future(condense(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                index, note = await future
+                results[index] = note
+                done += 1
+                if on_progress:
+                    on_progress(done, planned + 1)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        notes = [results[i] for i in range(len(chunks))]
+        from_notes = True
+
+    source = _merged_notes(notes, lang) if from_notes else transcript
+    map_seconds = time.perf_counter() - started
+    summary, timings = await client.stream(
+        llm_config, generate_summary_prompt(info, source, lang), on_text, use_cache=use_cache
+    )
+    if on_progress:
+        on_progress(planned + 1, planned + 1)
+    timings.update(
+        llm_calls=planned + 1,
+        map_seconds=map_seconds if planned else 0.0,
+        total_seconds=time.perf_counter() - started,
+        generation_seconds=timings["total_seconds"],
+    )
+    return summary, timings
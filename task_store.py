@@ -0,0 +1,255 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Tasks in one of these states are never touched again by a worker and may be evicted
+FINISHED_STATUSES = ("COMPLETED", "FAILED")
+
+
+class TaskStore(ABC):
+    """
+    Storage interface for task records. A record is a flat JSON-serializable dict
+    that always carries "task_id" and "status"; the store adds "created_at",
+    "updated_at" and, once the task reaches a finished status, "finished_at".
+    """
+
+    def __init__(self, ttl_seconds: float = 0, max_finished: int = 0):
+        # ttl_seconds / max_finished <= 0 disable the respective eviction rule
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+
+    @abstractmethod
+    def create(self, task_id: str, **fields: Any) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def update(self, task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Merge fields into an existing record. Returns the new record, or None if unknown."""
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def list_unfinished(self) -> list[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def evict(self) -> int:
+        """Apply the age/size policy to finished tasks. Returns the number of evicted tasks."""
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _stamp(record: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        record.update(fields)
+        record["updated_at"] = now
+        if record.get("status") in FINISHED_STATUSES and not record.get("finished_at"):
+            record["finished_at"] = now
+        return record
+
+
+class MemoryTaskStore(TaskStore):
+    """Process-local store with LRU eviction by count and TTL eviction by age."""
+
+    def __init__(self, ttl_seconds: float = 0, max_finished: int = 0):
+        super().__init__(ttl_seconds, max_finished)
+        self._tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, task_id: str, **fields: Any) -> Dict[str, Any]:
+        record = {"task_id": task_id, "status": "CREATED", "created_at": time.time()}
+        self._stamp(record, fields)
+        with self._lock:
+            self._tasks[task_id] = record
+            self._tasks.move_to_end(task_id)
+        self.evict()
+        return dict(record)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._tasks.get(task_id)
+            if record is None:
+                return None
+            self._tasks.move_to_end(task_id)
+            return dict(record)
+
+    def update(self, task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._tasks.get(task_id)
+            if record is None:
+                return None
+            self._stamp(record, fields)
+            self._tasks.move_to_end(task_id)
+            return dict(record)
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+    def list_unfinished(self) -> list[Dict[str, Any]]:
+        with self._lock:
+            return [dict(r) for r in self._tasks.values() if r.get("status") not in FINISHED_STATUSES]
+
+    def evict(self) -> int:
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            finished = [tid for tid, r in self._tasks.items() if r.get("status") in FINISHED_STATUSES]
+            for tid in finished:
+                if self.ttl_seconds > 0 and now - self._tasks[tid]["finished_at"] > self.ttl_seconds:
+                    del self._tasks[tid]
+                    evicted += 1
+            finished = [tid for tid in finished if tid in self._tasks]
+            # OrderedDict is kept in access order, so the head is least recently used
+            if self.max_finished > 0 and len(finished) > self.max_finished:
+                for tid in finished[:len(finished) - self.max_finished]:
+                    del self._tasks[tid]
+                    evicted += 1
+        return evicted
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    SQLite-backed store in WAL mode, safe to share between processes on one host
+    (e.g. several uvicorn workers, or API and ASR workers in separate processes).
+    Evicted tasks are moved to the tasks_archive table when archive=True.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 0, max_finished: int = 0, archive: bool = False):
+        super().__init__(ttl_seconds, max_finished)
+        self.path = path
+        self.archive = archive
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for table in ("tasks", "tasks_archive"):
+                conn.execute(
+                    f"""CREATE TABLE IF NOT EXISTS {table} (
+                        task_id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        finished_at REAL
+                    )"""
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_finished ON tasks (finished_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, conn: sqlite3.Connection, record: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, status, data, created_at, updated_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                record["task_id"],
+                record["status"],
+                json.dumps(record, ensure_ascii=False),
+                record["created_at"],
+                record["updated_at"],
+                record.get("finished_at"),
+            ),
+        )
+
+    def create(self, task_id: str, **fields: Any) -> Dict[str, Any]:
+        record = {"task_id": task_id, "status": "CREATED", "created_at": time.time()}
+        self._stamp(record, fields)
+        conn = self._conn()
+        with conn:
+            self._write(conn, record)
+        return record
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent
+        # read-modify-write cycles from other processes cannot interleave
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            record = self._stamp(json.loads(row[0]), fields)
+            self._write(conn, record)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def delete(self, task_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def list_unfinished(self) -> list[Dict[str, Any]]:
+        rows = self._conn().execute("SELECT data FROM tasks WHERE finished_at IS NULL").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def evict(self) -> int:
+        conn = self._conn()
+        conditions = []
+        params: list[Any] = []
+        if self.ttl_seconds > 0:
+            conditions.append("finished_at < ?")
+            params.append(time.time() - self.ttl_seconds)
+        if self.max_finished > 0:
+            conditions.append(
+                "task_id NOT IN (SELECT task_id FROM tasks WHERE finished_at IS NOT NULL "
+                "ORDER BY updated_at DESC LIMIT ?)"
+            )
+            params.append(self.max_finished)
+        if not conditions:
+            return 0
+        where = f"finished_at IS NOT NULL AND ({' OR '.join(conditions)})"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.archive:
+                conn.execute(f"INSERT OR REPLACE INTO tasks_archive SELECT * FROM tasks WHERE {where}", params)
+            evicted = conn.execute(f"DELETE FROM tasks WHERE {where}", params).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return evicted
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_task_store(backend: str, path: str, ttl_seconds: float = 0, max_finished: int = 0, archive: bool = False) -> TaskStore:
+    backend = backend.lower()
+    if backend == "sqlite":
+        return SQLiteTaskStore(path, ttl_seconds=ttl_seconds, max_finished=max_finished, archive=archive)
+    if backend == "memory":
+        return MemoryTaskStore(ttl_seconds=ttl_seconds, max_finished=max_finished)
+    raise ValueError(f"Unknown task store backend: {backend!r} (expected 'sqlite' or 'memory').")
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# main.py reads its settings and opens its stores on import, so point them at a
+# scratch directory before any test module imports it
+_data_dir = tempfile.mkdtemp(prefix="meeting-note-tests-")
+for name, path in {
+    "TASK_STORE_PATH": "tasks.sqlite3",
+    "UPLOAD_DIR": "uploads",
+    "ASR_CACHE_PATH": "asr_cache.sqlite3",
+    "LLM_CACHE_PATH": "llm_cache.sqlite3",
+    "ASR_DECODE_CACHE_DIR": "decoded",
+    "ASR_HOTWORD_DIR": "hotwords",
+}.items():
+    os.environ[name] = os.path.join(_data_dir, path)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client for the API with a stand-in ASR model and an empty queue of 2 jobs; startup (model loading) does not run."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(main, "asr_model", object())
+    monkeypatch.setattr(main, "asr_queue", main.JobQueue(2))
+    return TestClient(main.app)
@@ -0,0 +1,72 @@
+import hashlib
+import io
+
+import main
+from hotwords import compile_hotwords
+from main import asr_cache_key
+
+AUDIO = "ab" * 32
+
+
+def test_key_is_stable():
+    assert asr_cache_key(AUDIO) == asr_cache_key(AUDIO)
+    assert asr_cache_key(AUDIO, hotwords=compile_hotwords(["FunASR"])) == asr_cache_key(
+        AUDIO, hotwords=compile_hotwords([" FunASR ", "FunASR"])
+    )
+
+
+def test_key_covers_audio_hotwords_and_diarization():
+    keys = {
+        asr_cache_key(AUDIO, diarize="true"),
+        asr_cache_key(AUDIO, diarize="false"),
+        asr_cache_key(AUDIO, diarize="auto"),
+        asr_cache_key("cd" * 32, diarize="true"),
+        asr_cache_key(AUDIO, hotwords=compile_hotwords(["FunASR"]), diarize="true"),
+        asr_cache_key(AUDIO, hotwords=compile_hotwords(["Paraformer"]), diarize="true"),
+    }
+    assert len(keys) == 6
+
+
+def test_key_covers_models_and_backend(monkeypatch):
+    key = asr_cache_key(AUDIO)
+    monkeypatch.setattr(main, "ASR_MODEL_NAME", "another-model")
+    model_key = asr_cache_key(AUDIO)
+    monkeypatch.setattr(main, "ASR_BACKEND", "onnx")
+    assert len({key, model_key, asr_cache_key(AUDIO)}) == 3
+
+
+def test_speaker_model_only_matters_when_diarizing(monkeypatch):
+    keys = asr_cache_key(AUDIO, diarize="false"), asr_cache_key(AUDIO, diarize="true")
+    monkeypatch.setattr(main, "ASR_SPK_MODEL", "another-speaker-model")
+    assert asr_cache_key(AUDIO, diarize="false") == keys[0]
+    assert asr_cache_key(AUDIO, diarize="true") != keys[1]
+
+
+def test_cached_audio_completes_without_queueing(client):
+    data = b"RIFF cached"
+    res = [{"sentence_info": [{"text": "你好。", "start": 0, "end": 1000, "spk": 0}]}]
+    main.asr_cache.set(asr_cache_key(hashlib.sha256(data).hexdigest()), res)
+    response = client.post("/api/transcribe", files={"file": ("meeting.wav", io.BytesIO(data), "audio/wav")})
+    assert response.status_code == 202
+    assert response.json()["status"] == "COMPLETED"
+    assert len(main.asr_queue) == 0
+    task = client.get(f"/api/job/{response.json()['task_id']}").json()
+    assert task["transcription"] == "说话人 0 [0.00s - 1.00s]: 你好。"
+
+
+def test_cached_audio_by_hash(client):
+    audio_sha256 = hashlib.sha256(b"RIFF known").hexdigest()
+    assert client.post(f"/api/transcribe/hash/{audio_sha256}").status_code == 404
+    res = [{"sentence_info": [{"text": "再见。", "start": 0, "end": 1000, "spk": 1}]}]
+    main.asr_cache.set(asr_cache_key(audio_sha256), res)
+    response = client.post(f"/api/transcribe/hash/{audio_sha256}")
+    assert response.json()["status"] == "COMPLETED"
+    task = client.get(f"/api/job/{response.json()['task_id']}").json()
+    assert task["transcription"] == "说话人 1 [0.00s - 1.00s]: 再见。"
+    assert task["cache_hit"] is True
+
+
+def test_cache_stats(client):
+    stats = client.get("/api/cache/stats").json()
+    assert stats["enabled"] is True
+    assert stats["entries"] >= 0
@@ -0,0 +1,29 @@
+import pytest
+
+from hotwords import HotwordStore, compile_hotwords, normalize_hotwords
+
+
+def test_normalize_keeps_phrases_and_order():
+    words = ["  Meeting   Note ", "ＦｕｎＡＳＲ", "", "# comment", "FunASR", "Meeting Note"]
+    assert normalize_hotwords(words) == ["Meeting Note", "FunASR"]
+
+
+def test_compile_version_depends_on_normalized_words():
+    compiled = compile_hotwords(["FunASR", "Paraformer"], profile="team")
+    assert compiled["profile"] == "team"
+    assert compiled["count"] == 2
+    assert compiled["words"] == ["FunASR", "Paraformer"]
+    assert compile_hotwords(["FunASR ", "Paraformer", "FunASR"])["version"] == compiled["version"]
+    assert compile_hotwords(["Paraformer", "FunASR"])["version"] != compiled["version"]
+
+
+def test_store_profiles_and_resolve(tmp_path):
+    store = HotwordStore(str(tmp_path), max_words=3)
+    store.save_profile("team", ["FunASR", "Paraformer"])
+    resolved = store.resolve("team", ["CAM++", "FunASR"])
+    assert resolved["words"] == ["FunASR", "Paraformer", "CAM++"]
+    assert store.resolve(None, []) is None
+    with pytest.raises(KeyError):
+        store.resolve("unknown", [])
+    with pytest.raises(ValueError):
+        store.resolve("team", ["one", "two"])
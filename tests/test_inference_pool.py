@@ -0,0 +1,46 @@
+import os
+import time
+
+import pytest
+
+from inference_pool import InferencePool
+
+
+class SleepyModel:
+    def generate(self, input, sleep=0.0, **kwargs):
+        time.sleep(sleep)
+        return [{"text": input, "pid": os.getpid()}]
+
+
+def load_model():
+    return SleepyModel()
+
+
+@pytest.fixture
+def pool():
+    pool = InferencePool(load_model, (), processes=1, timeout=1.0)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def test_jobs_run_in_the_inference_process(pool):
+    result = pool.generate(input="hello")
+    assert result[0]["text"] == "hello"
+    assert result[0]["pid"] != os.getpid()
+
+
+def test_timed_out_job_restarts_its_process(pool):
+    pid = pool.generate(input="first")[0]["pid"]
+    with pytest.raises(RuntimeError, match="did not finish"):
+        pool.generate(input="stuck", sleep=30)
+    result = pool.generate(input="next")
+    assert result[0]["text"] == "next"
+    assert result[0]["pid"] != pid
+    assert pool.healthy
+
+
+def test_failing_job_keeps_the_process(pool):
+    with pytest.raises(RuntimeError, match="TypeError"):
+        pool.generate(input="x", sleep="not a number")
+    assert pool.generate(input="y")[0]["text"] == "y"
@@ -0,0 +1,84 @@
+import json
+import threading
+import uuid
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(main, "JOB_EVENTS_POLL_INTERVAL", 0.05)
+
+
+def create_task(**fields):
+    task_id = uuid.uuid4().hex
+    main.task_store.create(task_id, **fields)
+    return task_id
+
+
+def read_events(response, until=("completed", "failed")):
+    """(event, data) pairs of a Server-Sent Events response, up to the first of the until events."""
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+            if event in until:
+                return
+
+
+def segment(text, start, speaker=None):
+    return {"speaker": speaker, "start": start, "end": start + 1.0, "text": text}
+
+
+def test_completed_task(client):
+    task_id = create_task(
+        status="COMPLETED", transcription="说话人 0 [0.00s - 1.00s]: 你好。", segments=[segment("你好。", 0.0, 0)]
+    )
+    with client.stream("GET", f"/api/job/{task_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = list(read_events(response))
+    assert [event for event, _ in events] == ["status", "progress", "segments", "completed"]
+    assert events[2][1] == {"segments": ["说话人 0 [0.00s - 1.00s]: 你好。"], "next_cursor": 1}
+    assert events[3][1]["speakers"] == [0]
+
+
+def test_cursor_skips_segments_the_client_has(client):
+    task_id = create_task(status="COMPLETED", segments=[segment("一。", 0.0), segment("二。", 1.0)])
+    with client.stream("GET", f"/api/job/{task_id}/events", params={"cursor": 1}) as response:
+        events = dict(read_events(response))
+    assert events["segments"] == {"segments": ["[1.00s - 2.00s]: 二。"], "next_cursor": 2}
+
+
+def test_diarized_segments_replace_the_published_ones(client):
+    task_id = create_task(status="PROCESSING", segments=[segment("一。", 0.0)])
+    # Diarization finishes while the stream is open
+    finish = threading.Timer(0.3, main.task_store.update, args=(task_id,), kwargs={
+        "status": "COMPLETED",
+        "segments": [segment("一。", 0.0, 0), segment("二。", 1.0, 1)],
+        "segments_revision": 1,
+    })
+    finish.start()
+    try:
+        with client.stream("GET", f"/api/job/{task_id}/events") as response:
+            events = [(event, data) for event, data in read_events(response) if event == "segments"]
+    finally:
+        finish.cancel()
+    assert events == [
+        ("segments", {"segments": ["[0.00s - 1.00s]: 一。"], "next_cursor": 1}),
+        ("segments", {
+            "segments": ["说话人 0 [0.00s - 1.00s]: 一。", "说话人 1 [1.00s - 2.00s]: 二。"],
+            "next_cursor": 2,
+            "replace": True,
+        }),
+    ]
+
+
+def test_failed_and_unknown_tasks(client):
+    task_id = create_task(status="FAILED", error="boom")
+    with client.stream("GET", f"/api/job/{task_id}/events") as response:
+        assert list(read_events(response))[-1] == ("failed", {"task_id": task_id, "error": "boom"})
+    assert client.get(f"/api/job/{uuid.uuid4().hex}/events").status_code == 404
@@ -0,0 +1,61 @@
+import asyncio
+import io
+
+import pytest
+
+import main
+from main import JobQueue, QueueFullError
+
+
+def test_lower_priority_first_then_fifo():
+    async def run():
+        queue = JobQueue(0)
+        queue.put_nowait("a", {}, priority=1)
+        queue.put_nowait("b", {}, priority=0)
+        queue.put_nowait("c", {}, priority=1)
+        return [(await queue.get())[0] for _ in range(3)]
+
+    assert asyncio.run(run()) == ["b", "a", "c"]
+
+
+def test_position_follows_serving_order():
+    async def run():
+        queue = JobQueue(0)
+        assert queue.put_nowait("a", {}) == 1
+        assert queue.put_nowait("b", {}, priority=-1) == 1
+        return queue.position("a"), queue.position("b"), queue.position("missing")
+
+    assert asyncio.run(run()) == (2, 1, None)
+
+
+def test_full_queue_rejects_jobs():
+    async def run():
+        queue = JobQueue(2)
+        queue.put_nowait("a", {})
+        queue.put_nowait("b", {})
+        assert queue.full()
+        with pytest.raises(QueueFullError):
+            queue.put_nowait("c", {})
+        await queue.get()
+        queue.put_nowait("c", {})
+        return len(queue)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_transcribe_returns_429_when_queue_is_full(client):
+    files = {"file": ("meeting.wav", io.BytesIO(b"RIFF"), "audio/wav")}
+    first = client.post("/api/transcribe", files=files, params={"hotwords": ["one"]})
+    second = client.post("/api/transcribe", files=files, params={"hotwords": ["two"]})
+    assert first.status_code == second.status_code == 202
+    assert second.json()["queue_position"] == 2
+
+    response = client.post("/api/transcribe", files=files, params={"hotwords": ["three"]})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(main.ASR_RETRY_AFTER_SECONDS)
+
+
+def test_transcribe_returns_503_without_model(client, monkeypatch):
+    monkeypatch.setattr(main, "asr_model", None)
+    response = client.post("/api/transcribe", files={"file": ("meeting.wav", io.BytesIO(b"RIFF"), "audio/wav")})
+    assert response.status_code == 503
@@ -0,0 +1,26 @@
+from summarization import LLMClient
+
+CONFIG = {"api_url": "http://localhost:8001/v1/chat/completions", "model_name": "test-model", "temperature": 0.2}
+
+
+def test_request_without_key_has_no_authorization():
+    request = LLMClient._request({**CONFIG, "api_key": None}, "prompt", stream=False)
+    assert "Authorization" not in request["headers"]
+    assert request["json"] == {
+        "model": "test-model",
+        "messages": [{"role": "user", "content": "prompt"}],
+        "temperature": 0.2,
+    }
+
+
+def test_request_with_key():
+    request = LLMClient._request({**CONFIG, "api_key": "secret"}, "prompt", stream=True)
+    assert request["headers"]["Authorization"] == "Bearer secret"
+    assert request["json"]["stream"] is True
+
+
+def test_cache_key_depends_on_prompt_and_sampling():
+    key = LLMClient.cache_key(CONFIG, "prompt")
+    assert LLMClient.cache_key({**CONFIG, "api_key": "secret"}, "prompt") == key
+    assert LLMClient.cache_key(CONFIG, "other prompt") != key
+    assert LLMClient.cache_key({**CONFIG, "temperature": 0.7}, "prompt") != key
@@ -0,0 +1,75 @@
+from asr_pipeline import assign_speakers
+from transcript_format import TranscriptBuilder, build_segments, format_recognition_result, render_segment, render_srt
+
+RESULT = [{
+    "sentence_info": [
+        {"text": "大家好。", "start": 0, "end": 1200, "spk": 0},
+        {"text": "今天开会。", "start": 1300, "end": 2500, "spk": 0},
+        {"text": "好的。", "start": 2600, "end": 3000, "spk": 1},
+        {"text": " ", "start": 3000, "end": 3100, "spk": 1},
+        {"text": "开始吧。", "start": 3200, "end": 4000, "spk": 0},
+    ]
+}]
+
+
+def test_same_speaker_sentences_are_merged():
+    transcript, speakers = format_recognition_result(RESULT)
+    assert transcript.splitlines() == [
+        "说话人 0 [0.00s - 2.50s]: 大家好。 今天开会。",
+        "说话人 1 [2.60s - 3.00s]: 好的。",
+        "说话人 0 [3.20s - 4.00s]: 开始吧。",
+    ]
+    assert speakers == {0, 1}
+
+
+def test_sentences_without_speaker_get_lines_of_their_own():
+    res = [{"sentence_info": [
+        {"text": "你好。", "start": 0, "end": 1000},
+        {"text": "世界。", "start": 1000, "end": 2000, "spk": None},
+        {"text": "再见。", "start": 2000, "end": 3000, "spk": 2},
+    ]}]
+    transcript, speakers = format_recognition_result(res)
+    assert transcript.splitlines() == [
+        "[0.00s - 1.00s]: 你好。",
+        "[1.00s - 2.00s]: 世界。",
+        "说话人 2 [2.00s - 3.00s]: 再见。",
+    ]
+    assert speakers == {2}
+
+
+def test_builder_agrees_with_formatter():
+    res = [{"sentence_info": [
+        {"text": "你好。", "start": 0, "end": 1000},
+        *RESULT[0]["sentence_info"],
+        {"text": "结束。", "start": 4000, "end": 5000, "spk": None},
+    ]}]
+    transcript, _ = format_recognition_result(res)
+    assert "\n".join(render_segment(seg) for seg in build_segments(res)) == transcript
+
+
+def test_builder_emits_runs_when_the_speaker_changes():
+    builder = TranscriptBuilder()
+    assert builder.feed([{"sentence_info": RESULT[0]["sentence_info"][:2]}]) == []
+    closed = builder.feed([{"sentence_info": RESULT[0]["sentence_info"][2:]}])
+    assert [seg["speaker"] for seg in closed] == [0, 1]
+    assert builder.flush() == [{"speaker": 0, "start": 3.2, "end": 4.0, "text": "开始吧。"}]
+
+
+def test_empty_result():
+    assert format_recognition_result([]) == ("No transcription results were returned.", set())
+    assert format_recognition_result([{"sentence_info": []}]) == ("", set())
+
+
+def test_srt():
+    segments = build_segments(RESULT)
+    assert render_srt(segments).startswith("1\n00:00:00,000 --> 00:00:02,500\n说话人 0: 大家好。 今天开会。\n")
+
+
+def test_assign_speakers_by_overlap_or_nearest_turn():
+    res = [{"sentence_info": [
+        {"text": "一。", "start": 0, "end": 1000},
+        {"text": "二。", "start": 1000, "end": 3000},
+        {"text": "三。", "start": 6000, "end": 6500},
+    ]}]
+    assign_speakers(res, [[1500, 4000, 1], [0, 1500, 0], [7000, 9000, 2]])
+    assert [sent["spk"] for sent in res[0]["sentence_info"]] == [0, 1, 2]
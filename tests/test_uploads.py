@@ -0,0 +1,79 @@
+import hashlib
+
+import main
+
+DATA = b"RIFF" + bytes(range(256)) * 40
+
+
+def start_upload(client, data=DATA, sha256=None):
+    response = client.post("/api/uploads", json={"filename": "meeting.wav", "size": len(data), "sha256": sha256})
+    assert response.status_code == 201
+    return response.json()["upload_id"]
+
+
+def put_chunk(client, upload_id, offset, chunk, checksum=None):
+    return client.put(
+        f"/api/uploads/{upload_id}",
+        params={"offset": offset},
+        content=chunk,
+        headers={"X-Chunk-SHA256": checksum or hashlib.sha256(chunk).hexdigest()},
+    )
+
+
+def upload_all(client, upload_id, data=DATA, chunk_size=4000):
+    for offset in range(0, len(data), chunk_size):
+        assert put_chunk(client, upload_id, offset, data[offset:offset + chunk_size]).status_code == 200
+
+
+def test_chunks_in_any_order_report_missing_ranges(client):
+    upload_id = start_upload(client)
+    response = put_chunk(client, upload_id, 8000, DATA[8000:])
+    assert response.json()["missing"] == [[0, 8000]]
+    put_chunk(client, upload_id, 0, DATA[:4000])
+    status = client.get(f"/api/uploads/{upload_id}").json()
+    assert status["missing"] == [[4000, 8000]]
+    assert status["received_bytes"] == len(DATA) - 4000
+
+
+def test_chunk_checksum_mismatch_is_rejected(client):
+    upload_id = start_upload(client)
+    response = put_chunk(client, upload_id, 0, DATA[:4000], checksum=hashlib.sha256(b"other").hexdigest())
+    assert response.status_code == 400
+    assert client.get(f"/api/uploads/{upload_id}").json()["received_bytes"] == 0
+
+
+def test_incomplete_upload_cannot_be_finalized(client):
+    upload_id = start_upload(client)
+    put_chunk(client, upload_id, 0, DATA[:4000])
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+
+
+def test_finalize_verifies_the_file_checksum(client):
+    upload_id = start_upload(client, sha256=hashlib.sha256(DATA).hexdigest())
+    upload_all(client, upload_id)
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 202
+    task = main.task_store.get(response.json()["task_id"])
+    assert task["audio_sha256"] == hashlib.sha256(DATA).hexdigest()
+    assert client.get(f"/api/uploads/{upload_id}").status_code == 404
+
+
+def test_finalize_with_wrong_checksum_discards_the_upload(client):
+    upload_id = start_upload(client, sha256="0" * 64)
+    upload_all(client, upload_id)
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 400
+    assert client.get(f"/api/uploads/{upload_id}").status_code == 404
+
+
+def test_only_one_finalize_runs(client):
+    upload_id = start_upload(client)
+    upload_all(client, upload_id)
+    # As if another request were still hashing the file
+    assert main.upload_store.claim(upload_id)
+    assert not main.upload_store.claim(upload_id)
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+    assert put_chunk(client, upload_id, 0, DATA[:4000]).status_code == 409
+    assert client.delete(f"/api/uploads/{upload_id}").status_code == 409
+
+    main.upload_store.unclaim(upload_id)
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 202
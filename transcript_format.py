@@ -0,0 +1,188 @@
+import re
+from typing import Any, Dict, List, Set
+
+LINE_TEMPLATE = "说话人 %s [%.2fs - %.2fs]: %s"
+NO_SPEAKER_LINE_TEMPLATE = "[%.2fs - %.2fs]: %s"
+
+
+def format_recognition_result(res) -> tuple[str, Set[str]]:
+    """
+    扁平化所有 sentence_info，然后按时间顺序合并同一说话人连续句子，
+    并且不输出“语音识别结果：”标题，直接以“说话人 X [start-end]: 文本”开头。
+
+    Sentences are collected into columns in a single pass: one flat list of
+    texts plus one entry per same-speaker run (speaker, start, end, offset into
+    the texts). Per-sentence work is limited to the filter and the speaker
+    comparison; seconds conversion, joining and formatting happen once per run,
+    and all lines are rendered by a single %-format call.
+
+    Sentences without speaker ("spk" missing or None, as without diarization)
+    are not merged; each becomes a line of its own without the speaker prefix,
+    and adds nothing to the speakers. This matches TranscriptBuilder.
+    """
+    all_speakers = set()
+    if not res:
+        return "No transcription results were returned.", all_speakers
+
+    texts: list[str] = []
+    run_speakers: list = []
+    run_starts: list = []
+    run_ends: list = []
+    run_offsets: list = []
+    current_speaker = None
+    add_text = texts.append
+    for item in res:
+        for sent in item.get("sentence_info", []):
+            txt = sent.get("text", "").strip()
+            start_ms = sent.get("start")
+            end_ms = sent.get("end")
+            if txt == "" or start_ms is None or end_ms is None:
+                continue
+            spk = sent.get("spk")
+            if spk is not None and spk == current_speaker:
+                run_ends[-1] = end_ms
+            else:
+                if spk is not None:
+                    all_speakers.add(spk)
+                current_speaker = spk
+                run_speakers.append(spk)
+                run_starts.append(start_ms)
+                run_ends.append(end_ms)
+                run_offsets.append(len(texts))
+            add_text(txt)
+    run_offsets.append(len(texts))
+
+    runs = len(run_speakers)
+    if runs == 0:
+        return "", all_speakers
+
+    args: list = [None] * (4 * runs)
+    args[0::4] = run_speakers
+    args[1::4] = [start_ms / 1000 for start_ms in run_starts]
+    args[2::4] = [end_ms / 1000 for end_ms in run_ends]
+    args[3::4] = [" ".join(texts[b:e]) for b, e in zip(run_offsets, run_offsets[1:])]
+    if any(spk is None for spk in run_speakers):
+        return "\n".join(
+            NO_SPEAKER_LINE_TEMPLATE % (start, end, text) if spk is None else LINE_TEMPLATE % (spk, start, end, text)
+            for spk, start, end, text in zip(args[0::4], args[1::4], args[2::4], args[3::4])
+        ), all_speakers
+    return "\n".join([LINE_TEMPLATE] * runs) % tuple(args), all_speakers
+
+
+# FunASR emits one timestamp per CJK character or per latin word/number; punctuation has none
+_WORD_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]|[A-Za-z0-9]+(?:['.-][A-Za-z0-9]+)*")
+
+
+def sentence_words(sent: Dict[str, Any]) -> List[list]:
+    """
+    Word timings of one sentence as compact [start_s, end_s, word] triples.
+    Returns [] when the tokens of the text cannot be aligned one-to-one with
+    the sentence's timestamps.
+    """
+    timestamps = sent.get("timestamp") or []
+    words = _WORD_PATTERN.findall(sent.get("text", ""))
+    if not words or len(words) != len(timestamps):
+        return []
+    return [[ts[0] / 1000, ts[1] / 1000, word] for ts, word in zip(timestamps, words)]
+
+
+def _speaker_prefix(segment: Dict[str, Any], separator: str = " ") -> str:
+    return "" if segment["speaker"] is None else f"说话人 {segment['speaker']}{separator}"
+
+
+def render_segment(segment: Dict[str, Any]) -> str:
+    return f"{_speaker_prefix(segment)}[{segment['start']:.2f}s - {segment['end']:.2f}s]: {segment['text']}"
+
+
+def segment_speakers(segments: List[Dict[str, Any]]) -> List[Any]:
+    """Distinct speaker labels in order of first appearance; segments without speaker are skipped."""
+    return list(dict.fromkeys(seg["speaker"] for seg in segments if seg["speaker"] is not None))
+
+
+def _subtitle_time(seconds: float, separator: str) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def render_srt(segments: List[Dict[str, Any]]) -> str:
+    blocks = [
+        f"{index}\n{_subtitle_time(seg['start'], ',')} --> {_subtitle_time(seg['end'], ',')}\n"
+        f"{_speaker_prefix(seg, ': ')}{seg['text']}\n"
+        for index, seg in enumerate(segments, start=1)
+    ]
+    return "\n".join(blocks)
+
+
+def render_vtt(segments: List[Dict[str, Any]]) -> str:
+    blocks = ["WEBVTT\n"] + [
+        f"{_subtitle_time(seg['start'], '.')} --> {_subtitle_time(seg['end'], '.')}\n"
+        f"{'' if seg['speaker'] is None else '<v 说话人 %s>' % seg['speaker']}{seg['text']}\n"
+        for seg in segments
+    ]
+    return "\n".join(blocks)
+
+
+class TranscriptBuilder:
+    """
+    Incremental counterpart of format_recognition_result: sentences are fed in
+    time order and merged same-speaker runs are emitted as soon as the speaker
+    changes. The run still open at the end is only emitted by flush().
+    With words=True every segment also carries the word timings of its sentences.
+    Sentences without speaker become segments of their own with speaker None.
+    """
+
+    def __init__(self, words: bool = False):
+        self.words = words
+        self._speaker = None
+        self._texts: list[str] = []
+        self._words: list = []
+        self._start = self._end = 0.0
+
+    def feed(self, res) -> List[Dict[str, Any]]:
+        closed = []
+        for item in res or []:
+            for sent in item.get("sentence_info", []):
+                spk = sent.get("spk")
+                txt = sent.get("text", "").strip()
+                start_ms = sent.get("start")
+                end_ms = sent.get("end")
+                if txt == "" or start_ms is None or end_ms is None:
+                    continue
+                # Sentences without speaker are never merged
+                if spk is not None and spk == self._speaker:
+                    self._texts.append(txt)
+                    self._end = end_ms / 1000
+                else:
+                    if self._texts:
+                        closed.append(self._segment())
+                    self._speaker = spk
+                    self._texts = [txt]
+                    self._words = []
+                    self._start = start_ms / 1000
+                    self._end = end_ms / 1000
+                if self.words:
+                    self._words.extend(sentence_words(sent))
+        return closed
+
+    def flush(self) -> List[Dict[str, Any]]:
+        if not self._texts:
+            return []
+        segment = self._segment()
+        self._texts = []
+        self._words = []
+        self._speaker = None
+        return [segment]
+
+    def _segment(self) -> Dict[str, Any]:
+        segment = {"speaker": self._speaker, "start": self._start, "end": self._end, "text": " ".join(self._texts)}
+        if self.words:
+            segment["words"] = self._words
+        return segment
+
+
+def build_segments(res, words: bool = False) -> List[Dict[str, Any]]:
+    builder = TranscriptBuilder(words=words)
+    return builder.feed(res) + builder.flush()
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+import requests
+
+
+def spool_upload(upload: BinaryIO, name: str, content_type: Optional[str], directory: str,
+                 chunk_size: int = 1024 * 1024, ttl_seconds: float = 0) -> Dict[str, Any]:
+    """
+    Copy an uploaded file object to disk in chunk_size pieces, hashing it on the fly.
+    Spooled files are named by content hash, so the same recording uploaded from several
+    sessions is stored once. Spooled files not used for ttl_seconds are removed.
+    Returns a small handle dict (path, name, type, size, sha256) to keep in session state.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if ttl_seconds > 0:
+        remove_stale_spool_files(directory, ttl_seconds)
+    sha256 = hashlib.sha256()
+    size = 0
+    tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    try:
+        upload.seek(0)
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = upload.read(chunk_size)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        digest = sha256.hexdigest()
+        path = os.path.join(directory, digest + (os.path.splitext(name)[1] or ".wav"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {"path": path, "name": name, "type": content_type or "application/octet-stream", "size": size, "sha256": digest}
+
+
+def remove_stale_spool_files(directory: str, ttl_seconds: float) -> int:
+    cutoff = time.time() - ttl_seconds
+    removed = 0
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            # Another session removed or replaced it concurrently
+            pass
+    return removed
+
+
+class MultipartFileStream:
+    """
+    File-like multipart/form-data body holding a single file field, read from disk
+    on demand. requests sends objects with a length and a read() method in blocks
+    with a Content-Length header, so the file is never loaded into memory as a whole.
+    """
+
+    def __init__(self, path: str, field: str, filename: str, content_type: str):
+        self.boundary = uuid.uuid4().hex
+        quoted = filename.replace("\\", "\\\\").replace('"', '\\"')
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{quoted}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+        self._file = open(path, "rb")
+        self._length = len(self._head) + os.fstat(self._file.fileno()).st_size + len(self._tail)
+        self._parts = [self._head, self._file, self._tail]
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        out = b""
+        while self._parts and (size < 0 or len(out) < size):
+            part = self._parts[0]
+            want = -1 if size < 0 else size - len(out)
+            if isinstance(part, bytes):
+                piece = part if want < 0 else part[:want]
+                rest = b"" if want < 0 else part[want:]
+                if rest:
+                    self._parts[0] = rest
+                else:
+                    self._parts.pop(0)
+            else:
+                piece = part.read(want)
+                if not piece or want < 0:
+                    self._parts.pop(0)
+            out += piece
+        return out
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "MultipartFileStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _put_chunk(session: requests.Session, url: str, path: str, offset: int, length: int,
+               retries: int, timeout: Tuple[float, float]) -> None:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    headers = {"X-Chunk-SHA256": hashlib.sha256(data).hexdigest(), "Content-Type": "application/octet-stream"}
+    for attempt in range(retries + 1):
+        try:
+            resp = session.put(url, params={"offset": offset}, data=data, headers=headers, timeout=timeout)
+            if resp.status_code < 500 and resp.status_code != 400:
+                resp.raise_for_status()
+                return
+            # 400 is a checksum mismatch (corrupted in transit), 5xx a backend hiccup; both are retried
+            error: Exception = requests.HTTPError(f"{resp.status_code}: {resp.text}", response=resp)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt < retries:
+            time.sleep(min(2 ** attempt, 30))
+    raise error
+
+
+def upload_resumable(session: requests.Session, base_url: str, audio: Dict[str, Any],
+                     timeout: Tuple[float, float], parallel: int = 4, retries: int = 3,
+                     params: Optional[Dict[str, Any]] = None) -> Optional[requests.Response]:
+    """
+    Upload a spooled file through the backend's resumable upload API and finalize it,
+    passing params (e.g. diarize) as query parameters of the finalize request.
+    The backend's upload ID is kept in the audio handle as "resumable_upload_id"
+    (separate from the frontend's own file identity), so calling this again after a
+    failure only sends the byte ranges the backend is still missing. Returns the
+    finalize response, or None if the backend does not offer the resumable upload API.
+    """
+    status = None
+    if audio.get("resumable_upload_id"):
+        resp = session.get(f"{base_url}/api/uploads/{audio['resumable_upload_id']}", timeout=timeout)
+        if resp.status_code != 404:
+            resp.raise_for_status()
+            status = resp.json()
+    if status is None:
+        resp = session.post(
+            f"{base_url}/api/uploads",
+            json={"filename": audio["name"], "size": audio["size"], "sha256": audio["sha256"]},
+            timeout=timeout,
+        )
+        if resp.status_code in (404, 405):
+            return None
+        resp.raise_for_status()
+        status = resp.json()
+        audio["resumable_upload_id"] = status["upload_id"]
+
+    url = f"{base_url}/api/uploads/{status['upload_id']}"
+    chunk_size = status["chunk_size"]
+    chunks: List[Tuple[int, int]] = []
+    for start, end in status["missing"]:
+        chunks.extend((offset, min(chunk_size, end - offset)) for offset in range(start, end, chunk_size))
+    with ThreadPoolExecutor(max_workers=max(parallel, 1)) as pool:
+        futures = [pool.submit(_put_chunk, session, url, audio["path"], offset, length, retries, timeout)
+                   for offset, length in chunks]
+        for future in futures:
+            future.result()
+
+    resp = session.post(f"{url}/finalize", params=params, timeout=timeout)
+    if resp.ok or resp.status_code in (400, 404):
+        # Finalized, or discarded by the backend; either way the upload cannot be resumed
+        audio.pop("resumable_upload_id", None)
+    return resp
+
+
+def submit_audio(session: requests.Session, base_url: str, audio: Dict[str, Any],
+                 timeout: Tuple[float, float], parallel: int = 4, retries: int = 3,
+                 params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    """
+    Submit a spooled file for transcription. The backend is first asked for the file
+    by content hash, so a recording it transcribed before is not uploaded again.
+    Otherwise the file is sent through the resumable upload API, or as one streamed
+    multipart request to /api/transcribe if the backend does not offer that API.
+    params (e.g. diarize) are passed as query parameters of every submission request.
+    """
+    resp = session.post(f"{base_url}/api/transcribe/hash/{audio['sha256']}", params=params, timeout=timeout)
+    if resp.status_code != 404:
+        return resp
+    if not os.path.exists(audio["path"]):
+        raise FileNotFoundError(audio["path"])
+    resp = upload_resumable(session, base_url, audio, timeout, parallel=parallel, retries=retries, params=params)
+    if resp is not None:
+        return resp
+    with MultipartFileStream(audio["path"], "file", audio["name"], audio["type"]) as body:
+        return session.post(
+            f"{base_url}/api/transcribe",
+            data=body,
+            params=params,
+            headers={"Content-Type": body.content_type},
+            timeout=timeout,
+        )
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class UploadStore:
+    """
+    Registry of resumable uploads. Each upload is a preallocated file in directory
+    that chunks are written into at their byte offset, so chunks may arrive in any
+    order and in parallel. Received chunks are recorded in SQLite (WAL mode), which
+    makes the registry safe to share between processes on one host. Uploads idle
+    for longer than ttl_seconds are removed by evict().
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float = 0):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS uploads (
+                    upload_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    sha256 TEXT,
+                    finalizing INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS chunks (
+                    upload_id TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    PRIMARY KEY (upload_id, offset)
+                )"""
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "uploads.sqlite3"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def create(self, upload_id: str, filename: str, size: int, chunk_size: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+        with open(self.part_path(upload_id), "wb") as f:
+            f.truncate(size)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO uploads (upload_id, filename, size, chunk_size, sha256, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (upload_id, filename, size, chunk_size, sha256, now, now),
+            )
+        return self.get(upload_id)
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT upload_id, filename, size, chunk_size, sha256, finalizing, created_at, updated_at FROM uploads WHERE upload_id = ?",
+            (upload_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(("upload_id", "filename", "size", "chunk_size", "sha256", "finalizing", "created_at", "updated_at"), row))
+        record["finalizing"] = bool(record["finalizing"])
+        chunks = conn.execute("SELECT offset, size FROM chunks WHERE upload_id = ? ORDER BY offset", (upload_id,)).fetchall()
+        record["missing"] = missing_ranges(chunks, record["size"])
+        record["received_bytes"] = record["size"] - sum(end - start for start, end in record["missing"])
+        return record
+
+    def write_chunk(self, upload_id: str, offset: int, data: bytes, sha256: str) -> None:
+        """Write an already verified chunk at offset and record it as received."""
+        with open(self.part_path(upload_id), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunks (upload_id, offset, size, sha256) VALUES (?, ?, ?, ?)",
+                (upload_id, offset, len(data), sha256),
+            )
+            conn.execute("UPDATE uploads SET updated_at = ? WHERE upload_id = ?", (time.time(), upload_id))
+
+    def hash_file(self, upload_id: str, block_size: int = 1024 * 1024) -> str:
+        sha256 = hashlib.sha256()
+        with open(self.part_path(upload_id), "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def claim(self, upload_id: str) -> bool:
+        """Mark the upload as being finalized. False if it is unknown or another finalize already claimed it."""
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE uploads SET finalizing = 1, updated_at = ? WHERE upload_id = ? AND finalizing = 0",
+                (time.time(), upload_id),
+            )
+        return cursor.rowcount == 1
+
+    def unclaim(self, upload_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE uploads SET finalizing = 0 WHERE upload_id = ?", (upload_id,))
+
+    def release(self, upload_id: str, path: str) -> str:
+        """Move the assembled file to path and forget the upload. Returns path."""
+        os.replace(self.part_path(upload_id), path)
+        self._forget(upload_id)
+        return path
+
+    def delete(self, upload_id: str) -> None:
+        part = self.part_path(upload_id)
+        if os.path.exists(part):
+            os.remove(part)
+        self._forget(upload_id)
+
+    def _forget(self, upload_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM chunks WHERE upload_id = ?", (upload_id,))
+            conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+
+    def evict(self) -> int:
+        if self.ttl_seconds <= 0:
+            return 0
+        rows = self._conn().execute(
+            "SELECT upload_id FROM uploads WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+        ).fetchall()
+        for (upload_id,) in rows:
+            self.delete(upload_id)
+        return len(rows)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def missing_ranges(chunks: List[tuple[int, int]], size: int) -> List[List[int]]:
+    """[start, end) byte ranges of size not covered by the (offset, length) chunks, sorted by offset."""
+    missing = []
+    covered = 0
+    for offset, length in sorted(chunks):
+        if offset > covered:
+            missing.append([covered, offset])
+        covered = max(covered, offset + length)
+    if covered < size:
+        missing.append([covered, size])
+    return missing